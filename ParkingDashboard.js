@@ -1,4 +1,4 @@
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import axios from "axios";
 import { GoogleMap, Marker } from "@react-google-maps/api";
 import { TextField, Button, Card, CardContent, Typography, Grid, Container, CircularProgress } from "@mui/material";
@@ -17,6 +17,25 @@ const ParkingDashboard = () => {
   const [predictionHours, setPredictionHours] = useState(2);
   const [loading, setLoading] = useState(false);
 
+  // Live availability: the server pushes only the lots that changed, so the list stays fresh without re-POSTing
+  useEffect(() => {
+    if (!userLocation) return undefined;
+    const feed = new EventSource(
+      `http://127.0.0.1:5000/live/lots?latitude=${userLocation.lat}&longitude=${userLocation.lng}&radius_m=1500`
+    );
+    feed.addEventListener("lot", (event) => {
+      const change = JSON.parse(event.data);
+      setParkingSpots((prevSpots) =>
+        prevSpots.map((p) =>
+          p.location_id === change.location_id && p.availability !== "Booked"
+            ? { ...p, available_slots: change.available, availability: change.available > 0 ? "Available" : "Not Available" }
+            : p
+        )
+      );
+    });
+    return () => feed.close();
+  }, [userLocation]);
+
   // Function to get user's location using GPS
   const enableLocation = () => {
     if (!navigator.geolocation) {
@@ -1,218 +1,359 @@
-import os
-import requests
-import joblib
-import numpy as np
-from dotenv import load_dotenv
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from flask_pymongo import PyMongo
-from bson import ObjectId
-
-# Load environment variables
-load_dotenv()
-
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
-
-# Secret key for JWT authentication
-SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
-
-# ✅ Google API Key
-GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
-if not GOOGLE_MAPS_API_KEY:
-    raise ValueError("❌ Missing Google Maps API Key. Check your .env file!")
-
-# ✅ Load AI Model
-MODEL_PATH = os.path.join(os.getcwd(), "C:/Users/dmodi/Desktop/finalProject/model/best_parking_predictor_model.pkl")
-if os.path.exists(MODEL_PATH):
-    model = joblib.load(MODEL_PATH)
-    print(f"✅ AI model loaded successfully from {MODEL_PATH}")
-else:
-    raise FileNotFoundError(f"❌ Model file not found at {MODEL_PATH}")
-
-# ✅ Import routes (After defining app)
-from routes.auth_routes import auth_routes  
-from routes.parking_routes import parking_routes
-
-# ✅ Register Blueprints
-app.register_blueprint(auth_routes, url_prefix="/auth")
-app.register_blueprint(parking_routes, url_prefix="/parking")
-
-# ✅ Initialize MongoDB
-app.config["MONGO_URI"] = "mongodb://localhost:27017/parking_system"
-mongo = PyMongo(app)
-
-# ✅ Function to Get Nearby Parking Locations
-def get_nearby_parking(latitude, longitude):
-    try:
-        url = f"https://maps.googleapis.com/maps/api/place/nearbysearch/json?location={latitude},{longitude}&radius=1500&type=parking&key={GOOGLE_MAPS_API_KEY}"
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            print("❌ Google Places API Error:", response.json())
-            return None
-
-        data = response.json()
-        if "results" not in data or not data["results"]:
-            print("⚠️ No parking spots found")
-            return None
-
-        return [
-            {
-                "name": place.get("name"),
-                "address": place.get("vicinity"),
-                "lat": place["geometry"]["location"]["lat"],
-                "lng": place["geometry"]["location"]["lng"]
-            } 
-            for place in data["results"]
-        ]
-    except Exception as e:
-        print("❌ Error in get_nearby_parking:", e)
-        return None
-
-# ✅ AI Model Prediction Route
-@app.route('/predict_parking_availability', methods=['POST'])
-def predict_parking_availability():
-    try:
-        data = request.json
-        latitude = data.get("latitude")
-        longitude = data.get("longitude")
-        day_of_week = data.get("day_of_week")
-        hour_of_day = data.get("hour_of_day")
-        weather = data.get("weather")
-        weather = weather.title()
-
-        weather_dict = {'Clear':0,'Windy':1,'Snowy':2,'Rainy':3,'Cloudy':4,'Foggy':5,'Stormy':6}
-        if weather in weather_dict:
-            weather = weather_dict[weather]
-
-        print(latitude, type(latitude))
-        print(longitude, type(longitude))
-        print(day_of_week, type(day_of_week))
-        print(hour_of_day, type(hour_of_day))
-        print(weather, type(weather))
-
-        if None in [latitude, longitude, day_of_week, hour_of_day, weather]:
-            return jsonify({"error": "All fields are required"}), 400
-
-        parking_spots = get_nearby_parking(latitude, longitude)
-        if not parking_spots:
-            return jsonify({"error": "No nearby parking locations found"}), 404
-
-        predictions = [
-            {
-                "name": spot["name"],
-                "address": spot["address"],
-                "lat": spot["lat"],
-                "lng": spot["lng"],
-                "availability": "Available" if model.predict(np.array([[spot["lat"], spot["lng"], day_of_week, weather, hour_of_day]]))[0] == 1 else "Not Available"
-            }
-            for spot in parking_spots
-        ]
-
-        return jsonify({"predicted_parking_spots": predictions})
-    except Exception as e:
-        print(e)
-        return jsonify({"error": str(e)}), 500
-
-# ✅ Route to Get Parking Slots
-@app.route('/get_parking_slots', methods=['POST'])
-def get_parking_slots():
-    try:
-        data = request.json
-        latitude = data.get("latitude")
-        longitude = data.get("longitude")
-
-        if not latitude or not longitude:
-            return jsonify({"error": "Latitude and longitude are required"}), 400
-
-        parking_spots = get_nearby_parking(latitude, longitude)
-        if not parking_spots:
-            return jsonify({"error": "No nearby parking locations found"}), 404
-
-        return jsonify({"parking_spots": parking_spots})
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-# ✅ Route to Book a Slot
-@app.route('/book_parking', methods=['POST'])
-def book_parking():
-    try:
-        data = request.json
-        # location_id = data.get("location_id")
-        #spot_name = data.get('name'),
-        #spot_address = data.get('address'),
-        #spot_longitude = data.get('longitude'),
-        #spot_latitude = data.get('latitude'),
-        
-        user_id = data.get("67d3276d26360c86d007935b")
-        location_id = data.get("")
-        
-        print(data)
-
-        if not location_id or not user_id:
-            return jsonify({"error": "Location ID and User ID are required"}), 400
-
-        # Find the parking lot by location_id
-        parking_lot = mongo.db.parking_slots.find_one({"location_id": location_id})
-        
-        if not parking_lot:
-            return jsonify({"error": "Parking lot not found"}), 404
-
-        # Check if there's an available slot
-        if parking_lot["available_slots"] <= 0:
-            return jsonify({"error": "No available slots left"}), 400
-
-        # Update the available slots and add the user to booked slots
-        mongo.db.parking_slots.update_one(
-            {"location_id": location_id},
-            {
-                "$inc": {"available_slots": -1},  # Decrease available slots by 1
-                "$push": {"booked_slots": user_id}  # Add user to booked slots
-            }
-        )
-
-        return jsonify({"message": "Slot booked successfully!"})
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-# ✅ Route to Cancel Booking
-@app.route('/cancel_booking', methods=['POST'])
-def cancel_booking():
-    try:
-        data = request.json
-        location_id = data.get("location_id")
-        user_id = data.get("user_id")
-
-        if not location_id or not user_id:
-            return jsonify({"error": "Location ID and User ID are required"}), 400
-
-        # Find the parking lot by location_id
-        parking_lot = mongo.db.parking_slots.find_one({"location_id": location_id})
-        
-        if not parking_lot:
-            return jsonify({"error": "Parking lot not found"}), 404
-
-        # Check if the user has booked the slot
-        if user_id not in parking_lot["booked_slots"]:
-            return jsonify({"error": "User has not booked this slot"}), 400
-
-        # Update the available slots and remove the user from booked slots
-        mongo.db.parking_slots.update_one(
-            {"location_id": location_id},
-            {
-                "$inc": {"available_slots": 1},  # Increase available slots by 1
-                "$pull": {"booked_slots": user_id}  # Remove user from booked slots
-            }
-        )
-
-        return jsonify({"message": "Booking canceled successfully!"})
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-# ✅ Run Flask App
-if __name__ == '__main__':
-    app.run(debug=True)
+import os
+import numpy as np
+from dotenv import load_dotenv
+from flask import Flask, Response, request, jsonify
+from flask_cors import CORS
+import ingest
+import live_feed
+import metrics
+import occupancy
+import model_registry
+import models
+import responses
+from places import nearby_places, places_cache_stats
+from bookings import LOT_FULL, LOT_NOT_FOUND, NOT_BOOKED, parse_hold_minutes
+from spatial_index import get_lot_index, nearby_lots, start_mongo_refresh
+from availability_table import get_table, predict_features
+from prediction import (
+    encode_weather, availability_label, spot_features, rows_features,
+    forecast_slots, forecast_features, forecast_timelines, parse_forecast,
+)
+
+# Load environment variables
+load_dotenv()
+
+app = Flask(__name__)
+CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
+
+# ✅ Per-request stage timings and GET /metrics
+metrics.init_app(app)
+
+# Secret key for JWT authentication
+SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
+
+# ✅ Google API Key
+GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+if not GOOGLE_MAPS_API_KEY:
+    raise ValueError("❌ Missing Google Maps API Key. Check your .env file!")
+
+# ✅ AI Model: loaded lazily through the shared registry, hot-reloaded on new versions
+# (the watcher and other background threads start in start_background_tasks below)
+
+# ✅ Import routes (After defining app)
+try:
+    from routes.auth_routes import auth_routes
+    from routes.parking_routes import parking_routes
+except ImportError:
+    # Flat checkout: the route modules sit next to app.py
+    from auth_routes import auth_routes
+    from parking_routes import parking_routes
+
+# ✅ Register Blueprints
+app.register_blueprint(auth_routes, url_prefix="/auth")
+app.register_blueprint(parking_routes, url_prefix="/parking")
+
+# ✅ Build the local lot index at startup
+get_lot_index()
+
+
+def preload():
+    """Load the model and its lookup tables now instead of on the first request."""
+    model = model_registry.get_model()
+    # ✅ Importing XGBoost takes seconds: do it once here rather than on every worker's first big batch
+    if hasattr(model, "warm"):
+        model.warm()
+    get_table()
+    return get_lot_index()
+
+
+def start_background_tasks():
+    """Threads this process needs; under a pre-forking server, call once per worker after fork."""
+    model_registry.watch()
+    # ✅ MongoDB: one shared, lazily connected client (see models.py); indexes come from `python models.py migrate`
+    models.start_hold_reaper()
+    # ✅ Live feed (/live/lots): watched lots' counts from Mongo, so changes made by every worker go out
+    live_feed.hub.start_polling(models.parking_collection)
+    # ✅ Pick up new lots from Mongo, with a full rebuild now and then for edited and deleted ones
+    start_mongo_refresh(models.parking_collection, interval=int(os.getenv("SPATIAL_REFRESH_SECONDS", "60")),
+                        rebuild_interval=int(os.getenv("SPATIAL_REBUILD_SECONDS", "3600")))
+    # ✅ Live occupancy from bookings, cancellations and sensor ingest (snapshotted to disk)
+    occupancy.start(models.parking_collection)
+    ingest.get_writer().add_listener(occupancy.aggregator.on_ingest)
+
+
+# gunicorn.conf.py sets DEFER_BACKGROUND_TASKS: threads don't survive fork, so workers start their own
+if os.getenv("DEFER_BACKGROUND_TASKS", "").lower() not in ("1", "true", "yes"):
+    start_background_tasks()
+
+# ✅ Function to Get Nearby Parking Locations
+def get_nearby_parking(latitude, longitude):
+    try:
+        # Known lots from the local spatial index first, Google Places only on a miss
+        lots = nearby_lots(latitude, longitude, radius_m=1500)
+        if lots:
+            return [
+                {"location_id": lot.get("location_id"), "name": lot["name"], "address": lot["address"],
+                 "lat": lot["lat"], "lng": lot["lng"]}
+                for lot in lots
+            ]
+
+        results = nearby_places(latitude, longitude)
+        if not results:
+            print("⚠️ No parking spots found")
+            return None
+
+        return [
+            {
+                "name": place.get("name"),
+                "address": place.get("vicinity"),
+                "lat": place["geometry"]["location"]["lat"],
+                "lng": place["geometry"]["location"]["lng"]
+            } 
+            for place in results
+        ]
+    except Exception as e:
+        print("❌ Error in get_nearby_parking:", e)
+        return None
+
+# ✅ Model Version and Load Time
+@app.route('/model_info', methods=['GET'])
+def model_info():
+    return jsonify(model_registry.model_info())
+
+# ✅ Live Occupancy for One Lot (rolling 5/15/60 minute windows)
+@app.route('/occupancy/<location_id>', methods=['GET'])
+def lot_occupancy(location_id):
+    stats = occupancy.aggregator.stats(location_id)
+    if stats is None:
+        return jsonify({"error": "No live data for this lot"}), 404
+    return jsonify({"location_id": location_id, **stats})
+
+# ✅ Places Cache Counters
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify({"places": places_cache_stats(), "live_feed": live_feed.hub.stats()})
+
+# ✅ Live Availability Feed: server-sent events with only the lots that changed
+@app.route('/live/lots', methods=['GET'])
+def live_lots():
+    if live_feed.unavailable:
+        return jsonify({"error": live_feed.unavailable}), 503
+    try:
+        latitude = float(request.args["latitude"])
+        longitude = float(request.args["longitude"])
+        radius_m = float(request.args.get("radius_m", 1500))
+    except (KeyError, ValueError):
+        return jsonify({"error": "Latitude and longitude are required"}), 400
+
+    lots = [lot for lot in nearby_lots(latitude, longitude, radius_m=radius_m, limit=live_feed.LIVE_FEED_MAX_LOTS)
+            if lot.get("location_id")]
+    if not lots:
+        return jsonify({"error": "No known parking lots in this area"}), 404
+
+    # Subscribe before reading the counts so no change falls between the snapshot and the stream
+    try:
+        subscriber = live_feed.hub.subscribe(lot["location_id"] for lot in lots)
+    except live_feed.FeedFull as e:
+        return jsonify({"error": str(e)}), 503
+    try:
+        counts = live_feed.read_counts(models.parking_collection, subscriber.lots)
+    except Exception as e:
+        live_feed.hub.unsubscribe(subscriber)
+        return jsonify({"error": str(e)}), 503
+    snapshot = {"lots": [
+        {"location_id": lot["location_id"], "name": lot.get("name"), "address": lot.get("address"), "lat": lot["lat"], "lng": lot["lng"],
+         "available": counts.get(lot["location_id"])}
+        for lot in lots
+    ]}
+    response = Response(live_feed.hub.stream(subscriber, snapshot), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(lambda: live_feed.hub.unsubscribe(subscriber))
+    return response
+
+# ✅ AI Model Prediction Route
+MAX_FORECAST_HOURS = int(os.getenv("MAX_FORECAST_HOURS", "24"))
+
+@app.route('/predict_parking_availability', methods=['POST'])
+def predict_parking_availability():
+    try:
+        data = request.json
+        latitude = data.get("latitude")
+        longitude = data.get("longitude")
+        day_of_week = data.get("day_of_week")
+        hour_of_day = data.get("hour_of_day")
+        weather = data.get("weather")
+        if weather is not None:
+            weather = encode_weather(weather)
+
+        if None in [latitude, longitude, day_of_week, hour_of_day, weather]:
+            return jsonify({"error": "All fields are required"}), 400
+
+        forecast = parse_forecast(data, weather, MAX_FORECAST_HOURS)
+
+        parking_spots = get_nearby_parking(latitude, longitude)
+        if not parking_spots:
+            return jsonify({"error": "No nearby parking locations found"}), 404
+
+        # ✅ Forecast mode: score the spots × hours × weather grid in one model call
+        if forecast:
+            hours, weather_names, weather_codes = forecast
+            slots = forecast_slots(day_of_week, hour_of_day, hours)
+            labels = predict_features(forecast_features(parking_spots, day_of_week, hour_of_day, hours, weather_codes))
+            timelines = forecast_timelines(labels, len(parking_spots), slots, weather_names)
+
+            columns = dict(responses.spot_columns(parking_spots), forecast=timelines)
+            return responses.respond("predicted_parking_spots", columns, lambda: [
+                {
+                    "name": spot["name"],
+                    "address": spot["address"],
+                    "lat": spot["lat"],
+                    "lng": spot["lng"],
+                    "forecast": timeline
+                }
+                for spot, timeline in zip(parking_spots, timelines)
+            ])
+
+        # ✅ Lots with fresh live occupancy for the current hour skip the model
+        live = occupancy.aggregator.live_for_request(parking_spots, day_of_week, hour_of_day)
+        labels = np.array([1 if available else 0 for available in live], dtype=np.int64)
+        needs_model = [i for i, available in enumerate(live) if available is None]
+
+        # ✅ Score the remaining spots in one model call
+        if needs_model:
+            spots = [parking_spots[i] for i in needs_model]
+            labels[needs_model] = predict_features(spot_features(spots, day_of_week, hour_of_day, weather))
+
+        # ✅ Plain JSON keeps one dict per spot; the compact formats send columns (see responses.py)
+        columns = dict(responses.spot_columns(parking_spots), availability=labels, live_available=live)
+        return responses.respond("predicted_parking_spots", columns, lambda: [
+            {
+                "name": spot["name"],
+                "address": spot["address"],
+                "lat": spot["lat"],
+                "lng": spot["lng"],
+                "availability": availability_label(label),
+                **({"live_available": available} if available is not None else {})
+            }
+            for spot, label, available in zip(parking_spots, labels, live)
+        ])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(e)
+        return jsonify({"error": str(e)}), 500
+
+# ✅ Batch Prediction Route (many rows, one model call)
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", "10000"))
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    try:
+        data = request.json or {}
+        rows = data.get("rows")
+
+        if not isinstance(rows, list) or not rows:
+            return jsonify({"error": "A non-empty 'rows' list is required"}), 400
+        if len(rows) > MAX_BATCH_ROWS:
+            return jsonify({"error": f"At most {MAX_BATCH_ROWS} rows per batch"}), 413
+
+        features = rows_features(rows)
+        labels = predict_features(features)
+
+        # ✅ Results are returned in the same order as the input rows
+        return responses.respond("predictions", {"availability": labels}, lambda: [availability_label(label) for label in labels])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(e)
+        return jsonify({"error": str(e)}), 500
+
+# ✅ Route to Get Parking Slots
+@app.route('/get_parking_slots', methods=['POST'])
+def get_parking_slots():
+    try:
+        data = request.json
+        latitude = data.get("latitude")
+        longitude = data.get("longitude")
+
+        if not latitude or not longitude:
+            return jsonify({"error": "Latitude and longitude are required"}), 400
+
+        parking_spots = get_nearby_parking(latitude, longitude)
+        if not parking_spots:
+            return jsonify({"error": "No nearby parking locations found"}), 404
+
+        columns = dict(responses.spot_columns(parking_spots), location_id=[spot.get("location_id") for spot in parking_spots])
+        return responses.respond("parking_spots", columns, lambda: parking_spots)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ✅ Route to Book a Slot
+@app.route('/book_parking', methods=['POST'])
+def book_parking():
+    try:
+        data = request.json
+        location_id = data.get("location_id")
+        user_id = data.get("user_id")
+        hold_minutes = data.get("hold_minutes")
+
+        if not location_id or not user_id:
+            return jsonify({"error": "Location ID and User ID are required"}), 400
+
+        try:
+            hold_seconds = parse_hold_minutes(hold_minutes)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # One conditional update takes the slot; it only matches while available_slots > 0
+        status, booking_id = models.book_slot(location_id, user_id, hold_seconds=hold_seconds)
+
+        if status == LOT_NOT_FOUND:
+            return jsonify({"error": "Parking lot not found"}), 404
+        if status == LOT_FULL:
+            return jsonify({"error": "No available slots left"}), 400
+
+        return jsonify({"message": "Slot booked successfully!", "booking_id": str(booking_id)})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ✅ Route to Cancel Booking
+@app.route('/cancel_booking', methods=['POST'])
+def cancel_booking():
+    try:
+        data = request.json
+        location_id = data.get("location_id")
+        user_id = data.get("user_id")
+
+        if not location_id or not user_id:
+            return jsonify({"error": "Location ID and User ID are required"}), 400
+
+        status = models.cancel_slot(location_id, user_id)
+
+        if status == LOT_NOT_FOUND:
+            return jsonify({"error": "Parking lot not found"}), 404
+        if status == NOT_BOOKED:
+            return jsonify({"error": "User has not booked this slot"}), 400
+
+        return jsonify({"message": "Booking canceled successfully!"})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ✅ Streaming Bulk Ingest of Sensor Occupancy Updates (NDJSON)
+@app.route('/ingest/occupancy', methods=['POST'])
+def ingest_occupancy():
+    try:
+        ordered = request.args.get("ordered", "false").lower() in ("1", "true", "yes")
+        report = ingest.ingest_stream(ingest.read_lines(request.stream), ingest.get_writer(), ordered=ordered)
+        return jsonify(report)
+    except ingest.IngestBusy as e:
+        # What was queued before the queue filled up, and the line to resend from
+        return jsonify({"error": str(e), **(e.report or {})}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ✅ Run Flask App
+if __name__ == '__main__':
+    app.run(debug=True)
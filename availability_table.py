@@ -0,0 +1,172 @@
+"""Precomputed availability for every known lot.
+
+For known lots the model only ever sees 7 days × 24 hours × 7 weather codes
+= 1,176 feature combinations, so `build` scores them all in bulk and writes
+one uint8 per combination to a .npy file (lots × 7 × 24 × 7) plus a .npz
+index of lot coordinates. Serving opens the table with mmap_mode="r", so all
+worker processes share the same pages through the OS page cache, and answers
+known lots with one dict lookup and one array read. Rows for unknown lots, or
+a table built for a different model version, fall back to live inference.
+
+The lots are the ones /get_parking_slots serves: the Mongo parking_slots
+documents with a name and an address, read the same way as the spatial index.
+Rebuild after adding lots. --lots-csv builds from a parking-data CSV instead
+(synthetic lots, for benchmarks only).
+
+    python availability_table.py build
+    python availability_table.py build --lots-csv generated_parking_data_10000_numeric_day.csv
+"""
+import argparse
+import os
+import threading
+import numpy as np
+import model_registry
+from metrics import stage
+from prediction import WEATHER_CLASSES, predict_matrix
+from spatial_index import LotIndex
+
+AVAILABILITY_TABLE_PATH = os.getenv("AVAILABILITY_TABLE_PATH", os.path.join(model_registry.MODEL_DIR, "availability_table.npy"))
+DAYS, HOURS, WEATHERS = 7, 24, len(WEATHER_CLASSES)
+COORD_DECIMALS = 6
+MISSING = -1
+
+
+def _index_path(table_path):
+    return os.path.splitext(table_path)[0] + "_index.npz"
+
+
+def _lot_key(lat, lng):
+    return round(float(lat), COORD_DECIMALS), round(float(lng), COORD_DECIMALS)
+
+
+class AvailabilityTable:
+    def __init__(self, table, lats, lngs, model_version):
+        self.table = table
+        self.model_version = model_version
+        self.rows = {_lot_key(lat, lng): i for i, (lat, lng) in enumerate(zip(lats.tolist(), lngs.tolist()))}
+
+    def __len__(self):
+        return len(self.rows)
+
+    @classmethod
+    def open(cls, path=AVAILABILITY_TABLE_PATH):
+        with np.load(_index_path(path)) as index:
+            lats, lngs, version = index["lats"], index["lngs"], str(index["model_version"])
+        return cls(np.load(path, mmap_mode="r"), lats, lngs, version)
+
+    def lookup(self, features):
+        """Labels for an N×5 feature matrix; MISSING where the lot or a categorical value is unknown."""
+        features = np.asarray(features)
+        out = np.full(len(features), MISSING, dtype=np.int16)
+        rows = np.array([self.rows.get(_lot_key(lat, lng), MISSING) for lat, lng in features[:, :2]], dtype=np.int64)
+        day, hour, weather = (features[:, i].astype(np.int64) for i in (2, 3, 4))
+        ok = (
+            (rows >= 0)
+            & (day >= 0) & (day < DAYS) & (day == features[:, 2])
+            & (hour >= 0) & (hour < HOURS) & (hour == features[:, 3])
+            & (weather >= 0) & (weather < WEATHERS) & (weather == features[:, 4])
+        )
+        out[ok] = self.table[rows[ok], day[ok], hour[ok], weather[ok]]
+        return out
+
+
+def build(lats, lngs, model, path=AVAILABILITY_TABLE_PATH, model_version=None, lots_per_batch=256):
+    """Score every lot × day × hour × weather combination and write the memory-mappable table."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    combos = np.array(np.meshgrid(np.arange(DAYS), np.arange(HOURS), np.arange(WEATHERS), indexing="ij"))
+    combos = combos.reshape(3, -1).T.astype(np.float64)  # (1176, 3) in day, hour, weather order
+
+    tmp_path = path + ".tmp.npy"
+    table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8, shape=(len(lats), DAYS, HOURS, WEATHERS))
+    for start in range(0, len(lats), lots_per_batch):
+        stop = min(start + lots_per_batch, len(lats))
+        n = stop - start
+        features = np.empty((n, len(combos), 5), dtype=np.float64)
+        features[:, :, 0] = lats[start:stop, None]
+        features[:, :, 1] = lngs[start:stop, None]
+        features[:, :, 2:] = combos[None, :, :]
+        labels = predict_matrix(model, features.reshape(-1, 5))
+        table[start:stop] = labels.reshape(n, DAYS, HOURS, WEATHERS).astype(np.uint8)
+    table.flush()
+    del table
+
+    index_tmp = _index_path(path) + ".tmp.npz"
+    np.savez(index_tmp, lats=lats, lngs=lngs, model_version=np.array(model_version or ""))
+    os.replace(tmp_path, path)
+    os.replace(index_tmp, _index_path(path))
+    return path
+
+
+def served_lots(collection):
+    """(lats, lngs) of the lots the spatial index serves from `collection`."""
+    index = LotIndex()
+    index.refresh_from_mongo(collection)
+    lots = index.all_lots()
+    return [lot["lat"] for lot in lots], [lot["lng"] for lot in lots]
+
+
+_table = None
+_checked_version = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """The table for the model version currently served, or None if there isn't one."""
+    global _table, _checked_version
+    version = model_registry.current_version()
+    if _checked_version == version:
+        return _table
+    with _table_lock:
+        if _checked_version != version:
+            _table = None
+            if os.path.exists(AVAILABILITY_TABLE_PATH) and os.path.exists(_index_path(AVAILABILITY_TABLE_PATH)):
+                candidate = AvailabilityTable.open(AVAILABILITY_TABLE_PATH)
+                if candidate.model_version == version:
+                    _table = candidate
+                    print(f"✅ Availability table loaded for {len(candidate)} lots (model {version})")
+            _checked_version = version
+        return _table
+
+
+def predict_features(features):
+    """Model labels for an N×5 matrix: table lookups for known lots, live inference for the rest."""
+    model = model_registry.get_model()
+    table = get_table()
+    if table is None:
+        with stage("inference.model"):
+            return predict_matrix(model, features)
+
+    with stage("inference.table"):
+        labels = table.lookup(features)
+        misses = labels == MISSING
+    if misses.any():
+        with stage("inference.model"):
+            labels[misses] = predict_matrix(model, np.asarray(features)[misses])
+    return labels
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute availability for every known lot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build")
+    build_parser.add_argument("--lots-csv", help="Build from a parking-data CSV instead of Mongo (benchmarks only)")
+    build_parser.add_argument("--output", default=AVAILABILITY_TABLE_PATH)
+    args = parser.parse_args()
+
+    if args.lots_csv:
+        index = LotIndex()
+        index.load_csv(args.lots_csv)
+        lots = index.all_lots()
+        lats, lngs = [lot["lat"] for lot in lots], [lot["lng"] for lot in lots]
+    else:
+        from models import parking_collection
+
+        lats, lngs = served_lots(parking_collection)
+    if not lats:
+        raise SystemExit("❌ No lots to precompute")
+    model = model_registry.get_model()
+    path = build(lats, lngs, model, path=args.output, model_version=model_registry.current_version())
+    print(f"💾 Availability table for {len(lats)} lots written to {path}")
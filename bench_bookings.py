@@ -0,0 +1,91 @@
+"""Concurrency stress test for booking: proves no overselling and reports bookings/sec.
+
+    python bench_bookings.py                       # in-memory Mongo stand-in
+    python bench_bookings.py --mongo-uri mongodb://localhost:27017 --db bench_parking
+"""
+import argparse
+import random
+import threading
+import time
+from bookings import book_slot, cancel_slot, BOOKED, CANCELLED
+from models import ensure_indexes
+
+
+def seed(db, lots, capacity):
+    db.parking_slots.delete_many({})
+    db.bookings.delete_many({})
+    for i in range(lots):
+        db.parking_slots.insert_one({"location_id": f"lot-{i}", "available_slots": capacity})
+
+
+def run(db, lots, capacity, threads, attempts, cancel_ratio):
+    booked = [0] * threads
+    cancelled = [0] * threads
+    start = threading.Barrier(threads + 1)
+
+    def worker(n):
+        rng = random.Random(n)
+        start.wait()
+        for i in range(attempts):
+            lot = f"lot-{rng.randrange(lots)}"
+            user = f"user-{n}-{i}"
+            status, _ = book_slot(db, lot, user)
+            if status == BOOKED:
+                booked[n] += 1
+                if rng.random() < cancel_ratio and cancel_slot(db, lot, user) == CANCELLED:
+                    cancelled[n] += 1
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    start.wait()
+    started = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    # ✅ Invariants: no lot below zero, and slots + active bookings == capacity for every lot
+    oversold = []
+    for lot in db.parking_slots.find({}, {"location_id": 1, "available_slots": 1}):
+        active = db.bookings.count_documents({"location_id": lot["location_id"]})
+        if lot["available_slots"] < 0 or lot["available_slots"] + active != capacity:
+            oversold.append((lot["location_id"], lot["available_slots"], active))
+
+    return {
+        "threads": threads,
+        "attempts": threads * attempts,
+        "booked": sum(booked),
+        "cancelled": sum(cancelled),
+        "elapsed_s": round(elapsed, 3),
+        "bookings_per_s": round(sum(booked) / elapsed, 1),
+        "oversold_lots": oversold,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Booking concurrency stress test")
+    parser.add_argument("--mongo-uri", help="Use a real mongod instead of the in-memory stand-in")
+    parser.add_argument("--db", default="bench_parking")
+    parser.add_argument("--lots", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=200, help="Booking attempts per thread")
+    parser.add_argument("--cancel-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+
+        db = MongoClient(args.mongo_uri, maxPoolSize=args.threads)[args.db]
+    else:
+        from mongo_stub import InMemoryDatabase
+
+        db = InMemoryDatabase(args.db)
+
+    ensure_indexes(db)
+    seed(db, args.lots, args.capacity)
+    result = run(db, args.lots, args.capacity, args.threads, args.attempts, args.cancel_ratio)
+    print(result)
+    if result["oversold_lots"]:
+        raise SystemExit("❌ Overselling detected")
+    print("✅ No overselling")
@@ -0,0 +1,353 @@
+"""End-to-end HTTP benchmark of the Flask endpoints.
+
+    python bench_http.py --duration 10 --concurrency 1 16 64 --output bench_results/http.json
+    python bench_http.py --output bench_results/new.json --baseline bench_results/http.json --max-regression 0.2
+
+By default everything runs locally: the Google stub (google_stub.py) and the
+app (`bench_http.py --serve`) each run in their own process, the app uses the
+in-memory Mongo stand-in (MONGO_URI=memory://) seeded with --lots lots, and a
+small throwaway model is trained from generate_parking_data.py rows. Pass
+--mongo-uri to use a local mongod instead, or --base-url to drive an app that
+is already running (it must have the lot-<n> parking_slots seeded).
+
+Results are RPS and p50/p95/p99 latency per endpoint and concurrency level,
+written as one JSON document. With --baseline, any endpoint whose p95 grew or
+whose RPS fell by more than --max-regression fails the run.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import requests
+
+WEATHERS = ["Clear", "Cloudy", "Rainy", "Windy"]
+POSTCODES = ["E1", "EC1A", "N1", "NW1", "SE1", "SW1A", "W1", "WC2"]
+LONDON = (51.5074, -0.1278)
+
+
+def _point(rng):
+    return round(LONDON[0] + rng.uniform(-0.08, 0.08), 6), round(LONDON[1] + rng.uniform(-0.12, 0.12), 6)
+
+
+def _prediction_body(rng):
+    lat, lng = _point(rng)
+    return {"latitude": lat, "longitude": lng, "day_of_week": int(rng.integers(7)),
+            "hour_of_day": int(rng.integers(24)), "weather": WEATHERS[rng.integers(len(WEATHERS))]}
+
+
+# ✅ Each scenario issues one or more requests and returns [(endpoint, seconds, status)]
+def _timed(session, base_url, endpoint, path, body):
+    started = time.perf_counter()
+    try:
+        status = session.post(base_url + path, json=body, timeout=30).status_code
+    except requests.RequestException:
+        status = 0
+    return endpoint, time.perf_counter() - started, status
+
+
+def predict(session, base_url, rng, worker, i, lots):
+    return [_timed(session, base_url, "predict_parking_availability", "/predict_parking_availability", _prediction_body(rng))]
+
+
+def predict_batch(session, base_url, rng, worker, i, lots):
+    rows = [_prediction_body(rng) for _ in range(100)]
+    return [_timed(session, base_url, "predict_batch", "/predict_batch", {"rows": rows})]
+
+
+def parking_slots(session, base_url, rng, worker, i, lots):
+    lat, lng = _point(rng)
+    return [_timed(session, base_url, "get_parking_slots", "/get_parking_slots", {"latitude": lat, "longitude": lng})]
+
+
+def booking(session, base_url, rng, worker, i, lots):
+    body = {"location_id": f"lot-{rng.integers(lots)}", "user_id": f"bench-{worker}-{i}"}
+    return [
+        _timed(session, base_url, "book_parking", "/book_parking", body),
+        _timed(session, base_url, "cancel_booking", "/cancel_booking", body),
+    ]
+
+
+def login(session, base_url, rng, worker, i, lots):
+    # A fixed pool of users: the first call for each registers it, the rest are plain logins
+    body = {"email": f"bench{rng.integers(200)}@example.com", "password": "bench-password"}
+    return [_timed(session, base_url, "auth_login", "/auth/login", body)]
+
+
+def blueprint_slots(session, base_url, rng, worker, i, lots):
+    body = {"location": f"{rng.integers(1, 300)} High Street", "postcode": POSTCODES[rng.integers(len(POSTCODES))]}
+    return [_timed(session, base_url, "parking_get_parking_slots", "/parking/get_parking_slots", body)]
+
+
+def blueprint_predict(session, base_url, rng, worker, i, lots):
+    return [_timed(session, base_url, "parking_predict_parking_availability", "/parking/predict_parking_availability",
+                   _prediction_body(rng))]
+
+
+SCENARIOS = {
+    "predict": predict,
+    "predict_batch": predict_batch,
+    "get_parking_slots": parking_slots,
+    "booking": booking,
+    "auth_login": login,
+    "parking_get_parking_slots": blueprint_slots,
+    "parking_predict": blueprint_predict,
+}
+
+
+def drive(base_url, scenario, concurrency, duration, lots, seed=42):
+    samples = [[] for _ in range(concurrency)]
+    start = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def worker(n):
+        rng = np.random.default_rng([seed, n])
+        session = requests.Session()
+        start.wait()
+        i = 0
+        while time.perf_counter() < deadline[0]:
+            samples[n].extend(scenario(session, base_url, rng, n, i, lots))
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start.wait()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    by_endpoint = {}
+    for endpoint, seconds, status in (s for worker_samples in samples for s in worker_samples):
+        by_endpoint.setdefault(endpoint, []).append((seconds, status))
+    return [summarize(endpoint, concurrency, elapsed, results) for endpoint, results in by_endpoint.items()]
+
+
+def summarize(endpoint, concurrency, elapsed, results):
+    ms = np.array([seconds for seconds, _ in results]) * 1000
+    statuses = np.array([status for _, status in results])
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "rps": round(len(results) / elapsed, 1),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "non_2xx": int(((statuses < 200) | (statuses >= 300)).sum()),
+        "errors_5xx": int(((statuses >= 500) | (statuses == 0)).sum()),
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Entries whose p95 grew or RPS fell by more than max_regression versus the baseline run."""
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["endpoint"], result["concurrency"]))
+        if not before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + max_regression) or result["rps"] < before["rps"] * (1 - max_regression):
+            regressions.append({"endpoint": result["endpoint"], "concurrency": result["concurrency"],
+                                "p95_ms": [before["p95_ms"], result["p95_ms"]], "rps": [before["rps"], result["rps"]]})
+    return regressions
+
+
+# --- local app ---------------------------------------------------------------
+def ensure_model(lots):
+    """Publish a small model into MODEL_DIR when it has none, so prediction routes have something to serve."""
+    import model_registry
+
+    if model_registry.registry.versions():
+        return
+    import xgboost as xgb
+    from generate_parking_data import generate_chunk
+    from prediction import FEATURE_COLUMNS
+
+    rows = generate_chunk(lots, 20_000, seed=42, chunk_index=0)
+    X = np.column_stack([rows[name] for name in FEATURE_COLUMNS]).astype(np.float32)
+    y = (rows["availability"] >= 0.5).astype(np.int64)
+    model = xgb.XGBClassifier(n_estimators=50, max_depth=6, tree_method="hist")
+    model.fit(X, y)
+    model_registry.publish(model, model_dir=model_registry.MODEL_DIR)
+
+
+def seed_lots(db, lots, capacity):
+    lats, lngs, _ = lots
+    db.parking_slots.delete_many({})
+    db.parking_slots.insert_many([
+        {"location_id": f"lot-{i}", "name": f"Bench Lot {i}", "address": f"{i} Bench Road",
+         "lat": float(lat), "lng": float(lng), "available_slots": capacity}
+        for i, (lat, lng) in enumerate(zip(lats, lngs))
+    ])
+
+
+def serve(port, n_lots, capacity):
+    from generate_parking_data import make_lots
+    from werkzeug.serving import make_server
+
+    lots = make_lots(n_lots, max(n_lots // 100, 1), seed=42)
+    ensure_model(lots)
+
+    import app as app_module
+    import models
+    import occupancy
+
+    models.ensure_indexes(models.db)
+    seed_lots(models.db, lots, capacity)
+    # The app read live levels before the lots existed; seed them so bookings have counts to move
+    occupancy.aggregator.load_levels(models.parking_collection)
+    print(f"✅ Bench app listening on 127.0.0.1:{port}", flush=True)
+    make_server("127.0.0.1", port, app_module.app, threaded=True).serve_forever()
+
+
+def _free_port():
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url, process, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Bench app exited with code {process.returncode}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.5)
+    raise SystemExit(f"❌ {url} did not come up within {timeout}s")
+
+
+def _stop(processes, timeout=10):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def start_local_app(args):
+    """Google stub and app in child processes; returns (base_url, processes)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix="bench_http_")
+    stub_port, app_port = _free_port(), _free_port()
+    stub = subprocess.Popen([sys.executable, os.path.join(here, "google_stub.py"),
+                             "--port", str(stub_port), "--latency", str(args.google_latency)])
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    env = dict(
+        os.environ,
+        GOOGLE_MAPS_API_KEY=os.getenv("GOOGLE_MAPS_API_KEY", "bench-key"),
+        GOOGLE_PLACES_URL=f"{stub_url}/maps/api/place/nearbysearch/json",
+        GOOGLE_GEOCODE_URL=f"{stub_url}/maps/api/geocode/json",
+        MONGO_URI=args.mongo_uri or "memory://",
+        GEOCODE_CACHE_PATH=os.path.join(workdir, "geocode_cache.sqlite3"),
+        MODEL_DIR=os.getenv("MODEL_DIR", os.path.join(workdir, "model")),
+        SPATIAL_INDEX_CSV="",
+        SPATIAL_REFRESH_SECONDS="1",
+    )
+    processes = [stub]
+    try:
+        processes.insert(0, subprocess.Popen(
+            [sys.executable, os.path.join(here, "bench_http.py"), "--serve", "--port", str(app_port),
+             "--lots", str(args.lots), "--capacity", str(args.capacity)],
+            env=env,
+        ))
+        base_url = f"http://127.0.0.1:{app_port}"
+        _wait_for(stub_url, stub)
+        _wait_for(base_url + "/model_info", processes[0])
+        time.sleep(2)  # let the spatial index pick up the seeded lots
+    except BaseException:
+        # Don't leave the stub (or a half-started app) running when startup fails or is interrupted
+        _stop(processes)
+        raise
+    return base_url, processes
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HTTP benchmark of the Flask endpoints")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario and concurrency level")
+    parser.add_argument("--warmup", type=float, default=2, help="Unrecorded seconds before each scenario")
+    parser.add_argument("--base-url", help="Drive an already running app instead of starting one")
+    parser.add_argument("--mongo-uri", help="Local mongod for the started app (default: in-memory stand-in)")
+    parser.add_argument("--google-latency", type=float, default=0.0, help="Artificial Google stub delay in seconds")
+    parser.add_argument("--lots", type=int, default=5_000)
+    parser.add_argument("--capacity", type=int, default=1_000_000, help="Slots per seeded lot")
+    parser.add_argument("--output", help="Write the results document (JSON) here")
+    parser.add_argument("--baseline", help="Results document from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 growth / RPS drop versus --baseline")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=5000, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.lots, args.capacity)
+        return
+
+    processes = []
+    base_url = args.base_url
+    if not base_url:
+        base_url, processes = start_local_app(args)
+
+    results = []
+    try:
+        for name in args.scenarios:
+            if args.warmup:
+                drive(base_url, SCENARIOS[name], max(args.concurrency), args.warmup, args.lots)
+            for concurrency in args.concurrency:
+                for result in drive(base_url, SCENARIOS[name], concurrency, args.duration, args.lots):
+                    results.append(result)
+                    print(f"📈 {result['endpoint']:<40} c={concurrency:<4} {result['rps']:>9.1f} rps  "
+                          f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms p99={result['p99_ms']:.1f}ms  "
+                          f"non-2xx={result['non_2xx']}")
+    finally:
+        _stop(processes)
+
+    document = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {k: getattr(args, k) for k in ("scenarios", "concurrency", "duration", "lots", "google_latency", "mongo_uri", "base_url")},
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+        print("✅ No regressions versus the baseline")
+
+
+if __name__ == "__main__":
+    main()
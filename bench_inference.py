@@ -0,0 +1,54 @@
+"""Microbenchmark: joblib/XGBClassifier.predict vs the compiled NumPy ensemble.
+
+    python bench_inference.py model/best_parking_predictor_model.pkl
+
+Reports p50/p99 latency for single-row calls and for batches, and checks that
+both paths return identical labels. `compiled` is what serving uses (the
+NumPy arrays up to COMPILED_MAX_ROWS rows, the embedded booster above);
+`arrays` always walks the NumPy arrays, to show where the crossover is.
+"""
+import argparse
+import copy
+import os
+import time
+import joblib
+import numpy as np
+from compiled_model import CompiledEnsemble, compile_model, compiled_path_for, verification_sample
+
+
+def latency(fn, X, repeats):
+    fn(X)  # warm-up
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - t0)
+    us = np.array(times) * 1e6
+    return {"p50_us": round(float(np.percentile(us, 50)), 1), "p99_us": round(float(np.percentile(us, 99)), 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare model.predict with the compiled ensemble")
+    parser.add_argument("model", help="Path to the joblib-pickled XGBClassifier")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 20, 1000, 100000])
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    compiled_path = compiled_path_for(args.model)
+    compiled = CompiledEnsemble.load(compiled_path) if os.path.exists(compiled_path) else compile_model(model)
+    arrays = copy.copy(compiled)
+    arrays.max_rows = None
+
+    for size in args.batch_sizes:
+        X = verification_sample(size, seed=size)
+        repeats = max(5, args.repeats // max(1, size // 1000))
+        expected = np.asarray(model.predict(X))
+        same = bool(np.array_equal(expected, compiled.predict(X)) and np.array_equal(expected, arrays.predict(X)))
+        print({
+            "rows": size,
+            "xgboost": latency(model.predict, X, repeats),
+            "compiled": latency(compiled.predict, X, repeats),
+            "arrays": latency(arrays.predict, X, repeats),
+            "identical": same,
+        })
@@ -0,0 +1,124 @@
+"""Occupancy ingest throughput: NDJSON bulk ingest versus one HTTP request per change.
+
+    python bench_ingest.py --updates 200000 --streams 4
+    python bench_ingest.py --mongo-uri mongodb://localhost:27017 --output bench_results/ingest.json
+
+Starts the app like bench_http.py (Google stub, in-memory Mongo unless
+--mongo-uri, --lots seeded lots). The per-request path books and cancels
+slots through /book_parking and /cancel_booking, one change per request. The
+ingest path streams the same kind of +1/-1 changes as chunked NDJSON to
+/ingest/occupancy from --streams concurrent connections.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import numpy as np
+import requests
+from bench_http import drive, booking, start_local_app
+
+
+def ndjson_lines(rng, count, lots, chunk_lines=500):
+    """Chunks of NDJSON for a chunked request body: random car in/out events."""
+    for start in range(0, count, chunk_lines):
+        n = min(chunk_lines, count - start)
+        lot_ids = rng.integers(lots, size=n)
+        deltas = rng.choice([-1, 1], size=n)
+        now = time.time()
+        yield "".join(
+            f'{{"location_id": "lot-{lot}", "delta": {delta}, "ts": {now:.3f}}}\n' for lot, delta in zip(lot_ids, deltas)
+        ).encode("utf-8")
+
+
+def bench_ingest(base_url, updates, streams, lots, ordered):
+    reports = [None] * streams
+    per_stream = updates // streams
+
+    def stream(n):
+        rng = np.random.default_rng([42, n])
+        response = requests.post(
+            f"{base_url}/ingest/occupancy",
+            params={"ordered": str(ordered).lower()},
+            data=ndjson_lines(rng, per_stream, lots),
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=600,
+        )
+        reports[n] = response.json() if response.ok else {"error": response.text[:500]}
+
+    threads = [threading.Thread(target=stream, args=(n,)) for n in range(streams)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    totals = [r["totals"] for r in reports if "totals" in r]
+    accepted = sum(t["accepted"] for t in totals)
+    return {
+        "path": "ingest",
+        "streams": streams,
+        "ordered": ordered,
+        "updates": per_stream * streams,
+        "accepted": accepted,
+        "rejected": sum(t["rejected"] for t in totals),
+        "writes": sum(t["lots"] for t in totals),
+        "failed_streams": [r["error"] for r in reports if "error" in r],
+        "elapsed_s": round(elapsed, 3),
+        "updates_per_s": round(accepted / elapsed, 1),
+    }
+
+
+def bench_per_request(base_url, duration, concurrency, lots):
+    results = drive(base_url, booking, concurrency, duration, lots)
+    changes = sum(r["requests"] - r["non_2xx"] for r in results)
+    return {
+        "path": "per-request",
+        "concurrency": concurrency,
+        "updates": changes,
+        "elapsed_s": duration,
+        "updates_per_s": round(changes / duration, 1),
+        "endpoints": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk ingest versus per-request occupancy updates")
+    parser.add_argument("--updates", type=int, default=200_000, help="Changes sent through the ingest endpoint")
+    parser.add_argument("--streams", type=int, default=4, help="Concurrent NDJSON uploads")
+    parser.add_argument("--ordered", action="store_true", help="Ordered bulk writes")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of per-request load")
+    parser.add_argument("--concurrency", type=int, default=16, help="Threads for the per-request path")
+    parser.add_argument("--base-url", help="Drive an already running app instead of starting one")
+    parser.add_argument("--mongo-uri", help="Local mongod for the started app (default: in-memory stand-in)")
+    parser.add_argument("--lots", type=int, default=5_000)
+    parser.add_argument("--capacity", type=int, default=1_000_000)
+    parser.add_argument("--output", help="Write the results (JSON) here")
+    args = parser.parse_args()
+    args.google_latency = 0.0
+
+    processes = []
+    base_url = args.base_url
+    if not base_url:
+        base_url, processes = start_local_app(args)
+
+    try:
+        per_request = bench_per_request(base_url, args.duration, args.concurrency, args.lots)
+        print(f"📈 per-request: {per_request['updates_per_s']:,.0f} changes/s at concurrency {args.concurrency}")
+        bulk = bench_ingest(base_url, args.updates, args.streams, args.lots, args.ordered)
+        print(f"📈 ingest:      {bulk['updates_per_s']:,.0f} changes/s over {args.streams} streams "
+              f"({bulk['accepted']:,} accepted, {bulk['writes']:,} coalesced writes)")
+        if bulk["failed_streams"]:
+            print(f"❌ Failed streams: {bulk['failed_streams']}")
+        if per_request["updates_per_s"]:
+            print(f"✅ Speed-up: {bulk['updates_per_s'] / per_request['updates_per_s']:.1f}x")
+    finally:
+        for process in processes:
+            process.terminate()
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"per_request": per_request, "ingest": bulk}, f, indent=2)
+        print(f"📝 Results written to {args.output}")
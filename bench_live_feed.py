@@ -0,0 +1,243 @@
+"""Server CPU for N live feed subscribers versus N clients polling the dashboard endpoints.
+
+    python bench_live_feed.py --clients 100 1000 --duration 30 --output bench_results/live_feed.json
+
+Starts the app like bench_http.py (Google stub, in-memory Mongo, --lots
+seeded lots) and, for each client count N, runs two phases against the same
+background churn of --event-rate bookings and cancellations per second:
+  sse    N connections to /live/lots around random lots, all read from one
+         thread with a selector, counting the lot events they receive
+  poll   N clients that each POST /get_parking_slots and
+         /predict_parking_availability every --poll-interval seconds, as
+         ParkingDashboard.js used to
+and reports the app process's CPU seconds (utime + stime from /proc), RSS and
+thread count over the measured --duration. Linux only.
+"""
+import argparse
+import json
+import os
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import numpy as np
+import requests
+from bench_http import start_local_app
+
+EVENT_MARKER = b"event: lot\n"
+
+
+def process_stats(pid):
+    """CPU seconds used so far, RSS in MB and thread count of a process."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    status = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            status[name] = value.split()
+    return cpu, int(status["VmRSS"][0]) / 1024, int(status["Threads"][0])
+
+
+class Churn:
+    """Book and cancel random lots at a fixed rate until stopped; every pair is two availability changes."""
+
+    def __init__(self, base_url, lots, rate):
+        self.base_url, self.lots, self.rate = base_url, lots, rate
+        self.changes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        session = requests.Session()
+        rng = np.random.default_rng(7)
+        interval, i = 2.0 / self.rate, 0
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            body = {"location_id": f"lot-{rng.integers(self.lots)}", "user_id": f"churn-{i}"}
+            if session.post(self.base_url + "/book_parking", json=body, timeout=30).ok:
+                self.changes += 1
+                if session.post(self.base_url + "/cancel_booking", json=body, timeout=30).ok:
+                    self.changes += 1
+            i += 1
+            next_at += interval
+            self._stop.wait(max(0.0, next_at - time.perf_counter()))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def measured(pid, duration, base_url, lots, event_rate, during=None):
+    """Run `during(deadline)` (or just sleep) for `duration` seconds under churn; CPU and memory of the app."""
+    with Churn(base_url, lots, event_rate) as churn:
+        cpu_before, _, _ = process_stats(pid)
+        started = time.perf_counter()
+        deadline = started + duration
+        if during:
+            during(deadline)
+        else:
+            time.sleep(duration)
+        elapsed = time.perf_counter() - started
+        cpu_after, rss_mb, threads = process_stats(pid)
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "cpu_s": round(cpu_after - cpu_before, 3),
+        "cpu_percent": round(100 * (cpu_after - cpu_before) / elapsed, 1),
+        "rss_mb": round(rss_mb, 1),
+        "threads": threads,
+        "availability_changes": churn.changes,
+    }
+
+
+def sse_phase(base_url, pid, centres, radius_m, duration, lots, event_rate):
+    host, port = urlparse(base_url).hostname, urlparse(base_url).port
+    selector = selectors.DefaultSelector()
+    streams = []
+    for lat, lng in centres:
+        sock = socket.create_connection((host, port))
+        sock.sendall(f"GET /live/lots?latitude={lat}&longitude={lng}&radius_m={radius_m} HTTP/1.1\r\n"
+                     f"Host: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        sock.setblocking(False)
+        stream = {"sock": sock, "tail": b"", "events": 0, "bytes": 0}
+        selector.register(sock, selectors.EVENT_READ, stream)
+        streams.append(stream)
+
+    def read_until(deadline):
+        while time.perf_counter() < deadline:
+            for key, _ in selector.select(timeout=max(0.0, min(0.5, deadline - time.perf_counter()))):
+                stream = key.data
+                try:
+                    data = stream["sock"].recv(65536)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    selector.unregister(stream["sock"])
+                    continue
+                stream["bytes"] += len(data)
+                data = stream["tail"] + data
+                stream["events"] += data.count(EVENT_MARKER)
+                # Keep enough bytes to catch a marker split across two reads
+                stream["tail"] = data[-(len(EVENT_MARKER) - 1):]
+
+    # Let every stream open and deliver its snapshot before measuring
+    read_until(time.perf_counter() + 2)
+    for stream in streams:
+        stream["events"] = stream["bytes"] = 0
+    try:
+        result = measured(pid, duration, base_url, lots, event_rate, during=read_until)
+    finally:
+        for stream in streams:
+            stream["sock"].close()
+        selector.close()
+    events = [stream["events"] for stream in streams]
+    result.update({
+        "mode": "sse",
+        "events_received": int(sum(events)),
+        "idle_streams": int(sum(1 for n in events if n == 0)),
+        "bytes_received": int(sum(stream["bytes"] for stream in streams)),
+    })
+    return result
+
+
+def poll_phase(base_url, pid, centres, interval, duration, lots, event_rate, threads):
+    counts = {"polls": 0, "late": 0, "errors": 0}
+    counts_lock = threading.Lock()
+    local = threading.local()
+
+    def poll(lat, lng):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        session = local.session
+        now = time.localtime()
+        try:
+            ok = session.post(base_url + "/get_parking_slots", json={"latitude": lat, "longitude": lng}, timeout=30).ok
+            ok &= session.post(base_url + "/predict_parking_availability", json={
+                "latitude": lat, "longitude": lng, "day_of_week": now.tm_wday, "hour_of_day": now.tm_hour, "weather": "Clear",
+            }, timeout=30).ok
+        except requests.RequestException:
+            ok = False
+        with counts_lock:
+            counts["polls"] += 1
+            counts["errors"] += not ok
+
+    def schedule(deadline):
+        # Clients start spread over one interval, then each polls every `interval` seconds
+        start = time.perf_counter()
+        due = start + np.linspace(0, interval, len(centres), endpoint=False)
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            pending = []
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                for i in np.flatnonzero(due <= now):
+                    # A refresh sent more than a second after it was due: the scheduler or the pool fell behind
+                    counts["late"] += now - due[i] > 1.0
+                    pending.append(pool.submit(poll, *centres[i]))
+                    due[i] += interval
+                pending = [f for f in pending if not f.done()]
+                time.sleep(max(0.0, min(0.05, due.min() - time.perf_counter())))
+            for future in pending:
+                future.cancel()
+
+    result = measured(pid, duration, base_url, lots, event_rate, during=schedule)
+    result.update({"mode": "poll", "poll_interval_s": interval, **counts})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE live feed versus polling: server CPU per client count")
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per phase")
+    parser.add_argument("--poll-interval", type=float, default=5, help="Seconds between refreshes of a polling client")
+    parser.add_argument("--poll-threads", type=int, default=64, help="Threads issuing the polls")
+    parser.add_argument("--event-rate", type=float, default=20, help="Availability changes per second")
+    parser.add_argument("--radius-m", type=float, default=1500)
+    parser.add_argument("--mongo-uri", help="Local mongod for the started app (default: in-memory stand-in)")
+    parser.add_argument("--lots", type=int, default=5_000)
+    parser.add_argument("--capacity", type=int, default=1_000_000)
+    parser.add_argument("--output", help="Write the results (JSON) here")
+    args = parser.parse_args()
+    args.google_latency = 0.0
+
+    from generate_parking_data import make_lots
+
+    lats, lngs, _ = make_lots(args.lots, max(args.lots // 100, 1), seed=42)
+    rng = np.random.default_rng(3)
+    base_url, processes = start_local_app(args)
+    pid = processes[0].pid
+
+    results = []
+    try:
+        for n in args.clients:
+            picks = rng.integers(args.lots, size=n)
+            centres = list(zip(lats[picks].tolist(), lngs[picks].tolist()))
+            sse = sse_phase(base_url, pid, centres, args.radius_m, args.duration, args.lots, args.event_rate)
+            poll = poll_phase(base_url, pid, centres, args.poll_interval, args.duration, args.lots, args.event_rate,
+                              args.poll_threads)
+            for result in (sse, poll):
+                result["clients"] = n
+                results.append(result)
+            print(f"📈 {n:>6} clients: SSE {sse['cpu_percent']:6.1f}% CPU ({sse['events_received']:,} events), "
+                  f"polling {poll['cpu_percent']:6.1f}% CPU ({poll['polls']:,} refreshes, {poll['late']:,} late)")
+    finally:
+        for process in processes:
+            process.terminate()
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"event_rate": args.event_rate, "results": results}, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Per-region models versus one monolithic model: accuracy, inference latency and memory.
+
+    python bench_regional.py --cities 6 --rows 600000 --output bench_results/regional.json
+    python bench_regional.py --compiled
+
+Generates --cities copies of the synthetic London lots placed a few degrees
+apart, trains the monolithic model (--trees × --depth, the train_model.py
+configuration) and a RegionalModel (train_regional.py) on the same rows, and
+reports for each:
+  latency      p50/p99 of predict for batches drawn from one city ("local",
+               what a request sees) and from every city ("mixed")
+  memory       pickled size and the RSS a fresh process gains loading it
+With --compiled the CompiledEnsemble versions of both are measured too.
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import joblib
+import numpy as np
+from bench_inference import latency
+
+CITY_SPACING_DEGREES = 3.0
+
+
+def city_rows(cities, rows, lots_per_city, seed=42):
+    """Feature matrix, labels and city of every row for `cities` shifted copies of the generated lots."""
+    from generate_parking_data import generate_chunk, make_lots
+    from prediction import FEATURE_COLUMNS
+
+    X, y, city = [], [], []
+    for c in range(cities):
+        lats, lngs, baseline = make_lots(lots_per_city, max(lots_per_city // 100, 1), seed=seed + c)
+        lots = (lats + CITY_SPACING_DEGREES * (c % 4), lngs + CITY_SPACING_DEGREES * (c // 4), baseline)
+        chunk = generate_chunk(lots, rows // cities, seed=seed, chunk_index=c)
+        X.append(np.column_stack([chunk[name] for name in FEATURE_COLUMNS]).astype(np.float32))
+        y.append((chunk["availability"] >= 0.5).astype(np.int64))
+        city.append(np.full(len(y[-1]), c))
+    return np.vstack(X), np.concatenate(y), np.concatenate(city)
+
+
+def load_rss_mb(path):
+    """RSS a fresh interpreter gains from joblib.load(path), libraries already imported."""
+    output = subprocess.run([sys.executable, __file__, "--measure-load", path], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])["rss_delta_mb"]
+
+
+def measure(name, model, workdir, batches, repeats):
+    path = os.path.join(workdir, f"{name}.pkl")
+    joblib.dump(model, path)
+    result = {
+        "model": name,
+        "pickled_mb": round(len(pickle.dumps(model)) / 1e6, 2),
+        "load_rss_mb": load_rss_mb(path),
+        "latency": {},
+    }
+    for label, X in batches.items():
+        result["latency"][label] = latency(model.predict, X, max(5, repeats // max(1, len(X) // 1000)))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-region models versus one monolithic model")
+    parser.add_argument("--cities", type=int, default=6)
+    parser.add_argument("--rows", type=int, default=600_000)
+    parser.add_argument("--lots-per-city", type=int, default=2_000)
+    parser.add_argument("--precision", type=int, default=3, help="Geohash characters per region")
+    parser.add_argument("--region-min-rows", type=int, default=5_000)
+    parser.add_argument("--trees", type=int, default=500, help="Monolithic model trees")
+    parser.add_argument("--depth", type=int, default=10, help="Monolithic model max_depth")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 20, 1000])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--workers", type=int, help="Fit processes for the regional models")
+    parser.add_argument("--compiled", action="store_true", help="Also measure the compiled versions")
+    parser.add_argument("--output", help="Write the results (JSON) here")
+    args = parser.parse_args()
+
+    import xgboost as xgb
+    from sklearn.model_selection import train_test_split
+    from train_regional import train_regional
+
+    X, y, city = city_rows(args.cities, args.rows, args.lots_per_city)
+    print(f"🔧 {len(X):,} rows across {args.cities} cities")
+
+    # Same split as train_regional, so both models are scored on the same held-out rows
+    X_train, X_test, y_train, y_test, _, city_test = train_test_split(X, y, city, test_size=0.2, random_state=42, stratify=y)
+    monolithic = xgb.XGBClassifier(n_estimators=args.trees, max_depth=args.depth, learning_rate=0.05, subsample=0.8,
+                                   colsample_bytree=0.8, random_state=42, tree_method="hist")
+    monolithic.fit(X_train, y_train)
+    regional = train_regional(X, y, precision=args.precision, min_rows=args.region_min_rows, workers=args.workers)
+
+    models = {"monolithic": monolithic, "regional": regional["model"]}
+    if args.compiled:
+        from compiled_model import compile_model
+
+        models["monolithic_compiled"] = compile_model(monolithic)
+        models["regional_compiled"] = regional["model"].compile()
+
+    rng = np.random.default_rng(0)
+    local = X_test[city_test == 0]
+    batches = {}
+    for size in args.batch_sizes:
+        batches[f"local_{size}"] = local[rng.integers(len(local), size=size)]
+        batches[f"mixed_{size}"] = X_test[rng.integers(len(X_test), size=size)]
+
+    workdir = tempfile.mkdtemp(prefix="bench_regional_")
+    results = []
+    for name, model in models.items():
+        result = measure(name, model, workdir, batches, args.repeats)
+        result["accuracy"] = round(float((np.asarray(model.predict(X_test)) == y_test).mean()), 4)
+        results.append(result)
+        print(f"📈 {name:20} accuracy {result['accuracy']:.4f}  pickled {result['pickled_mb']:7.2f} MB  "
+              f"load RSS {result['load_rss_mb']:7.1f} MB  " +
+              "  ".join(f"{label} p50 {stats['p50_us']:.0f}µs" for label, stats in result["latency"].items()))
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "cities": args.cities, "rows": len(X), "precision": args.precision,
+                "regions": regional["regions"], "regional_fit_wall_s": regional["fit_wall_s"],
+                "per_region": regional["per_region"], "results": results,
+            }, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--measure-load":
+        # Import the libraries first: their load isn't part of the model's footprint
+        import xgboost
+        import compiled_model
+        import regional_model
+        from profiling import current_rss_mb
+
+        before = current_rss_mb()
+        loaded = joblib.load(sys.argv[2])
+        print(json.dumps({"rss_delta_mb": round(current_rss_mb() - before, 1)}))
+    else:
+        main()
@@ -0,0 +1,110 @@
+"""Serialization time and bytes on the wire for the spot payloads, per response format.
+
+    python bench_serialization.py --spots 20 1000 100000 --output bench_results/serialization.json
+
+Builds a /predict_parking_availability-shaped payload for each spot count
+and times responses.encode + responses.compress for every format this
+process can produce (JSON, columnar JSON, MessagePack if installed) and
+every content encoding (identity, gzip, br if installed). The "before" row
+is what the routes did until now: flask.jsonify's json.dumps with sorted keys
+over one dict per spot. Reports p50/p99 milliseconds and body bytes.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import responses
+from prediction import availability_label
+
+
+def payload(n, seed=0):
+    """Spot dicts plus the label and live-count columns, like the prediction route has them."""
+    rng = np.random.default_rng(seed)
+    lats = (51.5074 + rng.uniform(-0.1, 0.1, n)).round(6)
+    lngs = (-0.1278 + rng.uniform(-0.15, 0.15, n)).round(6)
+    spots = [{"name": f"Parking Lot {i}", "address": f"{i} High Street, London", "lat": float(lat), "lng": float(lng)}
+             for i, (lat, lng) in enumerate(zip(lats, lngs))]
+    labels = rng.integers(0, 2, n)
+    live = [int(v) if v >= 0 else None for v in rng.integers(-40, 20, n)]
+    return spots, labels, live
+
+
+def rows(spots, labels, live):
+    return [
+        {
+            "name": spot["name"],
+            "address": spot["address"],
+            "lat": spot["lat"],
+            "lng": spot["lng"],
+            "availability": availability_label(label),
+            **({"live_available": available} if available is not None else {})
+        }
+        for spot, label, available in zip(spots, labels, live)
+    ]
+
+
+def timed(fn, repeats):
+    fn()  # warm-up
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        body = fn()
+        times.append(time.perf_counter() - started)
+    ms = np.array(times) * 1000
+    return body, {"p50_ms": round(float(np.percentile(ms, 50)), 3), "p99_ms": round(float(np.percentile(ms, 99)), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization time and size per response format")
+    parser.add_argument("--spots", type=int, nargs="+", default=[20, 1000, 100_000])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--output", help="Write the results (JSON) here")
+    args = parser.parse_args()
+
+    formats = {"json": responses.JSON, "columnar": responses.COLUMNAR}
+    if responses.msgpack is not None:
+        formats["msgpack"] = responses.MSGPACK
+    encodings = [None, "gzip"] + (["br"] if responses.brotli is not None else [])
+    missing = [name for name, module in (("msgpack", responses.msgpack), ("brotli", responses.brotli)) if module is None]
+    if missing:
+        print(f"⚠️ Not installed, skipped: {', '.join(missing)}")
+
+    results = []
+    for n in args.spots:
+        spots, labels, live = payload(n)
+        repeats = max(5, args.repeats // max(1, n // 1000))
+
+        def before():
+            return json.dumps({"predicted_parking_spots": rows(spots, labels, live)}, sort_keys=True,
+                              separators=(",", ":")).encode("utf-8")
+
+        body, stats = timed(before, repeats)
+        results.append({"spots": n, "format": "before (jsonify)", "encoding": "identity", "bytes": len(body), **stats})
+
+        for name, mimetype in formats.items():
+            for encoding in encodings:
+                def encode():
+                    columns = dict(responses.spot_columns(spots), availability=labels, live_available=live)
+                    return responses.compress(
+                        responses.encode(mimetype, "predicted_parking_spots", columns, lambda: rows(spots, labels, live)),
+                        encoding,
+                    )
+
+                body, stats = timed(encode, repeats)
+                results.append({"spots": n, "format": name, "encoding": encoding or "identity", "bytes": len(body), **stats})
+
+        for result in results:
+            if result["spots"] == n:
+                print(f"📈 {n:>7} spots  {result['format']:17} {result['encoding']:8}  "
+                      f"{result['p50_ms']:9.3f} ms  {result['bytes']:>11,} bytes")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark local spatial-index queries against the upstream Places path.
+
+    python bench_spatial_index.py --sizes 10000 1000000 10000000
+
+The upstream path is timed against the local Google stub by default (network
+and JSON cost only); pass --places-url to time a real endpoint instead.
+"""
+import argparse
+import os
+import time
+import numpy as np
+
+os.environ.setdefault("SPATIAL_INDEX_CSV", "")
+
+from spatial_index import LotIndex
+
+
+def percentiles(samples_s):
+    us = np.asarray(samples_s) * 1e6
+    return {"p50_us": round(float(np.percentile(us, 50)), 1), "p99_us": round(float(np.percentile(us, 99)), 1)}
+
+
+def random_lots(n, rng, center=(51.5074, -0.1278), spread=0.3):
+    lats = center[0] + rng.uniform(-spread, spread, n)
+    lngs = center[1] + rng.uniform(-spread, spread, n) * 1.6
+    return lats, lngs
+
+
+def bench_index(n, queries, rng):
+    lats, lngs = random_lots(n, rng)
+    started = time.perf_counter()
+    index = LotIndex()
+    index.build(lats, lngs)
+    build_s = time.perf_counter() - started
+
+    q_lats, q_lngs = random_lots(queries, rng, spread=0.25)
+    radius_times, knn_times, hits = [], [], 0
+    for lat, lng in zip(q_lats, q_lngs):
+        t0 = time.perf_counter()
+        hits += len(index.radius(lat, lng, 1500, limit=20))
+        t1 = time.perf_counter()
+        index.nearest(lat, lng, k=10)
+        t2 = time.perf_counter()
+        radius_times.append(t1 - t0)
+        knn_times.append(t2 - t1)
+
+    return {
+        "lots": n,
+        "build_s": round(build_s, 3),
+        "radius_1500m": percentiles(radius_times),
+        "knn_10": percentiles(knn_times),
+        "avg_hits": round(hits / queries, 1),
+    }
+
+
+def bench_upstream(places_url, queries, rng):
+    import http_client
+
+    q_lats, q_lngs = random_lots(queries, rng, spread=0.25)
+    times = []
+    for lat, lng in zip(q_lats, q_lngs):
+        params = {"location": f"{lat},{lng}", "radius": 1500, "type": "parking", "key": os.getenv("GOOGLE_MAPS_API_KEY", "stub")}
+        t0 = time.perf_counter()
+        http_client.get(places_url, params=params, upstream="bench").json()
+        times.append(time.perf_counter() - t0)
+    return {"upstream": places_url, **percentiles(times)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--upstream-queries", type=int, default=200)
+    parser.add_argument("--places-url", help="Places nearby-search URL (default: a local stub server)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for n in args.sizes:
+        print(bench_index(n, args.queries, rng))
+
+    stub = None
+    if not args.places_url:
+        from google_stub import GoogleStubServer
+
+        stub = GoogleStubServer().start()
+        args.places_url = stub.places_url
+    print(bench_upstream(args.places_url, args.upstream_queries, rng))
+    if stub:
+        stub.shutdown()
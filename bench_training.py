@@ -0,0 +1,64 @@
+"""Peak RSS and wall time of training at several dataset sizes.
+
+    python bench_training.py --csv big.csv --sizes 10000 1000000 50000000 --in-memory-up-to 1000000
+
+Each run is a separate `train_model.py` process so peak RSS is measured per
+run. The CSV must have at least max(--sizes) rows (see generate_parking_data.py).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def run(cmd, env):
+    started = time.perf_counter()
+    before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    after = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr[-2000:])
+    report = next((json.loads(line.split(" ", 1)[1]) for line in out.stdout.splitlines() if line.startswith("📈")), {})
+    # RUSAGE_CHILDREN keeps the max over all children, so it is exact only when it grew in this run
+    return {"wall_s": round(wall, 2), "peak_rss_mb": round(after / 1024, 1) if after > before else report.get("peak_rss_mb"), **{
+        k: report[k] for k in ("accuracy", "stages_s", "matrix") if k in report
+    }}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark streaming (and optionally in-memory) training")
+    parser.add_argument("--csv", required=True)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 50_000_000])
+    parser.add_argument("--in-memory-up-to", type=int, default=0, help="Also run the in-memory pipeline for sizes up to this")
+    parser.add_argument("--output", help="Write results as JSON lines to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ, MPLBACKEND="Agg", MODEL_DIR=tempfile.mkdtemp(prefix="bench_models_"))
+    results = []
+    for size in sorted(args.sizes):
+        cache_dir = tempfile.mkdtemp(prefix="bench_cache_")
+        stream = run([sys.executable, "train_model.py", "--stream", "--csv", args.csv, "--max-rows", str(size), "--cache-dir", cache_dir], env)
+        results.append({"rows": size, "mode": "stream", **stream})
+        print(results[-1])
+
+        if size <= args.in_memory_up_to:
+            with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as sample:
+                with open(args.csv) as source:
+                    for i, line in enumerate(source):
+                        if i > size:
+                            break
+                        sample.write(line)
+            in_memory = run([sys.executable, "train_model.py", "--csv", sample.name], env)
+            results.append({"rows": size, "mode": "in-memory", **in_memory})
+            print(results[-1])
+            os.unlink(sample.name)
+
+    if args.output:
+        with open(args.output, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
@@ -0,0 +1,193 @@
+"""Per-worker memory and startup time under gunicorn, with and without preloading in the master.
+
+    python bench_workers.py --workers 1 8 32 --output bench_results/workers.json
+    python bench_workers.py --modes preload --artifacts compiled pickle
+
+For each mode (preload: model and tables loaded once in the master, see
+gunicorn.conf.py; per-worker: every worker loads its own copy), artifact
+(compiled .npz or the pickled XGBClassifier) and worker count, starts
+`gunicorn -c gunicorn.conf.py app:app` against the Google stub and the
+in-memory Mongo stand-in, and records:
+  startup_s       launch until every worker logged that it is ready
+  RSS/PSS         per worker from /proc/<pid>/smaps_rollup after --load-seconds
+                  of /predict_batch traffic (PSS splits shared pages between
+                  the processes mapping them, so total_pss_mb is the real footprint)
+Linux only. The model is a --trees tree ensemble trained on generated rows.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from bench_http import _free_port, _wait_for, drive, predict_batch
+
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def train_model(model_dir, trees, compiled):
+    """Publish a --trees model into model_dir (plus its compiled .npz when `compiled`)."""
+    import xgboost as xgb
+    from compiled_model import export
+    from generate_parking_data import generate_chunk, make_lots
+    from model_registry import publish
+    from prediction import FEATURE_COLUMNS
+
+    rows = generate_chunk(make_lots(2_000, 20, seed=42), 100_000, seed=42, chunk_index=0)
+    X = np.column_stack([rows[name] for name in FEATURE_COLUMNS]).astype(np.float32)
+    y = (rows["availability"] >= 0.5).astype(np.int64)
+    model = xgb.XGBClassifier(n_estimators=trees, max_depth=6, tree_method="hist")
+    model.fit(X, y)
+    _, path = publish(model, model_dir=model_dir, version="bench")
+    if compiled:
+        export(path)
+    return path
+
+
+def memory_kb(pid):
+    """MEMORY_FIELDS in kB for one process."""
+    totals = dict.fromkeys(MEMORY_FIELDS, 0)
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        path = f"/proc/{pid}/smaps"  # kernels before 4.14
+    with open(path) as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in totals:
+                totals[name] += int(rest.split()[0])
+    return totals
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; the parent pid follows the closing parenthesis
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return found
+
+
+def run(mode, artifact, model_dir, workers, env, load_seconds, timeout):
+    port = _free_port()
+    env = dict(env, GUNICORN_WORKERS=str(workers), GUNICORN_BIND=f"127.0.0.1:{port}",
+               GUNICORN_PRELOAD="true" if mode == "preload" else "false", MODEL_DIR=model_dir)
+    ready = []
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+                              env=env, stderr=subprocess.PIPE, text=True)
+
+    def read_log():
+        for line in server.stderr:
+            if re.search(r"Worker \d+ ready", line):
+                ready.append(time.perf_counter() - started)
+
+    threading.Thread(target=read_log, daemon=True).start()
+    try:
+        deadline = time.perf_counter() + timeout
+        while len(ready) < workers:
+            if server.poll() is not None:
+                raise SystemExit(f"❌ gunicorn exited with code {server.returncode}")
+            if time.perf_counter() > deadline:
+                raise SystemExit(f"❌ Only {len(ready)}/{workers} workers ready after {timeout}s")
+            time.sleep(0.05)
+        startup = ready[workers - 1]
+
+        base_url = f"http://127.0.0.1:{port}"
+        _wait_for(base_url + "/model_info", server)
+        traffic = drive(base_url, predict_batch, workers, load_seconds, None)
+
+        master = memory_kb(server.pid)
+        per_worker = []
+        for pid in children(server.pid):
+            try:
+                per_worker.append(memory_kb(pid))
+            except OSError:
+                # A worker that exited (and is being replaced) since we listed them
+                continue
+    finally:
+        server.terminate()
+        server.wait()
+
+    def mean_mb(field):
+        return round(sum(m[field] for m in per_worker) / len(per_worker) / 1024, 1)
+
+    return {
+        "mode": mode,
+        "artifact": artifact,
+        "workers": workers,
+        "startup_s": round(startup, 3),
+        "first_worker_ready_s": round(ready[0], 3),
+        "worker_rss_mb": mean_mb("Rss"),
+        "worker_pss_mb": mean_mb("Pss"),
+        "worker_private_mb": round(sum(m["Private_Clean"] + m["Private_Dirty"] for m in per_worker) / len(per_worker) / 1024, 1),
+        "worker_shared_mb": round(sum(m["Shared_Clean"] + m["Shared_Dirty"] for m in per_worker) / len(per_worker) / 1024, 1),
+        "master_rss_mb": round(master["Rss"] / 1024, 1),
+        "total_pss_mb": round((master["Pss"] + sum(m["Pss"] for m in per_worker)) / 1024, 1),
+        "traffic": traffic,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker RSS and startup time under gunicorn")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--modes", nargs="+", choices=["preload", "per-worker"], default=["preload", "per-worker"])
+    parser.add_argument("--artifacts", nargs="+", choices=["compiled", "pickle"], default=["compiled"])
+    parser.add_argument("--trees", type=int, default=500)
+    parser.add_argument("--load-seconds", type=float, default=5, help="/predict_batch traffic before measuring memory")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for all workers to boot")
+    parser.add_argument("--output", help="Write the results (JSON) here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_workers_")
+    model_dirs = {artifact: os.path.join(workdir, artifact) for artifact in args.artifacts}
+    for artifact, model_dir in model_dirs.items():
+        print(f"🔧 Training a {args.trees}-tree model ({artifact})")
+        train_model(model_dir, args.trees, compiled=artifact == "compiled")
+
+    stub_port = _free_port()
+    stub = subprocess.Popen([sys.executable, "google_stub.py", "--port", str(stub_port), "--latency", "0"])
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    env = dict(
+        os.environ,
+        GOOGLE_MAPS_API_KEY=os.getenv("GOOGLE_MAPS_API_KEY", "bench-key"),
+        GOOGLE_PLACES_URL=f"{stub_url}/maps/api/place/nearbysearch/json",
+        GOOGLE_GEOCODE_URL=f"{stub_url}/maps/api/geocode/json",
+        MONGO_URI="memory://",
+        GEOCODE_CACHE_PATH=os.path.join(workdir, "geocode_cache.sqlite3"),
+        OCCUPANCY_SNAPSHOT_PATH=os.path.join(workdir, "occupancy_snapshot.npz"),
+    )
+
+    results = []
+    try:
+        _wait_for(stub_url, stub)
+        for artifact, model_dir in model_dirs.items():
+            for mode in args.modes:
+                for workers in args.workers:
+                    result = run(mode, artifact, model_dir, workers, env, args.load_seconds, args.timeout)
+                    results.append(result)
+                    print(f"📈 {mode:10} {artifact:8} {workers:3} workers: ready in {result['startup_s']:6.2f}s, "
+                          f"worker RSS {result['worker_rss_mb']:7.1f} MB / PSS {result['worker_pss_mb']:7.1f} MB, "
+                          f"total PSS {result['total_pss_mb']:8.1f} MB")
+    finally:
+        stub.terminate()
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"trees": args.trees, "results": results}, f, indent=2)
+        print(f"📝 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
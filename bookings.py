@@ -0,0 +1,114 @@
+"""Booking storage.
+
+A booking is one conditional update on the lot (`available_slots > 0` guard and
+`$inc` in the same operation, so concurrent requests can't oversell) plus one
+document in the `bookings` collection. Bookings made with a hold expire: a
+reaper deletes each expired hold and returns its slot. There is deliberately
+no TTL index on `expires_at`: Mongo could purge a hold before the reaper saw
+it, and that slot would never come back.
+"""
+import datetime
+import threading
+from pymongo import ASCENDING
+
+BOOKED = "booked"
+CANCELLED = "cancelled"
+LOT_FULL = "lot_full"
+LOT_NOT_FOUND = "lot_not_found"
+NOT_BOOKED = "not_booked"
+
+
+def parse_hold_minutes(value):
+    """Hold length in seconds from a request's hold_minutes (None for no hold); ValueError if it isn't a positive whole number."""
+    if value is None or value == "":
+        return None
+    try:
+        minutes = int(value)
+        valid = minutes > 0 and minutes == float(value) and not isinstance(value, bool)
+    except (TypeError, ValueError):
+        valid = False
+    if not valid:
+        raise ValueError("hold_minutes must be a positive whole number")
+    return minutes * 60
+
+
+def book_slot(db, location_id, user_id, hold_seconds=None):
+    """Take one slot at a lot for a user. Returns (status, booking_id)."""
+    taken = db.parking_slots.update_one(
+        {"location_id": location_id, "available_slots": {"$gt": 0}},
+        {"$inc": {"available_slots": -1}},
+    )
+    if taken.matched_count == 0:
+        # Only the failure path pays for a second read to tell "full" from "unknown lot"
+        exists = db.parking_slots.count_documents({"location_id": location_id}, limit=1)
+        return (LOT_FULL if exists else LOT_NOT_FOUND), None
+
+    now = datetime.datetime.utcnow()
+    booking = {"location_id": location_id, "user_id": user_id, "created_at": now}
+    if hold_seconds:
+        booking["expires_at"] = now + datetime.timedelta(seconds=hold_seconds)
+
+    try:
+        booking_id = db.bookings.insert_one(booking).inserted_id
+    except Exception:
+        db.parking_slots.update_one({"location_id": location_id}, {"$inc": {"available_slots": 1}})
+        raise
+    return BOOKED, booking_id
+
+
+def cancel_slot(db, location_id, user_id):
+    """Release one of the user's bookings at a lot. Returns a status string."""
+    booking = db.bookings.find_one_and_delete(
+        {"location_id": location_id, "user_id": user_id},
+        projection={"_id": 1},
+        sort=[("created_at", ASCENDING)],
+    )
+    if booking is not None:
+        db.parking_slots.update_one({"location_id": location_id}, {"$inc": {"available_slots": 1}})
+        return CANCELLED
+
+    # Bookings made before the bookings collection live in the lot's booked_slots array
+    legacy = db.parking_slots.update_one(
+        {"location_id": location_id, "booked_slots": user_id},
+        {"$inc": {"available_slots": 1}, "$pull": {"booked_slots": user_id}},
+    )
+    if legacy.matched_count:
+        return CANCELLED
+
+    exists = db.parking_slots.count_documents({"location_id": location_id}, limit=1)
+    return NOT_BOOKED if exists else LOT_NOT_FOUND
+
+
+def release_expired_holds(db, now=None, limit=1000, on_release=None):
+    """Return the slots of holds that have expired; returns how many were released.
+
+    `on_release(location_id)` is called for every slot given back.
+    """
+    now = now or datetime.datetime.utcnow()
+    released = 0
+    while released < limit:
+        booking = db.bookings.find_one_and_delete(
+            {"expires_at": {"$lte": now}},
+            projection={"location_id": 1},
+        )
+        if booking is None:
+            break
+        db.parking_slots.update_one({"location_id": booking["location_id"]}, {"$inc": {"available_slots": 1}})
+        released += 1
+        if on_release:
+            on_release(booking["location_id"])
+    return released
+
+
+def start_hold_reaper(db, interval=30, on_release=None):
+    """Release expired holds every `interval` seconds in a daemon thread."""
+    def run():
+        while not stop.wait(interval):
+            try:
+                release_expired_holds(db, on_release=on_release)
+            except Exception as e:
+                print("❌ Hold reaper failed:", e)
+
+    stop = threading.Event()
+    threading.Thread(target=run, name="booking-hold-reaper", daemon=True).start()
+    return stop
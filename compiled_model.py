@@ -0,0 +1,287 @@
+"""Array-backed inference for the trained XGBoost availability model.
+
+`export` flattens every tree of the booster into parallel node arrays
+(feature, threshold, yes/no/missing child, leaf value) and saves them as an
+.npz next to the pickle. `CompiledEnsemble.predict` walks all trees for all
+rows at once, one tree level per NumPy step, so a single-row call costs a few
+vectorised operations instead of a trip through the sklearn wrapper and
+DMatrix construction. Export refuses to write an artifact whose labels differ
+from `model.predict` on the verification sample.
+
+The level-by-level walk only wins for small calls: past COMPILED_MAX_ROWS
+rows XGBoost's own predictor is faster (see bench_inference.py), so the
+artifact also carries the booster's raw model and larger batches go through
+Booster.inplace_predict, built on first use in each process.
+
+    python compiled_model.py export model/best_parking_predictor_model.pkl
+"""
+import argparse
+import json
+import os
+import joblib
+import numpy as np
+
+ROW_CHUNK = 4096
+COMPILED_MAX_ROWS = int(os.getenv("COMPILED_MAX_ROWS", "20"))
+
+
+class CompiledEnsemble:
+    """Drop-in replacement for XGBClassifier.predict / predict_proba on binary models."""
+
+    def __init__(self, feature, threshold, left, right, missing, value, roots, depth, base_margin, classes,
+                 booster_raw=None, max_rows=COMPILED_MAX_ROWS):
+        # Leaves point at themselves; reading feature 0 there keeps every take() in bounds
+        self.feature = _frozen(np.maximum(feature, 0)) if (feature < 0).any() else feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing = missing
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.base_margin = float(base_margin)
+        self.classes_ = classes
+        self.booster_raw = booster_raw
+        self.max_rows = max_rows  # None: always walk the arrays
+        self._native = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_native"] = None
+        return state
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _margin_chunk(self, X):
+        n_rows, n_cols = X.shape
+        flat = X.ravel()
+        # Start of each row in `flat`, so one take() reads the split feature of every tree
+        offsets = (np.arange(n_rows, dtype=np.intp) * n_cols)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        has_nan = bool(np.isnan(flat).any())
+        for _ in range(self.depth):
+            x = flat.take(offsets + self.feature.take(node))
+            nxt = np.where(x < self.threshold.take(node), self.left.take(node), self.right.take(node))
+            if has_nan:
+                nxt = np.where(np.isnan(x), self.missing.take(node), nxt)
+            node = nxt
+        return self.value.take(node).sum(axis=1, dtype=np.float32) + np.float32(self.base_margin)
+
+    def _rows(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return X[None, :] if X.ndim == 1 else X
+
+    def _use_native(self, X):
+        return self.booster_raw is not None and self.max_rows is not None and len(X) > self.max_rows
+
+    def warm(self):
+        """Import XGBoost now if big batches will need it (e.g. in the gunicorn master, before fork)."""
+        if self.booster_raw is not None and self.max_rows is not None:
+            import xgboost  # noqa: F401
+
+    def _booster(self):
+        if self._native is None:
+            import xgboost as xgb
+
+            booster = xgb.Booster()
+            booster.load_model(bytearray(self.booster_raw))
+            self._native = booster
+        return self._native
+
+    def _native_predict(self, X, predict_type):
+        return self._booster().inplace_predict(
+            X, iteration_range=(0, self.n_trees), predict_type=predict_type, validate_features=False,
+        )
+
+    def decision_function(self, X):
+        """Raw margin (log-odds) per row."""
+        X = self._rows(X)
+        if self._use_native(X):
+            return np.asarray(self._native_predict(X, "margin"), dtype=np.float32)
+        if len(X) <= ROW_CHUNK:
+            return self._margin_chunk(X)
+        return np.concatenate([self._margin_chunk(X[i:i + ROW_CHUNK]) for i in range(0, len(X), ROW_CHUNK)])
+
+    def _positive(self, X):
+        X = self._rows(X)
+        if self._use_native(X):
+            return np.asarray(self._native_predict(X, "value"), dtype=np.float32)
+        return 1.0 / (1.0 + np.exp(-self.decision_function(X).astype(np.float32)))
+
+    def predict_proba(self, X):
+        positive = self._positive(X)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self._positive(X) > 0.5).astype(np.int64)]
+
+    def save(self, path):
+        extra = {"booster_raw": self.booster_raw} if self.booster_raw is not None else {}
+        np.savez(
+            path,
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            missing=self.missing, value=self.value, roots=self.roots, depth=self.depth,
+            base_margin=self.base_margin, classes=self.classes_, **extra,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Node arrays come back contiguous and read-only, so forked workers keep sharing their pages."""
+        with np.load(path) as data:
+            arrays = [_frozen(data[name]) for name in ("feature", "threshold", "left", "right", "missing", "value", "roots")]
+            booster_raw = _frozen(data["booster_raw"]) if "booster_raw" in data.files else None
+            return cls(*arrays, data["depth"], data["base_margin"], _frozen(data["classes"]), booster_raw=booster_raw)
+
+
+def _frozen(array):
+    array = np.ascontiguousarray(array)
+    array.setflags(write=False)
+    return array
+
+
+def _parse_base_score(text):
+    """base_score from the booster config: "5E-1" before XGBoost 3, a vector like "[5E-1]" from 3 on."""
+    values = [float(v) for v in str(text).strip().strip("[]").split(",") if v.strip()]
+    if len(values) != 1:
+        raise ValueError(f"Only single-output models can be compiled (base_score {text})")
+    return values[0]
+
+
+def _base_margin(booster):
+    params = json.loads(booster.save_config())["learner"]
+    base_score = _parse_base_score(params["learner_model_param"]["base_score"])
+    objective = params["objective"]["name"]
+    if objective in ("binary:logistic", "reg:logistic"):
+        return float(np.log(base_score / (1.0 - base_score)))
+    if objective == "binary:logitraw":
+        return base_score
+    raise ValueError(f"Unsupported objective for compilation: {objective}")
+
+
+def compile_model(model):
+    """Flatten a fitted binary XGBClassifier into a CompiledEnsemble."""
+    booster = model.get_booster()
+    if len(getattr(model, "classes_", [0, 1])) != 2:
+        raise ValueError("Only binary classifiers can be compiled")
+
+    feature_names = booster.feature_names or []
+    trees = booster.get_dump(dump_format="json")
+    try:
+        trees = trees[:model.best_iteration + 1]
+    except (AttributeError, TypeError):
+        pass
+
+    feature, threshold, left, right, missing, value, roots = [], [], [], [], [], [], []
+    depth = 0
+    for tree_json in trees:
+        offset = len(feature)
+        nodes = {}
+
+        def walk(node, level):
+            nonlocal depth
+            nodes[node["nodeid"]] = node
+            depth = max(depth, level)
+            for child in node.get("children", []):
+                walk(child, level + 1)
+
+        walk(json.loads(tree_json), 0)
+        # Pruning can leave gaps in node ids, so renumber densely from the tree's offset
+        index = {node_id: offset + i for i, node_id in enumerate(sorted(nodes))}
+        roots.append(index[0])
+        for node_id in sorted(nodes):
+            node = nodes[node_id]
+            if "leaf" in node:
+                feature.append(-1)
+                threshold.append(0.0)
+                left.append(index[node_id])
+                right.append(index[node_id])
+                missing.append(index[node_id])
+                value.append(node["leaf"])
+            else:
+                name = node["split"]
+                feature.append(feature_names.index(name) if name in feature_names else int(name.lstrip("f")))
+                threshold.append(node["split_condition"])
+                left.append(index[node["yes"]])
+                right.append(index[node["no"]])
+                missing.append(index[node["missing"]])
+                value.append(0.0)
+
+    return CompiledEnsemble(
+        feature=np.array(feature, dtype=np.int32),
+        threshold=np.array(threshold, dtype=np.float32),
+        left=np.array(left, dtype=np.int32),
+        right=np.array(right, dtype=np.int32),
+        missing=np.array(missing, dtype=np.int32),
+        value=np.array(value, dtype=np.float32),
+        roots=np.array(roots, dtype=np.int32),
+        depth=depth,
+        base_margin=_base_margin(booster),
+        classes=np.asarray(model.classes_),
+        booster_raw=np.frombuffer(bytes(booster.save_raw("ubj")), dtype=np.uint8),
+    )
+
+
+def verification_sample(n=20000, seed=0):
+    """Rows spread over the feature domain used by the API (London-area lat/lng, all days/hours/weathers)."""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(51.2, 51.8, n),
+        rng.uniform(-0.6, 0.4, n),
+        rng.integers(0, 7, n),
+        rng.integers(0, 24, n),
+        rng.integers(0, 7, n),
+    ]).astype(np.float64)
+
+
+def export(model_path, output_path=None, sample=None):
+    """Compile the pickled model, check it label-for-label against model.predict, and save it."""
+    model = joblib.load(model_path)
+    compiled = compile_model(model)
+    sample = verification_sample() if sample is None else sample
+
+    expected = np.asarray(model.predict(sample))
+    mismatches = int((compiled.predict(sample) != expected).sum())
+    if mismatches:
+        raise ValueError(f"Compiled model disagrees with model.predict on {mismatches}/{len(sample)} rows")
+
+    output_path = output_path or compiled_path_for(model_path)
+    compiled.save(output_path)
+    return output_path, compiled
+
+
+def compiled_path_for(model_path):
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def load_model(model_path):
+    """Load the compiled artifact next to `model_path` if there is one, else the pickle."""
+    compiled_path = compiled_path_for(model_path)
+    if os.path.exists(compiled_path):
+        return CompiledEnsemble.load(compiled_path)
+    return joblib.load(model_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the XGBoost model into flat NumPy node arrays")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export")
+    export_parser.add_argument("model", help="Path to the joblib-pickled XGBClassifier")
+    export_parser.add_argument("--output", help="Output .npz path (default: next to the model)")
+    export_parser.add_argument("--verify-csv", help="Also verify on the feature columns of this CSV")
+    args = parser.parse_args()
+
+    sample = None
+    if args.verify_csv:
+        import pandas as pd
+        from prediction import DAY_CLASSES, FEATURE_COLUMNS, WEATHER_CLASSES, encode_categories
+
+        df = pd.read_csv(args.verify_csv, usecols=FEATURE_COLUMNS)
+        df["day_of_week"] = encode_categories(df["day_of_week"], DAY_CLASSES)
+        df["weather"] = encode_categories(df["weather"], WEATHER_CLASSES)
+        df = df.dropna()
+        sample = np.vstack([verification_sample(), df.to_numpy(dtype=np.float64)])
+
+    path, compiled = export(args.model, args.output, sample)
+    print(f"✅ Compiled {compiled.n_trees} trees (depth {compiled.depth}) to {path}; outputs match model.predict")
@@ -1,13 +1,23 @@
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-class Config:
-    SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
-    MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-    GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
-
-    if not GOOGLE_MAPS_API_KEY:
-        raise ValueError("Missing Google Maps API Key. Check your .env file!")
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+class Config:
+    SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
+    MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+    GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+
+    # Upstream endpoints (override to point at a local stub server)
+    GOOGLE_PLACES_URL = os.getenv("GOOGLE_PLACES_URL", "https://maps.googleapis.com/maps/api/place/nearbysearch/json")
+    GOOGLE_GEOCODE_URL = os.getenv("GOOGLE_GEOCODE_URL", "https://maps.googleapis.com/maps/api/geocode/json")
+
+    # Places nearby-search cache
+    PLACES_CACHE_SIZE = int(os.getenv("PLACES_CACHE_SIZE", "4096"))
+    PLACES_CACHE_TTL = int(os.getenv("PLACES_CACHE_TTL", "600"))
+    PLACES_NEGATIVE_TTL = int(os.getenv("PLACES_NEGATIVE_TTL", "120"))
+    PLACES_GEOHASH_PRECISION = int(os.getenv("PLACES_GEOHASH_PRECISION", "6"))
+
+    if not GOOGLE_MAPS_API_KEY:
+        raise ValueError("Missing Google Maps API Key. Check your .env file!")
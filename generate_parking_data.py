@@ -0,0 +1,137 @@
+"""Seeded synthetic parking data at any scale.
+
+    python generate_parking_data.py --rows 100000000 --output data/parking_100m.csv
+    python generate_parking_data.py --rows 100000000 --format columnar --output data/parking_100m
+
+Rows have the same columns as generated_parking_data_10000_numeric_day.csv.
+Lots are clustered around a few hotspots, and availability follows each lot's
+baseline demand plus weekday/weekend hour-of-day curves and the weather.
+Generation is vectorised and streamed one chunk at a time, so memory does not
+grow with --rows. The same --seed and --chunksize always give the same output.
+
+The columnar format is a directory with one .npy file per column plus
+meta.json, and can be opened with np.load(path, mmap_mode="r").
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from prediction import WEATHER_CLASSES
+
+COLUMNS = ["latitude", "longitude", "day_of_week", "hour_of_day", "weather", "availability"]
+
+# ✅ Same area and weather vocabulary as the shipped 10k-row dataset
+BOUNDS = {"lat": (51.38, 51.60), "lng": (-0.35, 0.10)}
+WEATHER_NAMES = WEATHER_CLASSES
+WEATHER_MIX = [0.18, 0.25, 0.06, 0.20, 0.04, 0.17, 0.10]
+# More drivers (and fewer free spots) in bad weather
+WEATHER_DEMAND = np.array([0.0, 0.02, 0.05, 0.10, 0.12, -0.03, 0.03], dtype=np.float32)
+
+_hours = np.arange(24, dtype=np.float32)
+WEEKDAY_DEMAND = (
+    0.35 * np.exp(-((_hours - 9) ** 2) / 4) + 0.30 * np.exp(-((_hours - 18) ** 2) / 5) + 0.15 * np.exp(-((_hours - 13) ** 2) / 8)
+).astype(np.float32)
+WEEKEND_DEMAND = (0.40 * np.exp(-((_hours - 14) ** 2) / 12) + 0.10 * np.exp(-((_hours - 20) ** 2) / 6)).astype(np.float32)
+DAY_DEMAND = np.stack([WEEKDAY_DEMAND] * 5 + [WEEKEND_DEMAND] * 2)  # day 0 = Monday
+
+
+def make_lots(n_lots, n_clusters, seed):
+    """Lot coordinates clustered around hotspots, plus each lot's baseline occupancy."""
+    rng = np.random.default_rng([seed, 0])
+    lat_lo, lat_hi = BOUNDS["lat"]
+    lng_lo, lng_hi = BOUNDS["lng"]
+    centres = np.column_stack([rng.uniform(lat_lo, lat_hi, n_clusters), rng.uniform(lng_lo, lng_hi, n_clusters)])
+    spread = rng.uniform(0.003, 0.015, n_clusters)
+    # ✅ Some hotspots are much bigger than others
+    weights = rng.pareto(1.5, n_clusters) + 1
+    cluster = rng.choice(n_clusters, size=n_lots, p=weights / weights.sum())
+    lats = np.clip(centres[cluster, 0] + rng.normal(0, spread[cluster]), lat_lo, lat_hi)
+    lngs = np.clip(centres[cluster, 1] + rng.normal(0, spread[cluster] * 1.6), lng_lo, lng_hi)
+    # Lots near a hotspot centre are busier
+    distance = np.hypot(lats - centres[cluster, 0], (lngs - centres[cluster, 1]) / 1.6) / spread[cluster]
+    baseline = np.clip(0.55 - 0.12 * distance + rng.normal(0, 0.08, n_lots), 0.05, 0.8)
+    return lats.round(6), lngs.round(6), baseline.astype(np.float32)
+
+
+def generate_chunk(lots, rows, seed, chunk_index):
+    """One chunk of rows as a dict of column arrays (weather as codes into WEATHER_NAMES)."""
+    lats, lngs, baseline = lots
+    rng = np.random.default_rng([seed, 1, chunk_index])
+    lot = rng.integers(0, len(lats), rows)
+    day = rng.integers(0, 7, rows).astype(np.uint8)
+    hour = rng.integers(0, 24, rows).astype(np.uint8)
+    weather = rng.choice(len(WEATHER_NAMES), size=rows, p=WEATHER_MIX).astype(np.uint8)
+
+    occupancy = baseline[lot] + DAY_DEMAND[day, hour] + WEATHER_DEMAND[weather] + rng.normal(0, 0.08, rows).astype(np.float32)
+    availability = np.round(np.clip(1 - occupancy, 0, 1), 2)
+    return {
+        "latitude": lats[lot],
+        "longitude": lngs[lot],
+        "day_of_week": day,
+        "hour_of_day": hour,
+        "weather": weather,
+        "availability": availability.astype(np.float32),
+    }
+
+
+def iter_chunks(rows, chunksize, lots, seed):
+    for chunk_index, start in enumerate(range(0, rows, chunksize)):
+        yield start, generate_chunk(lots, min(chunksize, rows - start), seed, chunk_index)
+
+
+def write_csv(path, rows, chunksize, lots, seed):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    weather_names = np.array(WEATHER_NAMES, dtype=object)
+    with open(path, "w", newline="") as f:
+        for start, chunk in iter_chunks(rows, chunksize, lots, seed):
+            frame = pd.DataFrame(chunk, columns=COLUMNS)
+            frame["weather"] = weather_names[chunk["weather"]]
+            # float64 so 0.82 is written as 0.82, not 0.8199999928474426
+            frame["availability"] = chunk["availability"].astype(np.float64).round(2)
+            frame.to_csv(f, header=start == 0, index=False)
+            yield start + len(frame)
+
+
+def write_columnar(path, rows, chunksize, lots, seed):
+    os.makedirs(path, exist_ok=True)
+    sample = generate_chunk(lots, 1, seed, 0)
+    columns = {
+        name: np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode="w+", dtype=sample[name].dtype, shape=(rows,))
+        for name in COLUMNS
+    }
+    for start, chunk in iter_chunks(rows, chunksize, lots, seed):
+        stop = start + len(chunk["availability"])
+        for name, column in columns.items():
+            column[start:stop] = chunk[name]
+        yield stop
+    for column in columns.values():
+        column.flush()
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"rows": rows, "columns": COLUMNS, "weather_names": WEATHER_NAMES, "seed": seed}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic parking availability data")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--output", default="generated_parking_data.csv", help="CSV file, or directory for --format columnar")
+    parser.add_argument("--format", choices=["csv", "columnar"], default="csv")
+    parser.add_argument("--lots", type=int, default=5_000, help="Distinct parking lots")
+    parser.add_argument("--clusters", type=int, default=40, help="Hotspots the lots are clustered around")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunksize", type=int, default=1_000_000, help="Rows generated and written at a time")
+    args = parser.parse_args()
+
+    lots = make_lots(args.lots, args.clusters, args.seed)
+    writer = write_csv if args.format == "csv" else write_columnar
+    started = time.perf_counter()
+    written = 0
+    for written in writer(args.output, args.rows, args.chunksize, lots, args.seed):
+        elapsed = time.perf_counter() - started
+        print(f"📦 {written:,}/{args.rows:,} rows ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"✅ Wrote {written:,} rows to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Persistent geocoding cache shared by all worker processes.
+
+Lookups go through an in-process LRU first, then a local SQLite file (WAL mode,
+so many processes can read while one writes), and only then to Google.
+Addresses with no geocoding result are remembered for GEOCODE_NEGATIVE_TTL seconds.
+The SQLite file is opened on first use, not at import.
+
+Pre-warm from a file with one "location, postcode" per line:
+    python geocode_cache.py warm postcodes.txt
+"""
+import argparse
+import os
+import re
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+import http_client
+from cache import TTLCache
+
+load_dotenv()
+
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "geocode_cache.sqlite3")
+GEOCODE_MEMORY_SIZE = int(os.getenv("GEOCODE_MEMORY_SIZE", "10000"))
+GEOCODE_NEGATIVE_TTL = int(os.getenv("GEOCODE_NEGATIVE_TTL", "86400"))
+
+# Postcodes don't move, so found addresses never expire from memory either
+_NO_EXPIRY = 10 * 365 * 24 * 3600
+
+
+def normalize_address(address):
+    """Canonical cache key: lower-case, single spaces, no stray spaces around commas."""
+    address = re.sub(r"\s+", " ", address.strip().lower())
+    return re.sub(r"\s*,\s*", ", ", address).strip(", ")
+
+
+class GeocodeCache:
+    def __init__(self, path=GEOCODE_CACHE_PATH, memory_size=GEOCODE_MEMORY_SIZE, negative_ttl=GEOCODE_NEGATIVE_TTL):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self.memory = TTLCache(maxsize=memory_size, ttl=_NO_EXPIRY, negative_ttl=negative_ttl)
+        self._local = threading.local()
+
+    def _connect(self):
+        """One SQLite connection per thread, opened on first use; sqlite3 connections can't be shared across threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocodes ("
+                " address TEXT PRIMARY KEY, lat REAL, lng REAL, found INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def reset_connections(self):
+        """Drop connections inherited from a parent process (call in a forked child)."""
+        self._local = threading.local()
+
+    def load(self, key):
+        """Read one normalized address from disk: coords, () for a fresh negative entry, or None if absent."""
+        return self._read(key)[0]
+
+    def _read(self, key):
+        """load() plus the seconds a negative entry has left (None for coords or a miss)."""
+        row = self._connect().execute(
+            "SELECT lat, lng, found, updated_at FROM geocodes WHERE address = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        lat, lng, found, updated_at = row
+        if found:
+            return (lat, lng), None
+        remaining = self.negative_ttl - (time.time() - updated_at)
+        if remaining > 0:
+            return (), remaining
+        return None, None
+
+    def store(self, key, coords):
+        lat, lng = coords if coords else (None, None)
+        self._connect().execute(
+            "INSERT OR REPLACE INTO geocodes (address, lat, lng, found, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (key, lat, lng, 1 if coords else 0, time.time()),
+        )
+
+    def get_or_geocode(self, address, geocode):
+        """Return (lat, lng) for an address, or None if it can't be geocoded.
+
+        `geocode(address)` must return (lat, lng), () when Google has no result,
+        or None on an upstream error (which is not cached).
+        """
+        key = normalize_address(address)
+        # A negative entry read from disk stays in memory only as long as it has left on disk
+        remaining = [None]
+
+        def load():
+            coords, remaining[0] = self._read(key)
+            if coords is None:
+                coords = geocode(address)
+                if coords is not None:
+                    self.store(key, coords)
+            return coords
+
+        return self.memory.get_or_load(key, load, ttl=lambda coords: remaining[0]) or None
+
+    def missing(self, addresses):
+        """Filter addresses down to those not yet on disk."""
+        return [address for address in addresses if self.load(normalize_address(address)) is None]
+
+    def warm(self, addresses, geocode):
+        """Geocode every address not already cached, concurrently; returns counts per outcome."""
+        counts = {"cached": 0, "found": 0, "not_found": 0, "failed": 0}
+        todo = self.missing(addresses)
+        counts["cached"] = len(addresses) - len(todo)
+        futures = [(address, http_client.submit(geocode, address)) for address in todo]
+        for address, future in futures:
+            coords = future.result()
+            if coords is None:
+                counts["failed"] += 1
+                continue
+            self.store(normalize_address(address), coords)
+            counts["found" if coords else "not_found"] += 1
+        return counts
+
+    def stats(self):
+        rows, negatives = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(found = 0), 0) FROM geocodes"
+        ).fetchone()
+        return {"memory": self.memory.stats(), "disk_entries": rows, "disk_negative": negatives}
+
+
+geocode_cache = GeocodeCache()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the persistent geocoding cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm_parser = sub.add_parser("warm", help="Geocode a list of addresses/postcodes into the cache")
+    warm_parser.add_argument("file", help="Text file with one address or postcode per line")
+    sub.add_parser("stats", help="Show cache counters")
+    args = parser.parse_args()
+
+    if args.command == "warm":
+        from utils import geocode_address
+
+        with open(args.file, encoding="utf-8") as f:
+            addresses = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+        print(f"🔥 Pre-warming {len(addresses)} addresses into {geocode_cache.path}")
+        print(geocode_cache.warm(addresses, geocode_address))
+    else:
+        print(geocode_cache.stats())
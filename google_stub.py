@@ -0,0 +1,116 @@
+"""Local stand-in for the Google Places nearby-search and Geocoding APIs.
+
+Point the app at it with
+    GOOGLE_PLACES_URL=http://127.0.0.1:8765/maps/api/place/nearbysearch/json
+    GOOGLE_GEOCODE_URL=http://127.0.0.1:8765/maps/api/geocode/json
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class GoogleStubServer(ThreadingHTTPServer):
+    """Threaded HTTP server returning deterministic fake Places and Geocoding responses."""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, spots_per_area=20):
+        super().__init__((host, port), _GoogleStubHandler)
+        self.latency = latency
+        self.spots_per_area = spots_per_area
+        self.calls = {"places": 0, "geocode": 0}
+        self._calls_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def places_url(self):
+        return f"{self.base_url}/maps/api/place/nearbysearch/json"
+
+    @property
+    def geocode_url(self):
+        return f"{self.base_url}/maps/api/geocode/json"
+
+    def count(self, api):
+        with self._calls_lock:
+            self.calls[api] += 1
+
+    def start(self):
+        """Serve in a background thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def places(self, latitude, longitude):
+        # Seed from the rounded location so the same area always returns the same lots
+        rng = random.Random(f"{latitude:.4f},{longitude:.4f}")
+        return [
+            {
+                "name": f"Stub Parking {i}",
+                "vicinity": f"{i} Stub Street",
+                "rating": round(rng.uniform(1, 5), 1),
+                "geometry": {"location": {
+                    "lat": latitude + rng.uniform(-0.01, 0.01),
+                    "lng": longitude + rng.uniform(-0.01, 0.01),
+                }},
+            }
+            for i in range(self.spots_per_area)
+        ]
+
+    def geocode(self, address):
+        rng = random.Random(address.strip().lower())
+        return [{
+            "formatted_address": address,
+            "geometry": {"location": {"lat": rng.uniform(51.3, 51.7), "lng": rng.uniform(-0.5, 0.2)}},
+        }]
+
+
+class _GoogleStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if url.path.endswith("/place/nearbysearch/json"):
+            self.server.count("places")
+            latitude, longitude = (float(v) for v in query["location"][0].split(","))
+            results = self.server.places(latitude, longitude)
+        elif url.path.endswith("/geocode/json"):
+            self.server.count("geocode")
+            results = self.server.geocode(query.get("address", [""])[0])
+        else:
+            self._send(404, {"status": "NOT_FOUND"})
+            return
+
+        self._send(200, {"status": "OK" if results else "ZERO_RESULTS", "results": results})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Google Places/Geocoding stub server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial delay per request in seconds")
+    args = parser.parse_args()
+
+    server = GoogleStubServer(port=args.port, latency=args.latency)
+    print(f"✅ Google stub listening on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,83 @@
+"""Gunicorn settings: load the model once in the master and share it with every worker.
+
+    gunicorn -c gunicorn.conf.py app:app
+    GUNICORN_WORKERS=8 gunicorn -c gunicorn.conf.py app:app
+
+With GUNICORN_PRELOAD on (the default) the master imports the app and loads
+the model, the memory-mapped availability table and the lot index before it
+forks. With a compiled .npz next to the pickle (see compiled_model.py) the
+model is a few read-only contiguous NumPy arrays, so the workers share those
+pages copy-on-write instead of each unpickling its own ensemble. The garbage
+collector is off while the app loads and is frozen just before fork, so
+collections in the workers don't write to the preloaded objects' pages; it is
+switched back on for everything allocated after that.
+
+Threads don't survive fork, so each worker opens its own Mongo pool and SQLite
+connections and starts the background threads (model watcher, hold reaper,
+spatial index refresh, occupancy snapshots, live feed poller) in post_fork. A version the
+watcher picks up later is loaded per worker; restart the master to share it
+again. Live occupancy and /metrics stay per worker; one worker at a time
+writes the occupancy snapshot (see occupancy.py).
+
+Workers are gthread by default. Every open /live/lots stream holds one of
+GUNICORN_THREADS threads, so a worker gives at most LIVE_FEED_THREAD_SHARE of
+them to streams and keeps the rest for the other routes; see live_feed.py.
+"""
+import gc
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "64"))
+# The /live/lots feed keeps a connection (and a thread) open per subscriber: gthread or gevent, never sync
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+if preload_app:
+    # ✅ Importing the app in the master must not start threads; workers start them after fork
+    os.environ["DEFER_BACKGROUND_TASKS"] = "1"
+    # Keep the collector from moving objects around while the shared image is built
+    gc.disable()
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import app
+
+    app.preload()
+    gc.freeze()
+    gc.enable()
+    server.log.info("✅ Model and lookup tables preloaded in the master (%d objects frozen)", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    import app
+    import models
+    from geocode_cache import geocode_cache
+
+    models.reset_connection()
+    geocode_cache.reset_connections()
+    app.start_background_tasks()
+
+
+def post_worker_init(worker):
+    import live_feed
+
+    if not preload_app:
+        # Each worker loads its own copy, like a plain `import app` would on its first request
+        import app
+
+        app.preload()
+    reason = live_feed.check_server(worker.cfg.worker_class_str, worker.cfg.threads)
+    if reason:
+        worker.log.warning("⚠️ /live/lots is off in this worker: %s", reason)
+    else:
+        worker.log.info("✅ /live/lots takes up to %d streams in this worker", live_feed.hub.max_subscribers)
+    worker.log.info("✅ Worker %s ready", worker.pid)
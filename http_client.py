@@ -0,0 +1,162 @@
+"""Shared outbound HTTP client for Google API calls.
+
+One pooled keep-alive Session per process, a deadline on every call, bounded
+retries with jittered exponential backoff, and a circuit breaker per upstream
+so a failing API is skipped quickly instead of tying up workers.
+`submit` runs a call on a shared thread pool for lookups that can overlap
+(geocode_cache.py warms its addresses this way).
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from metrics import stage
+
+load_dotenv()
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "2"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "5"))
+HTTP_DEADLINE = float(os.getenv("HTTP_DEADLINE", "8"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.2"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "30"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """An outbound call failed after retries, ran out of time, or was short-circuited."""
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `failures` consecutive failures; lets one probe through after `reset` seconds."""
+
+    def __init__(self, name, failures=BREAKER_FAILURES, reset=BREAKER_RESET):
+        self.name = name
+        self.failures = failures
+        self.reset = reset
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self.opened_at >= self.reset else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._probing or self.consecutive_failures >= self.failures:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+def _new_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = _new_session()
+_breakers = {}
+_breakers_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="http-client")
+
+
+def breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states():
+    with _breakers_lock:
+        return {name: b.state for name, b in _breakers.items()}
+
+
+def get(url, params=None, upstream="google", deadline=HTTP_DEADLINE, retries=HTTP_MAX_RETRIES):
+    """GET with a total deadline and retries; returns the final Response.
+
+    Raises UpstreamError when the breaker is open, the deadline runs out, or every
+    attempt failed with a connection error or a retryable status.
+    """
+    with stage(f"http.{upstream}"):
+        return _get(url, params, upstream, deadline, retries)
+
+
+def _get(url, params, upstream, deadline, retries):
+    circuit = breaker(upstream)
+    if not circuit.allow():
+        raise CircuitOpenError(f"{upstream} circuit is open")
+
+    give_up_at = time.monotonic() + deadline
+    last_error = None
+    succeeded = False
+    try:
+        for attempt in range(retries + 1):
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = session.get(
+                    url,
+                    params=params,
+                    timeout=(min(HTTP_CONNECT_TIMEOUT, remaining), min(HTTP_READ_TIMEOUT, remaining)),
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    circuit.record_success()
+                    succeeded = True
+                    return response
+                last_error = UpstreamError(f"{upstream} returned HTTP {response.status_code}")
+            except requests.RequestException as e:
+                last_error = e
+
+            if attempt < retries:
+                backoff = HTTP_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+                time.sleep(max(0.0, min(backoff, give_up_at - time.monotonic())))
+
+        if last_error is None:
+            last_error = UpstreamError(f"{upstream} deadline of {deadline}s exceeded")
+        raise UpstreamError(f"{upstream} request failed: {last_error}") from last_error
+    finally:
+        # Any way out but a response is a failure, so a half-open probe that raised
+        # something other than a RequestException still ends (and re-opens the circuit)
+        if not succeeded:
+            circuit.record_failure()
+
+
+def submit(fn, *args, **kwargs):
+    """Run any outbound-call helper on the shared pool; returns a Future."""
+    return _executor.submit(fn, *args, **kwargs)
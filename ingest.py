@@ -0,0 +1,338 @@
+"""Bulk ingest of lot occupancy updates from gate sensors.
+
+POST /ingest/occupancy with an NDJSON body (chunked transfer is fine), one
+update per line:
+    {"location_id": "lot-1", "available_slots": 12, "ts": 1718000000.5}   absolute count
+    {"location_id": "lot-1", "delta": -1, "ts": 1718000001.0}              car in (-1) / out (+1)
+
+The body is read line by line and cut into batches of INGEST_BATCH_SIZE lines.
+Each batch is validated and coalesced to at most one write per lot: the newest
+absolute count wins and later deltas are added to it, otherwise the deltas are
+summed. A delta never takes available_slots below 0. Each lot always goes to
+the same writer thread (by a hash of its location_id), so its updates are
+applied in the order they arrived; a batch is split between the writers and
+applied with one bulk_write per writer. At most INGEST_QUEUE_SIZE batch parts
+wait at once. When that many are queued the request stops reading its body (so
+TCP pushes back on the sensor), and after INGEST_PUT_TIMEOUT seconds it gives
+up with 503. The response lists accepted, rejected and written counts per
+batch; the 503 response lists the batches queued before it, and
+resume_from_line is the first line that wasn't, so a sensor can resend from
+there without applying a delta twice.
+"""
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import metrics
+
+load_dotenv()
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "64"))  # batch parts
+INGEST_WRITERS = int(os.getenv("INGEST_WRITERS", "2"))
+INGEST_PUT_TIMEOUT = float(os.getenv("INGEST_PUT_TIMEOUT", "10"))
+INGEST_MAX_LINE_BYTES = int(os.getenv("INGEST_MAX_LINE_BYTES", "4096"))
+MAX_REPORTED_ERRORS = 10
+
+UPDATES = metrics.register(metrics.Counter("parking_ingest_updates_total", "Ingested occupancy updates", ("outcome",)))
+
+
+class IngestBusy(Exception):
+    """The write queue stayed full for INGEST_PUT_TIMEOUT seconds.
+
+    ingest_stream attaches the report of what was queued before that as `report`.
+    """
+
+    def __init__(self, message, report=None):
+        super().__init__(message)
+        self.report = report
+
+
+def parse_update(line):
+    """One NDJSON line -> (location_id, kind, value, ts); raises ValueError on a bad update."""
+    try:
+        update = json.loads(line)
+    except ValueError:
+        raise ValueError("Not valid JSON")
+    if not isinstance(update, dict):
+        raise ValueError("Each line must be a JSON object")
+
+    location_id = update.get("location_id")
+    if not isinstance(location_id, str) or not location_id:
+        raise ValueError("location_id is required")
+
+    ts = update.get("ts")
+    if ts is not None and (isinstance(ts, bool) or not isinstance(ts, (int, float))):
+        raise ValueError("ts must be a number of seconds since the epoch")
+
+    has_absolute, has_delta = "available_slots" in update, "delta" in update
+    if has_absolute == has_delta:
+        raise ValueError("Exactly one of available_slots or delta is required")
+    value = update["available_slots"] if has_absolute else update["delta"]
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError("available_slots and delta must be integers")
+    if has_absolute and value < 0:
+        raise ValueError("available_slots can't be negative")
+    return location_id, "set" if has_absolute else "delta", value, ts
+
+
+def coalesce(updates):
+    """Per-lot net effect of a batch: {location_id: {"set": n or None, "delta": d, "ts": newest ts}}."""
+    lots = {}
+    for location_id, kind, value, ts in updates:
+        lot = lots.setdefault(location_id, {"set": None, "set_ts": None, "delta": 0, "ts": None})
+        if kind == "set":
+            # An absolute count older than the one we already have is stale
+            if lot["set"] is not None and ts is not None and lot["set_ts"] is not None and ts < lot["set_ts"]:
+                continue
+            lot["set"], lot["set_ts"], lot["delta"] = value, ts, 0
+        else:
+            lot["delta"] += value
+        if ts is not None:
+            lot["ts"] = ts if lot["ts"] is None else max(lot["ts"], ts)
+    return lots
+
+
+def to_operations(lots):
+    operations = []
+    for location_id, lot in lots.items():
+        if lot["set"] is not None:
+            update = {"$set": {"available_slots": max(lot["set"] + lot["delta"], 0)}}
+            if lot["ts"] is not None:
+                update["$max"] = {"sensor_updated_at": lot["ts"]}
+        elif lot["delta"]:
+            # $inc can't stop at 0, so a delta is an update pipeline: max(available_slots + delta, 0)
+            fields = {"available_slots": {"$max": [{"$add": [{"$ifNull": ["$available_slots", 0]}, lot["delta"]]}, 0]}}
+            if lot["ts"] is not None:
+                fields["sensor_updated_at"] = {"$max": ["$sensor_updated_at", lot["ts"]]}
+            update = [{"$set": fields}]
+        else:
+            continue
+        operations.append(UpdateOne({"location_id": location_id}, update))
+    return operations
+
+
+class _Batch:
+    def __init__(self, number, lots, ordered):
+        self.number = number
+        self.lots = lots
+        self.ordered = ordered
+        self.future = Future()
+
+
+def _merge_results(results):
+    merged = {"operations": 0, "matched": 0, "write_errors": 0, "unknown_lots": 0}
+    for result in results:
+        for key in merged:
+            merged[key] += result[key]
+    return merged
+
+
+class IngestWriter:
+    """Coalesced batches drained by writer threads with bulk_write, one queue per writer.
+
+    Every lot is owned by one writer, so two updates to a lot are never applied out of order.
+    """
+
+    def __init__(self, collection, writers=INGEST_WRITERS, queue_size=INGEST_QUEUE_SIZE):
+        self.collection = collection
+        self._queues = [queue.Queue() for _ in range(max(writers, 1))]
+        # Bounds the parts waiting across all queues; a batch takes one per writer it touches
+        self._slots = threading.Semaphore(queue_size)
+        self._listeners = []
+        for n, q in enumerate(self._queues):
+            threading.Thread(target=self._run, args=(q,), name=f"ingest-writer-{n}", daemon=True).start()
+
+    def add_listener(self, fn):
+        """Call fn(location_id, lot) for every known lot a batch wrote (e.g. to feed live aggregates)."""
+        self._listeners.append(fn)
+
+    def writer_for(self, location_id):
+        """Index of the writer that owns a lot (stable across processes, unlike hash())."""
+        return zlib.crc32(location_id.encode("utf-8")) % len(self._queues)
+
+    def submit(self, batch, timeout=INGEST_PUT_TIMEOUT):
+        """Queue the whole batch or none of it (IngestBusy); the future gets the merged write result."""
+        parts = {}
+        for location_id, lot in batch.lots.items():
+            parts.setdefault(self.writer_for(location_id), {})[location_id] = lot
+        deadline = time.monotonic() + timeout
+        taken = 0
+        for _ in parts:
+            if not self._slots.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                for _ in range(taken):
+                    self._slots.release()
+                raise IngestBusy("Ingest queue is full, retry later")
+            taken += 1
+
+        futures = []
+        for n, lots in parts.items():
+            part = _Batch(batch.number, lots, batch.ordered)
+            futures.append(part.future)
+            self._queues[n].put(part)
+        if not futures:
+            batch.future.set_result(_merge_results([]))
+            return batch.future
+
+        remaining = [len(futures)]
+        remaining_lock = threading.Lock()
+
+        def part_done(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                batch.future.set_result(_merge_results([f.result() for f in futures]))
+            except Exception as e:
+                batch.future.set_exception(e)
+
+        for future in futures:
+            future.add_done_callback(part_done)
+        return batch.future
+
+    def depth(self):
+        return sum(q.qsize() for q in self._queues)
+
+    def _run(self, q):
+        while True:
+            batch = q.get()
+            try:
+                batch.future.set_result(self._write(batch))
+            except Exception as e:
+                batch.future.set_exception(e)
+            finally:
+                self._slots.release()
+
+    def _write(self, batch):
+        operations = to_operations(batch.lots)
+        result = {"operations": len(operations), "matched": 0, "write_errors": 0}
+        written_ids = [op._filter["location_id"] for op in operations]
+        if operations:
+            try:
+                written = self.collection.bulk_write(operations, ordered=batch.ordered)
+                result["matched"] = written.matched_count
+            except BulkWriteError as e:
+                result["matched"] = e.details.get("nMatched", 0)
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                result["write_errors"] = len(failed)
+                # An ordered bulk_write stops at the first error, so nothing after it was applied
+                end = min(failed) if batch.ordered and failed else len(written_ids)
+                written_ids = [lot for n, lot in enumerate(written_ids[:end]) if n not in failed]
+        # Lots that matched nothing don't exist; report them rather than creating them
+        result["unknown_lots"] = result["operations"] - result["matched"] - result["write_errors"]
+        if self._listeners:
+            self._notify(batch, written_ids, result["matched"])
+        return result
+
+    def _notify(self, batch, written_ids, matched):
+        """Pass listeners only the lots that exist and were written, never unknown or failed ones."""
+        if matched < len(written_ids):
+            # bulk_write doesn't say which updates matched, so look up which of these lots exist
+            try:
+                known = {doc["location_id"] for doc in self.collection.find(
+                    {"location_id": {"$in": written_ids}}, {"_id": 0, "location_id": 1})}
+            except Exception as e:
+                print("❌ Ingest couldn't look up written lots:", e)
+                return
+            written_ids = [location_id for location_id in written_ids if location_id in known]
+        for listener in self._listeners:
+            for location_id in written_ids:
+                lot = batch.lots[location_id]
+                try:
+                    listener(location_id, lot)
+                except Exception as e:
+                    print("❌ Ingest listener failed:", e)
+
+
+def ingest_stream(lines, writer, ordered=False, batch_size=INGEST_BATCH_SIZE, put_timeout=INGEST_PUT_TIMEOUT):
+    """Validate, coalesce and queue `lines` batch by batch; returns the per-batch report."""
+    batches, pending = [], []
+    parsed, errors, line_count = [], [], 0
+
+    def flush():
+        batch = _Batch(len(batches), coalesce(parsed), ordered)
+        report = {"batch": batch.number, "first_line": first_line, "last_line": line_number, "lines": line_count,
+                  "accepted": len(parsed), "rejected": line_count - len(parsed), "lots": len(batch.lots),
+                  "errors": errors[:MAX_REPORTED_ERRORS]}
+        try:
+            with metrics.stage("ingest.queue_wait"):
+                future = writer.submit(batch, timeout=put_timeout)
+        except IngestBusy as e:
+            # Nothing of this batch was queued; report the ones that were so the sensor resends only the rest
+            e.report = finish()
+            e.report["resume_from_line"] = first_line
+            raise
+        UPDATES.inc("accepted", amount=report["accepted"])
+        UPDATES.inc("rejected", amount=report["rejected"])
+        batches.append(report)
+        pending.append((report, future))
+
+    def finish():
+        with metrics.stage("ingest.write_wait"):
+            for report, future in pending:
+                try:
+                    report.update(future.result())
+                except Exception as e:
+                    report["error"] = str(e)
+        totals = {key: sum(b.get(key, 0) for b in batches)
+                  for key in ("lines", "accepted", "rejected", "lots", "matched", "unknown_lots")}
+        return {"batches": batches, "totals": totals}
+
+    line_number, first_line = 0, 1
+    for raw in lines:
+        line_number += 1
+        if not raw.strip():
+            continue
+        if not line_count:
+            first_line = line_number
+        line_count += 1
+        try:
+            if len(raw.rstrip()) > INGEST_MAX_LINE_BYTES:
+                raise ValueError(f"Line longer than {INGEST_MAX_LINE_BYTES} bytes")
+            parsed.append(parse_update(raw))
+        except ValueError as e:
+            errors.append({"line": line_number, "error": str(e)})
+        if line_count >= batch_size:
+            flush()
+            parsed, errors, line_count = [], [], 0
+    if line_count:
+        flush()
+    return finish()
+
+
+def read_lines(stream, max_line_bytes=INGEST_MAX_LINE_BYTES):
+    """Lines of a (possibly chunked) request body; over-long lines are truncated, then rejected."""
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_line_bytes and not line.endswith(b"\n"):
+            # Skip the rest of an over-long line
+            while True:
+                rest = stream.readline(65536)
+                if not rest or rest.endswith(b"\n"):
+                    break
+        yield line
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """The process-wide writer for parking_slots, started on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                from models import parking_collection
+
+                _writer = IngestWriter(parking_collection)
+    return _writer
@@ -0,0 +1,199 @@
+"""Server-sent events feed of lot availability changes.
+
+GET /live/lots?latitude=..&longitude=..&radius_m=1500 subscribes to the
+known lots in that area (from the spatial index). The stream opens with one
+`snapshot` event listing those lots and their available count, then sends a
+`lot` event only when a lot's count changes.
+
+Counts come from Mongo's parking_slots.available_slots, which every worker
+writes (bookings, cancellations, expired holds, sensor ingest), so the feed
+sees the changes of all workers, not only its own. Each process runs one
+poller thread that reads the lots its subscribers watch every
+LIVE_FEED_POLL_SECONDS in one query and hands them to FeedHub.publish; the
+cost follows the number of watched lots, not of subscribers.
+
+A subscriber is a set of lot ids, a dict of pending changes and an Event;
+the hub indexes subscribers by lot, so a change only touches the
+subscribers of that lot and costs nothing for the rest. Changes a slow
+client hasn't read yet are coalesced per lot, so memory per subscriber is
+bounded by the lots it watches. Idle streams send a comment every
+LIVE_FEED_HEARTBEAT_SECONDS so proxies keep them open and closed clients are
+noticed.
+
+Each stream holds a server thread (or greenlet) while open. gunicorn.conf.py
+calls check_server in every worker: sync workers refuse the feed with 503,
+and a gthread worker takes at most LIVE_FEED_THREAD_SHARE of its
+GUNICORN_THREADS for streams, so the other routes always keep threads. For
+thousands of idle subscribers run a separate gevent server for the feed:
+    GUNICORN_WORKER_CLASS=gevent gunicorn -c gunicorn.conf.py app:app   (pip install gevent)
+"""
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+import metrics
+
+load_dotenv()
+
+LIVE_FEED_HEARTBEAT_SECONDS = float(os.getenv("LIVE_FEED_HEARTBEAT_SECONDS", "15"))
+LIVE_FEED_MAX_SUBSCRIBERS = int(os.getenv("LIVE_FEED_MAX_SUBSCRIBERS", "10000"))
+LIVE_FEED_MAX_LOTS = int(os.getenv("LIVE_FEED_MAX_LOTS", "200"))  # per subscription
+LIVE_FEED_POLL_SECONDS = float(os.getenv("LIVE_FEED_POLL_SECONDS", "1"))
+LIVE_FEED_THREAD_SHARE = float(os.getenv("LIVE_FEED_THREAD_SHARE", "0.25"))  # of a gthread worker's threads
+
+EVENTS = metrics.register(metrics.Counter("parking_live_feed_events_total", "Events written to live feed streams", ("event",)))
+
+
+class FeedFull(Exception):
+    """LIVE_FEED_MAX_SUBSCRIBERS streams are already open."""
+
+
+# Why this server can't stream the feed, or None (set by check_server; the dev server is threaded)
+unavailable = None
+
+
+def read_counts(collection, lot_ids, chunk=1000):
+    """{location_id: available_slots} from parking_slots for the given lots."""
+    lot_ids = list(lot_ids)
+    counts = {}
+    for start in range(0, len(lot_ids), chunk):
+        query = {"location_id": {"$in": lot_ids[start:start + chunk]}}
+        for doc in collection.find(query, {"_id": 0, "location_id": 1, "available_slots": 1}):
+            if doc.get("available_slots") is not None:
+                counts[doc["location_id"]] = doc["available_slots"]
+    return counts
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscriber:
+    __slots__ = ("lots", "pending", "wakeup", "closed")
+
+    def __init__(self, lots):
+        self.lots = frozenset(lots)
+        self.pending = {}  # location_id -> newest change not yet sent
+        self.wakeup = threading.Event()
+        self.closed = False
+
+
+class FeedHub:
+    def __init__(self, max_subscribers=LIVE_FEED_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._by_lot = {}  # location_id -> set of subscribers
+        self._last = {}    # location_id -> last published count
+        self._count = 0
+        self._lock = threading.Lock()
+        self._poller = None
+
+    def subscribe(self, lots):
+        subscriber = Subscriber(lots)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise FeedFull("Too many live feed subscribers, retry later")
+            self._count += 1
+            for location_id in subscriber.lots:
+                self._by_lot.setdefault(location_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Forget a subscriber (idempotent; call when its response closes)."""
+        with self._lock:
+            if subscriber.closed:
+                return
+            subscriber.closed = True
+            self._count -= 1
+            for location_id in subscriber.lots:
+                watchers = self._by_lot.get(location_id)
+                if watchers is not None:
+                    watchers.discard(subscriber)
+                    if not watchers:
+                        del self._by_lot[location_id]
+
+    def publish(self, location_id, available):
+        """Occupancy listener: queue the new count for the lot's subscribers if it changed."""
+        with self._lock:
+            if self._last.get(location_id) == available:
+                return
+            self._last[location_id] = available
+            watchers = self._by_lot.get(location_id)
+            if not watchers:
+                return
+            change = {"location_id": location_id, "available": available, "ts": round(time.time(), 3)}
+            for subscriber in watchers:
+                subscriber.pending[location_id] = change
+                subscriber.wakeup.set()
+
+    def watched(self):
+        with self._lock:
+            return list(self._by_lot)
+
+    def poll(self, collection):
+        """Publish the current count of every watched lot; returns how many lots were read."""
+        lots = self.watched()
+        if not lots:
+            return 0
+        counts = read_counts(collection, lots)
+        for location_id, available in counts.items():
+            self.publish(location_id, available)
+        return len(counts)
+
+    def start_polling(self, collection, interval=LIVE_FEED_POLL_SECONDS):
+        """Poll `collection` for the watched lots in a daemon thread (idempotent)."""
+        if self._poller is not None:
+            return self._poller
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.poll(collection)
+                except Exception as e:
+                    print("❌ Live feed poll failed:", e)
+
+        stop = threading.Event()
+        threading.Thread(target=run, name="live-feed-poller", daemon=True).start()
+        self._poller = stop
+        return stop
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": self._count, "max_subscribers": self.max_subscribers, "watched_lots": len(self._by_lot)}
+
+    def stream(self, subscriber, snapshot, heartbeat=LIVE_FEED_HEARTBEAT_SECONDS):
+        """SSE text for one subscriber: the snapshot, then changes as they come, until it is unsubscribed."""
+        EVENTS.inc("snapshot")
+        yield format_event("snapshot", snapshot)
+        while not subscriber.closed:
+            if not subscriber.wakeup.wait(heartbeat):
+                yield ": keepalive\n\n"
+                continue
+            with self._lock:
+                subscriber.wakeup.clear()
+                changes, subscriber.pending = subscriber.pending, {}
+            EVENTS.inc("lot", amount=len(changes))
+            yield "".join(format_event("lot", change) for change in changes.values())
+
+
+hub = FeedHub()
+
+
+def check_server(worker_class, threads):
+    """Fit the feed to a gunicorn worker; returns the reason it is off, or None.
+
+    Sync workers can't hold a stream without blocking every other request. A gthread worker gives
+    at most LIVE_FEED_THREAD_SHARE of its threads to streams; gevent keeps LIVE_FEED_MAX_SUBSCRIBERS.
+    """
+    global unavailable
+    unavailable = None
+    if worker_class == "sync":
+        unavailable = "The live feed needs gthread or gevent workers (GUNICORN_WORKER_CLASS), not sync"
+        hub.max_subscribers = 0
+    elif worker_class == "gthread":
+        hub.max_subscribers = min(LIVE_FEED_MAX_SUBSCRIBERS, int(threads * LIVE_FEED_THREAD_SHARE))
+        if hub.max_subscribers < 1:
+            unavailable = f"GUNICORN_THREADS={threads} leaves no threads for the live feed"
+    else:
+        hub.max_subscribers = LIVE_FEED_MAX_SUBSCRIBERS
+    return unavailable
@@ -0,0 +1,229 @@
+"""Request and stage instrumentation with a Prometheus-compatible /metrics endpoint.
+
+    metrics.init_app(app)                 # request middleware + GET /metrics
+    with metrics.stage("inference"):      # time any block; attributed to the current request
+        ...
+    db = metrics.instrument_db(db)        # every collection call becomes a "mongo.<collection>.<op>" stage
+
+Stage durations go to the parking_stage_seconds histogram and are also summed
+per request. Requests slower than SLOW_REQUEST_LOG_MS are logged (sampled by
+SLOW_REQUEST_SAMPLE_RATE) as one JSON line with their stage breakdown.
+"""
+import bisect
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SLOW_REQUEST_LOG_MS = float(os.getenv("SLOW_REQUEST_LOG_MS", "0"))  # 0 = off
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "1.0"))
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_log = logging.getLogger("parking.slow_requests")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, {'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, {'le': '+Inf'})} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("parking_request_seconds", "HTTP request latency", ("method", "endpoint", "status"))
+REQUESTS = Counter("parking_requests_total", "HTTP requests handled", ("method", "endpoint", "status"))
+STAGE_SECONDS = Histogram("parking_stage_seconds", "Time spent in one stage of request handling", ("stage",))
+STAGE_ERRORS = Counter("parking_stage_errors_total", "Stages that raised", ("stage",))
+_registry = [REQUEST_SECONDS, REQUESTS, STAGE_SECONDS, STAGE_ERRORS]
+
+# Per-request stage totals: {stage: [seconds, calls]}; None outside a request
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+
+
+def register(metric):
+    """Expose an extra Counter or Histogram on /metrics."""
+    _registry.append(metric)
+    return metric
+
+
+def render():
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+@contextmanager
+def stage(name):
+    """Time a block into parking_stage_seconds and the current request's breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, name)
+        stages = _request_stages.get()
+        if stages is not None:
+            totals = stages.setdefault(name, [0.0, 0])
+            totals[0] += elapsed
+            totals[1] += 1
+
+
+def timed(name):
+    """Decorator form of `stage`."""
+    def decorator(fn):
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        wrapper.__name__, wrapper.__doc__, wrapper.__wrapped__ = fn.__name__, fn.__doc__, fn
+        return wrapper
+    return decorator
+
+
+class InstrumentedCollection:
+    """Wraps a pymongo (or mongo_stub) collection so every method call is timed as a stage.
+
+    find() returns a lazy cursor, so its stage covers building the query, not iterating it.
+    """
+
+    def __init__(self, collection, name):
+        self._collection = collection
+        self._name = name
+
+    def __getattr__(self, attr):
+        value = getattr(self._collection, attr)
+        if not callable(value) or attr.startswith("_"):
+            return value
+        stage_name = f"mongo.{self._name}.{attr}"
+
+        def call(*args, **kwargs):
+            with stage(stage_name):
+                return value(*args, **kwargs)
+        return call
+
+
+class InstrumentedDatabase:
+    def __init__(self, db):
+        self._db = db
+        self._collections = {}
+
+    def __getitem__(self, name):
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InstrumentedCollection(self._db[name], name)
+        return collection
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+def instrument_db(db):
+    return InstrumentedDatabase(db)
+
+
+def instrument_collection(collection):
+    return InstrumentedCollection(collection, collection.name)
+
+
+def init_app(app):
+    """Install the timing middleware and the /metrics route on a Flask app."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+        _request_stages.set({})
+
+    @app.after_request
+    def _record(response):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        labels = (request.method, endpoint, str(response.status_code))
+        REQUEST_SECONDS.observe(elapsed, *labels)
+        REQUESTS.inc(*labels)
+
+        stages = _request_stages.get() or {}
+        if SLOW_REQUEST_LOG_MS and elapsed * 1000 >= SLOW_REQUEST_LOG_MS and random.random() < SLOW_REQUEST_SAMPLE_RATE:
+            slow_log.warning(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "ms": round(elapsed * 1000, 2),
+                "stages_ms": {name: round(seconds * 1000, 2) for name, (seconds, _) in stages.items()},
+                "stage_calls": {name: calls for name, (_, calls) in stages.items()},
+            }))
+        return response
+
+    @app.teardown_request
+    def _clear(exc):
+        _request_stages.set(None)
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(render(), mimetype="text/plain; version=0.0.4")
+
+    return app
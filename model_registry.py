@@ -0,0 +1,163 @@
+"""Process-wide registry for the availability model.
+
+Artifacts live in versioned folders under MODEL_DIR:
+    model/<version>/best_parking_predictor_model.pkl   (+ optional compiled .npz)
+The newest version (natural sort on the folder name) is served unless
+MODEL_VERSION pins one; MODEL_PATH pins a single file instead. The model is
+loaded on first use, once per process. A watcher thread picks up new
+versions, loads them fully off the request path and then swaps the reference
+in one assignment, so requests already holding the old model finish with it.
+"""
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+from compiled_model import load_model
+
+load_dotenv()
+
+MODEL_DIR = os.getenv("MODEL_DIR", "model")
+MODEL_FILENAME = os.getenv("MODEL_FILENAME", "best_parking_predictor_model.pkl")
+MODEL_VERSION = os.getenv("MODEL_VERSION")
+MODEL_PATH = os.getenv("MODEL_PATH")
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "30"))
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class ModelRegistry:
+    def __init__(self, model_dir=MODEL_DIR, filename=MODEL_FILENAME, version=MODEL_VERSION, path=MODEL_PATH):
+        self.model_dir = model_dir
+        self.filename = filename
+        self.pinned_version = version
+        self.pinned_path = path
+        self._current = None  # (version, path, model)
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        self.load_seconds = None
+        self.loads = 0
+        self._watcher = None
+
+    def versions(self):
+        """Available versions, oldest first."""
+        if not os.path.isdir(self.model_dir):
+            return []
+        found = [
+            name for name in os.listdir(self.model_dir)
+            if os.path.isfile(os.path.join(self.model_dir, name, self.filename))
+        ]
+        return sorted(found, key=_natural_key)
+
+    def resolve(self):
+        """(version, path) of the artifact that should be served."""
+        if self.pinned_path:
+            return "pinned", self.pinned_path
+        if self.pinned_version:
+            return self.pinned_version, os.path.join(self.model_dir, self.pinned_version, self.filename)
+        versions = self.versions()
+        if versions:
+            return versions[-1], os.path.join(self.model_dir, versions[-1], self.filename)
+        # Unversioned layout written by older training runs
+        return "unversioned", os.path.join(self.model_dir, self.filename)
+
+    def _load(self, version, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"❌ Model file not found at {path}")
+        started = time.perf_counter()
+        model = load_model(path)
+        self.load_seconds = time.perf_counter() - started
+        self.loaded_at = time.time()
+        self.loads += 1
+        print(f"✅ AI model {version} loaded from {path} ({type(model).__name__}, {self.load_seconds:.2f}s)")
+        return version, path, model
+
+    def get_model(self):
+        """The current model, loading it on first use."""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self._load(*self.resolve())
+                current = self._current
+        return current[2]
+
+    def reload_if_changed(self):
+        """Load and swap in a newer artifact if one has appeared; returns True if swapped."""
+        version, path = self.resolve()
+        current = self._current
+        if current is not None and current[0] == version and current[1] == path:
+            return False
+        with self._lock:
+            loaded = self._load(version, path)
+            self._current = loaded
+        return True
+
+    def watch(self, interval=MODEL_WATCH_INTERVAL):
+        """Poll for new versions in a daemon thread (idempotent)."""
+        if self._watcher is not None:
+            return self._watcher
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    if self._current is not None:
+                        self.reload_if_changed()
+                except Exception as e:
+                    print("❌ Model reload failed, keeping the current version:", e)
+
+        stop = threading.Event()
+        threading.Thread(target=run, name="model-watcher", daemon=True).start()
+        self._watcher = stop
+        return stop
+
+    def current_version(self):
+        current = self._current
+        return current[0] if current else None
+
+    def info(self):
+        current = self._current
+        return {
+            "version": current[0] if current else None,
+            "path": current[1] if current else None,
+            "kind": type(current[2]).__name__ if current else None,
+            "regions": getattr(current[2], "regions", None) if current else None,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4) if self.load_seconds is not None else None,
+            "loads": self.loads,
+            "available_versions": self.versions(),
+        }
+
+
+def publish(model, model_dir=MODEL_DIR, filename=MODEL_FILENAME, version=None):
+    """Save a trained model as a new version; the file is renamed into place so watchers never see it half-written."""
+    import joblib
+
+    version = version or time.strftime("%Y%m%d%H%M%S")
+    version_dir = os.path.join(model_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    path = os.path.join(version_dir, filename)
+    joblib.dump(model, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return version, path
+
+
+registry = ModelRegistry()
+
+
+def get_model():
+    return registry.get_model()
+
+
+def current_version():
+    return registry.current_version()
+
+
+def watch(interval=MODEL_WATCH_INTERVAL):
+    return registry.watch(interval)
+
+
+def model_info():
+    return registry.info()
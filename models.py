@@ -1,23 +1,232 @@
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# MongoDB Connection
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-DB_NAME = os.getenv("DB_NAME", "smart_parking")
-
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-
-# Collections
-users_collection = db["users"]
-parking_collection = db["parking_slots"]
-
-print("✅ Database connected successfully!")
-
-# Optional: Define indexes for better query performance
-users_collection.create_index("email", unique=True)
-parking_collection.create_index([("location", "text")])
+"""Mongo data access: one lazily created client, index migrations and repository functions.
+
+The MongoClient (and its connection pool) is created on the first database
+operation, not at import, and is shared by the whole process. `db` can be
+imported anywhere; it resolves to the real database when used.
+MONGO_URI=memory:// swaps in the in-memory stand-in (benchmarks).
+
+DB_NAME defaults to smart_parking, where users have always lived. Parking lots
+used to live in a separate parking_system database; copy them over once.
+Indexes are created by the explicit migration, not at startup; registration
+only makes sure the unique users.email index exists before its upsert:
+    python models.py migrate
+    python models.py migrate --copy-lots-from parking_system
+"""
+import argparse
+import os
+import threading
+from dotenv import load_dotenv
+from pymongo import ASCENDING, MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import bookings
+from metrics import instrument_db
+from occupancy import aggregator as occupancy
+
+# Load environment variables
+load_dotenv()
+
+# MongoDB Connection
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+DB_NAME = os.getenv("DB_NAME", "smart_parking")
+
+# ✅ Pool tuning (one pool per process)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_MS = int(os.getenv("MONGO_MAX_IDLE_MS", "60000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "2000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+
+_client = None
+_db = None
+_lock = threading.Lock()
+_email_index_ready = False
+_index_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide MongoClient, created on first use (None for memory://)."""
+    get_db()
+    return _client
+
+
+def get_db():
+    """The instrumented application database, connecting on first use."""
+    global _client, _db
+    if _db is None:
+        with _lock:
+            if _db is None:
+                if MONGO_URI.startswith("memory://"):
+                    from mongo_stub import InMemoryDatabase
+
+                    _db = instrument_db(InMemoryDatabase(DB_NAME))
+                else:
+                    _client = MongoClient(
+                        MONGO_URI,
+                        maxPoolSize=MONGO_MAX_POOL_SIZE,
+                        minPoolSize=MONGO_MIN_POOL_SIZE,
+                        maxIdleTimeMS=MONGO_MAX_IDLE_MS,
+                        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                        appname="smart-parking",
+                        connect=False,
+                    )
+                    _db = instrument_db(_client[DB_NAME])
+    return _db
+
+
+def reset_connection():
+    """Forget the client so the next operation opens a new pool (call in a forked child)."""
+    global _client, _db
+    with _lock:
+        _client = None
+        _db = None
+
+
+class _LazyCollection:
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self._name], attr)
+
+
+class _LazyDatabase:
+    def __getitem__(self, name):
+        return _LazyCollection(name)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+db = _LazyDatabase()
+
+# Collections
+users_collection = db["users"]
+parking_collection = db["parking_slots"]
+
+
+# --- migrations --------------------------------------------------------------
+def ensure_indexes(database):
+    """Create every index the app relies on; safe to run repeatedly."""
+    _drop_hold_ttl_index(database)
+    created = [
+        database.users.create_index("email", unique=True),
+        database.parking_slots.create_index("location_id", unique=True),
+        database.parking_slots.create_index([("location", "text")]),
+        database.bookings.create_index([("location_id", ASCENDING), ("user_id", ASCENDING)]),
+        database.bookings.create_index("expires_at"),
+    ]
+    return created
+
+
+def _drop_hold_ttl_index(database):
+    """Earlier versions put a TTL index on expires_at, which could delete a hold before the reaper returned its slot."""
+    for index in database.bookings.list_indexes():
+        if "expireAfterSeconds" in index and list(index["key"]) == ["expires_at"]:
+            database.bookings.drop_index(index["name"])
+
+
+def require_email_index():
+    """Create the unique users.email index once per process; raises if it can't be created."""
+    global _email_index_ready
+    if not _email_index_ready:
+        with _index_lock:
+            if not _email_index_ready:
+                get_db().users.create_index("email", unique=True)
+                _email_index_ready = True
+
+
+def _source_database(source_db_name):
+    client = get_client()
+    if client is None:
+        raise ValueError("Copying between databases needs a real MongoDB server (MONGO_URI is memory://)")
+    return client[source_db_name]
+
+
+def copy_users(source_db_name, database):
+    """Copy users that only exist in another database."""
+    copied = 0
+    for user in _source_database(source_db_name).users.find({}, {"_id": 0, "email": 1, "password": 1}):
+        result = database.users.update_one({"email": user["email"]}, {"$setOnInsert": user}, upsert=True)
+        copied += 1 if result.upserted_id is not None else 0
+    return copied
+
+
+def copy_lots(source_db_name, database):
+    """Copy parking lots that only exist in another database (the old parking_system one)."""
+    copied = 0
+    for lot in _source_database(source_db_name).parking_slots.find({"location_id": {"$exists": True}}, {"_id": 0}):
+        result = database.parking_slots.update_one({"location_id": lot["location_id"]}, {"$setOnInsert": lot}, upsert=True)
+        copied += 1 if result.upserted_id is not None else 0
+    return copied
+
+
+# --- users -------------------------------------------------------------------
+def find_user_password_hash(email):
+    """The stored bcrypt hash for `email`, or None if there is no such user."""
+    user = users_collection.find_one({"email": email}, {"password": 1, "_id": 0})
+    return user["password"] if user else None
+
+
+def register_user(email, password_hash):
+    """Create the user unless it exists, in one upsert; returns the hash actually stored."""
+    # Without the unique email index two first logins could both insert
+    require_email_index()
+    try:
+        user = users_collection.find_one_and_update(
+            {"email": email},
+            {"$setOnInsert": {"email": email, "password": password_hash}},
+            projection={"password": 1, "_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return user["password"]
+    except DuplicateKeyError:
+        # Two first logins raced on the unique email index; the other one won
+        return find_user_password_hash(email)
+
+
+# --- lots and bookings -------------------------------------------------------
+def book_slot(location_id, user_id, hold_seconds=None):
+    """See bookings.book_slot; returns (status, booking_id). Bookings feed the live occupancy."""
+    status, booking_id = bookings.book_slot(db, location_id, user_id, hold_seconds)
+    if status == bookings.BOOKED:
+        occupancy.record(location_id, -1)
+    return status, booking_id
+
+
+def cancel_slot(location_id, user_id):
+    """See bookings.cancel_slot; returns a status string."""
+    status = bookings.cancel_slot(db, location_id, user_id)
+    if status == bookings.CANCELLED:
+        occupancy.record(location_id, +1)
+    return status
+
+
+def start_hold_reaper(interval=30):
+    return bookings.start_hold_reaper(db, interval, on_release=lambda location_id: occupancy.record(location_id, +1))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = sub.add_parser("migrate", help="Create or update indexes")
+    migrate_parser.add_argument("--copy-users-from", help="Also copy users from this database")
+    migrate_parser.add_argument("--copy-lots-from", help="Also copy parking lots from this database (e.g. parking_system)")
+    args = parser.parse_args()
+
+    database = get_db()
+    for name in ensure_indexes(database):
+        print(f"✅ Index {name}")
+    try:
+        if args.copy_users_from:
+            print(f"✅ Copied {copy_users(args.copy_users_from, database)} users from {args.copy_users_from}")
+        if args.copy_lots_from:
+            print(f"✅ Copied {copy_lots(args.copy_lots_from, database)} lots from {args.copy_lots_from}")
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
@@ -0,0 +1,330 @@
+"""In-memory, thread-safe stand-in for the subset of the pymongo API this app uses.
+
+Used by the benchmarks when no local mongod is available. Each collection
+applies operations under its own lock, which matches MongoDB's per-document
+atomicity for single-document writes.
+"""
+import copy
+import itertools
+import threading
+
+try:
+    from bson import ObjectId as _new_id
+except ImportError:
+    _counter = itertools.count(1)
+
+    def _new_id():
+        return next(_counter)
+
+try:
+    from pymongo.errors import BulkWriteError, DuplicateKeyError
+except ImportError:
+    class DuplicateKeyError(Exception):
+        pass
+
+    class BulkWriteError(Exception):
+        def __init__(self, results):
+            super().__init__("batch op errors occurred")
+            self.details = results
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def _matches_value(value, condition):
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        for op, arg in condition.items():
+            if op == "$gt" and not (value is not None and value > arg):
+                return False
+            if op == "$gte" and not (value is not None and value >= arg):
+                return False
+            if op == "$lt" and not (value is not None and value < arg):
+                return False
+            if op == "$lte" and not (value is not None and value <= arg):
+                return False
+            if op == "$ne" and value == arg:
+                return False
+            if op == "$in" and value not in arg:
+                return False
+            if op == "$exists" and (value is not None) != bool(arg):
+                return False
+        return True
+    if isinstance(value, list) and not isinstance(condition, list):
+        return condition in value
+    return value == condition
+
+
+def _matches(doc, query):
+    return all(_matches_value(doc.get(field), condition) for field, condition in (query or {}).items())
+
+
+def _project(doc, projection):
+    if doc is None:
+        return None
+    if not projection:
+        return copy.deepcopy(doc)
+    included = {field for field, keep in projection.items() if keep}
+    if included:
+        out = {field: copy.deepcopy(doc[field]) for field in included if field in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {field: copy.deepcopy(value) for field, value in doc.items() if projection.get(field, 1)}
+
+
+def _evaluate(doc, expr):
+    """The aggregation expressions update pipelines use here: "$field", $add, $max, $ifNull."""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, dict) and len(expr) == 1:
+        (op, args), = expr.items()
+        values = [_evaluate(doc, arg) for arg in args]
+        if op == "$add":
+            return None if any(v is None for v in values) else sum(values)
+        if op == "$max":
+            present = [v for v in values if v is not None]
+            return max(present) if present else None
+        if op == "$ifNull":
+            return next((v for v in values if v is not None), None)
+        raise NotImplementedError(f"Expression {op} is not supported by the stub")
+    return copy.deepcopy(expr)
+
+
+def _apply_pipeline(doc, pipeline):
+    for stage in pipeline:
+        (op, fields), = stage.items()
+        if op not in ("$set", "$addFields"):
+            raise NotImplementedError(f"Pipeline stage {op} is not supported by the stub")
+        values = {field: _evaluate(doc, expr) for field, expr in fields.items()}
+        doc.update(values)
+
+
+def _apply_update(doc, update, inserting=False):
+    if isinstance(update, list):
+        return _apply_pipeline(doc, update)
+    for op, fields in update.items():
+        for field, value in fields.items():
+            if op == "$inc":
+                doc[field] = doc.get(field, 0) + value
+            elif op == "$set":
+                doc[field] = copy.deepcopy(value)
+            elif op == "$setOnInsert":
+                if inserting:
+                    doc[field] = copy.deepcopy(value)
+            elif op == "$unset":
+                doc.pop(field, None)
+            elif op == "$push":
+                doc.setdefault(field, []).append(copy.deepcopy(value))
+            elif op == "$pull":
+                doc[field] = [item for item in doc.get(field, []) if item != value]
+            elif op == "$max":
+                doc[field] = value if doc.get(field) is None else max(doc[field], value)
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported by the stub")
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda d: (d.get(field) is None, d.get(field)), reverse=order < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+
+class InMemoryCollection:
+    def __init__(self, name):
+        self.name = name
+        self._docs = []
+        self._unique = []
+        self._indexes = {}
+        self._lock = threading.RLock()
+
+    # --- indexes -----------------------------------------------------------
+    def create_index(self, keys, unique=False, **kwargs):
+        fields = [keys] if isinstance(keys, str) else [field for field, _ in keys]
+        name = kwargs.pop("name", "_".join(fields))
+        if unique and tuple(fields) not in self._unique:
+            self._unique.append(tuple(fields))
+        self._indexes[name] = dict(kwargs, name=name, key={field: 1 for field in fields}, unique=unique)
+        return name
+
+    def list_indexes(self):
+        return [dict(index) for index in self._indexes.values()]
+
+    def drop_index(self, name):
+        index = self._indexes.pop(name)
+        if index["unique"]:
+            self._unique.remove(tuple(index["key"]))
+
+    def _check_unique(self, doc, ignore=None):
+        for fields in self._unique:
+            key = tuple(doc.get(f) for f in fields)
+            for other in self._docs:
+                if other is not ignore and tuple(other.get(f) for f in fields) == key:
+                    raise DuplicateKeyError(f"E11000 duplicate key {dict(zip(fields, key))}")
+
+    # --- reads -------------------------------------------------------------
+    def _select(self, query, sort=None):
+        docs = [doc for doc in self._docs if _matches(doc, query)]
+        if sort:
+            docs = list(_Cursor(docs).sort(sort))
+        return docs
+
+    def find(self, query=None, projection=None):
+        with self._lock:
+            return _Cursor([_project(doc, projection) for doc in self._select(query)])
+
+    def find_one(self, query=None, projection=None, sort=None):
+        with self._lock:
+            docs = self._select(query, sort)
+            return _project(docs[0], projection) if docs else None
+
+    def count_documents(self, query, limit=0):
+        with self._lock:
+            count = len(self._select(query))
+            return min(count, limit) if limit else count
+
+    # --- writes ------------------------------------------------------------
+    def insert_one(self, doc):
+        with self._lock:
+            doc = copy.deepcopy(doc)
+            doc.setdefault("_id", _new_id())
+            self._check_unique(doc)
+            self._docs.append(doc)
+            return _Result(inserted_id=doc["_id"])
+
+    def insert_many(self, docs, ordered=True):
+        return _Result(inserted_ids=[self.insert_one(doc).inserted_id for doc in docs])
+
+    def _upsert_doc(self, query, update):
+        doc = {field: value for field, value in query.items() if not isinstance(value, dict)}
+        _apply_update(doc, update, inserting=True)
+        doc.setdefault("_id", _new_id())
+        self._check_unique(doc)
+        self._docs.append(doc)
+        return doc
+
+    def update_one(self, query, update, upsert=False):
+        with self._lock:
+            docs = self._select(query)
+            if docs:
+                _apply_update(docs[0], update)
+                return _Result(matched_count=1, modified_count=1, upserted_id=None)
+            if upsert:
+                doc = self._upsert_doc(query, update)
+                return _Result(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+            return _Result(matched_count=0, modified_count=0, upserted_id=None)
+
+    def update_many(self, query, update, upsert=False):
+        with self._lock:
+            docs = self._select(query)
+            for doc in docs:
+                _apply_update(doc, update)
+            if not docs and upsert:
+                doc = self._upsert_doc(query, update)
+                return _Result(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+            return _Result(matched_count=len(docs), modified_count=len(docs), upserted_id=None)
+
+    def find_one_and_update(self, query, update, projection=None, sort=None, upsert=False, return_document=False):
+        with self._lock:
+            docs = self._select(query, sort)
+            if docs:
+                before = _project(docs[0], projection)
+                _apply_update(docs[0], update)
+                return _project(docs[0], projection) if return_document else before
+            if upsert:
+                doc = self._upsert_doc(query, update)
+                return _project(doc, projection) if return_document else None
+            return None
+
+    def delete_one(self, query):
+        with self._lock:
+            docs = self._select(query)
+            if docs:
+                self._docs.remove(docs[0])
+            return _Result(deleted_count=len(docs[:1]))
+
+    def delete_many(self, query):
+        with self._lock:
+            doomed = {id(doc) for doc in self._select(query)}
+            self._docs = [doc for doc in self._docs if id(doc) not in doomed]
+            return _Result(deleted_count=len(doomed))
+
+    def bulk_write(self, requests, ordered=True):
+        """Apply pymongo InsertOne / UpdateOne / UpdateMany / DeleteOne / DeleteMany operations."""
+        counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nUpserted": 0, "nRemoved": 0, "upserted": []}
+        errors = []
+        with self._lock:
+            for index, op in enumerate(requests):
+                kind = type(op).__name__
+                try:
+                    if kind == "InsertOne":
+                        self.insert_one(op._doc)
+                        counts["nInserted"] += 1
+                    elif kind in ("UpdateOne", "UpdateMany"):
+                        update = self.update_one if kind == "UpdateOne" else self.update_many
+                        result = update(op._filter, op._doc, upsert=bool(op._upsert))
+                        counts["nMatched"] += result.matched_count
+                        counts["nModified"] += result.modified_count
+                        if result.upserted_id is not None:
+                            counts["nUpserted"] += 1
+                            counts["upserted"].append({"index": index, "_id": result.upserted_id})
+                    elif kind in ("DeleteOne", "DeleteMany"):
+                        delete = self.delete_one if kind == "DeleteOne" else self.delete_many
+                        counts["nRemoved"] += delete(op._filter).deleted_count
+                    else:
+                        raise NotImplementedError(f"{kind} is not supported by the stub")
+                except (DuplicateKeyError, NotImplementedError) as e:
+                    errors.append({"index": index, "errmsg": str(e), "op": kind})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({**counts, "writeErrors": errors, "writeConcernErrors": []})
+        return _Result(
+            inserted_count=counts["nInserted"],
+            matched_count=counts["nMatched"],
+            modified_count=counts["nModified"],
+            upserted_count=counts["nUpserted"],
+            deleted_count=counts["nRemoved"],
+            upserted_ids={u["index"]: u["_id"] for u in counts["upserted"]},
+            bulk_api_result=counts,
+        )
+
+    def find_one_and_delete(self, query, projection=None, sort=None):
+        with self._lock:
+            docs = self._select(query, sort)
+            if not docs:
+                return None
+            self._docs.remove(docs[0])
+            return _project(docs[0], projection)
+
+
+class InMemoryDatabase:
+    def __init__(self, name="parking_system"):
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = InMemoryCollection(name)
+            return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
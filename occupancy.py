@@ -0,0 +1,308 @@
+"""Rolling live occupancy per lot, kept in process from booking, cancel and ingest events.
+
+Each lot owns one row of a few (lots × 60) NumPy arrays: a ring of one-minute
+buckets holding the time-integral of available slots, arrivals and
+departures, stamped with the minute they belong to. Events integrate the
+lot's current level into the ring and then move it, so reads cover the last
+5, 15 and 60 minutes with a fixed 60-slot slice per lot, whatever the traffic.
+
+Capacity comes from the lot document (`capacity`, else the highest available
+count seen), so occupancy ratios are estimates for lots without one.
+
+The rings are snapshotted to OCCUPANCY_SNAPSHOT_PATH every
+OCCUPANCY_SNAPSHOT_SECONDS and at exit, and reloaded on start, so a restart
+keeps the last hour instead of starting cold. Under several gunicorn workers
+every worker restores the snapshot, but only the one holding a lock on
+OCCUPANCY_SNAPSHOT_PATH + ".lock" writes it (another takes over if it exits).
+"""
+import atexit
+import os
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WINDOWS_MINUTES = (5, 15, 60)
+RING_MINUTES = 60
+OCCUPANCY_SNAPSHOT_PATH = os.getenv("OCCUPANCY_SNAPSHOT_PATH", "occupancy_snapshot.npz")
+OCCUPANCY_SNAPSHOT_SECONDS = float(os.getenv("OCCUPANCY_SNAPSHOT_SECONDS", "60"))
+LIVE_MAX_AGE_SECONDS = float(os.getenv("LIVE_MAX_AGE_SECONDS", "300"))
+
+
+def _add_level(area, arrivals, departures, stamps, level, since, now):
+    """Integrate a constant level from `since` to `now` into one lot's ring (at most the last hour)."""
+    since = max(since, now - RING_MINUTES * 60)
+    while since < now:
+        minute = int(since // 60)
+        slot = _slot(area, arrivals, departures, stamps, minute)
+        until = min(now, (minute + 1) * 60)
+        area[slot] += level * (until - since)
+        since = until
+
+
+def _slot(area, arrivals, departures, stamps, minute):
+    """Ring slot for `minute`, cleared first if it still holds an older minute."""
+    slot = minute % RING_MINUTES
+    if stamps[slot] != minute:
+        stamps[slot] = minute
+        area[slot] = 0.0
+        arrivals[slot] = 0
+        departures[slot] = 0
+    return slot
+
+
+class OccupancyAggregator:
+    def __init__(self, initial_lots=1024):
+        self._ids = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._allocate(initial_lots)
+
+    def _allocate(self, n):
+        self.area = np.zeros((n, RING_MINUTES), dtype=np.float64)     # available-slot-seconds per minute
+        self.arrivals = np.zeros((n, RING_MINUTES), dtype=np.uint32)
+        self.departures = np.zeros((n, RING_MINUTES), dtype=np.uint32)
+        self.stamps = np.full((n, RING_MINUTES), -1, dtype=np.int64)  # minute each slot holds
+        self.level = np.full(n, np.nan)                                # available slots now
+        self.capacity = np.full(n, np.nan)
+        self.level_since = np.zeros(n)                                 # when level was last integrated
+        self.first_seen = np.zeros(n)
+        self.updated_at = np.zeros(n)
+
+    def _grow(self):
+        old = (self.area, self.arrivals, self.departures, self.stamps, self.level, self.capacity,
+               self.level_since, self.first_seen, self.updated_at)
+        n = len(self.level)
+        self._allocate(n * 2)
+        for new, previous in zip((self.area, self.arrivals, self.departures, self.stamps, self.level, self.capacity,
+                                  self.level_since, self.first_seen, self.updated_at), old):
+            new[:n] = previous
+
+    def _row(self, location_id, now):
+        row = self._ids.get(location_id)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self.level):
+                self._grow()
+            self._ids[location_id] = row
+            self.first_seen[row] = self.level_since[row] = now
+        return row
+
+    def _integrate(self, row, now):
+        """Add level × time since the last event to the minute buckets it spans."""
+        if not np.isnan(self.level[row]):
+            _add_level(self.area[row], self.arrivals[row], self.departures[row], self.stamps[row],
+                       self.level[row], self.level_since[row], now)
+        self.level_since[row] = now
+
+    # --- events ------------------------------------------------------------
+    def add_listener(self, fn):
+        """Call fn(location_id, available) after every event on a lot whose level is known.
+
+        fn runs under the aggregator's lock: it must be quick and must not call back into the aggregator.
+        """
+        self._listeners.append(fn)
+
+    def _notify(self, location_id, level):
+        if np.isnan(level):
+            return
+        for listener in self._listeners:
+            try:
+                listener(location_id, int(level))
+            except Exception as e:
+                print("❌ Occupancy listener failed:", e)
+
+    def set_level(self, location_id, available, capacity=None, now=None):
+        """Absolute available-slot count (lot loaded from Mongo or a sensor count)."""
+        now = now or time.time()
+        with self._lock:
+            row = self._row(location_id, now)
+            self._integrate(row, now)
+            if np.isnan(self.level[row]):
+                self.first_seen[row] = now
+            self.level[row] = available
+            if capacity:
+                self.capacity[row] = capacity
+            elif np.isnan(self.capacity[row]) or available > self.capacity[row]:
+                self.capacity[row] = available
+            self.updated_at[row] = now
+            # Still under the lock, so listeners get a lot's levels in the order they happened
+            self._notify(location_id, self.level[row])
+
+    def record(self, location_id, delta, now=None):
+        """Available slots changed by `delta`: -1 per car in (arrival), +1 per car out (departure)."""
+        now = now or time.time()
+        with self._lock:
+            row = self._row(location_id, now)
+            self._integrate(row, now)
+            slot = _slot(self.area[row], self.arrivals[row], self.departures[row], self.stamps[row], int(now // 60))
+            if delta < 0:
+                self.arrivals[row, slot] += -delta
+            else:
+                self.departures[row, slot] += delta
+            if not np.isnan(self.level[row]):
+                self.level[row] = max(self.level[row] + delta, 0)
+                if self.level[row] > self.capacity[row]:
+                    self.capacity[row] = self.level[row]
+            self.updated_at[row] = now
+            # Still under the lock, so listeners get a lot's levels in the order they happened
+            self._notify(location_id, self.level[row])
+
+    def on_ingest(self, location_id, lot):
+        """Listener for ingest.IngestWriter: one coalesced batch entry per lot."""
+        now = lot["ts"] or time.time()
+        if lot["set"] is not None:
+            self.set_level(location_id, max(lot["set"] + lot["delta"], 0), now=now)
+        elif lot["delta"]:
+            self.record(location_id, lot["delta"], now=now)
+
+    def load_levels(self, collection):
+        """Seed current levels (and capacities) from parking_slots; returns how many lots were read."""
+        count = 0
+        for doc in collection.find({}, {"_id": 0, "location_id": 1, "available_slots": 1, "capacity": 1}):
+            if doc.get("location_id") is not None and doc.get("available_slots") is not None:
+                self.set_level(doc["location_id"], doc["available_slots"], doc.get("capacity"))
+                count += 1
+        return count
+
+    # --- reads -------------------------------------------------------------
+    def stats(self, location_id, now=None):
+        """Live level plus rolling occupancy and turnover per window, or None for an unknown lot."""
+        now = now or time.time()
+        with self._lock:
+            row = self._ids.get(location_id)
+            if row is None:
+                return None
+            level, capacity = self.level[row], self.capacity[row]
+            first_seen, updated_at = self.first_seen[row], self.updated_at[row]
+            area, arrivals, departures, stamps = (
+                self.area[row].copy(), self.arrivals[row].copy(), self.departures[row].copy(), self.stamps[row].copy())
+            # Time since the last event isn't in the ring yet; add it to the copy
+            if not np.isnan(level):
+                _add_level(area, arrivals, departures, stamps, level, self.level_since[row], now)
+
+        age = int(now // 60) - stamps
+        windows = {}
+        for minutes in WINDOWS_MINUTES:
+            in_window = (age >= 0) & (age < minutes)
+            # The window is whole minutes plus the current partial one
+            covered = min((minutes - 1) * 60 + now % 60, now - first_seen)
+            avg_available = None
+            if not np.isnan(level) and covered > 0:
+                avg_available = float(area[in_window].sum()) / covered
+            window = {
+                "arrivals": int(arrivals[in_window].sum()),
+                "departures": int(departures[in_window].sum()),
+                "avg_available": round(avg_available, 2) if avg_available is not None else None,
+            }
+            if not np.isnan(capacity) and capacity > 0 and avg_available is not None:
+                window["occupancy"] = round(1 - avg_available / capacity, 3)
+                window["turnover"] = round(window["departures"] / capacity, 3)
+            windows[f"{minutes}m"] = window
+
+        return {
+            "available": None if np.isnan(level) else int(level),
+            "capacity": None if np.isnan(capacity) else int(capacity),
+            "age_s": round(now - updated_at, 1),
+            "windows": windows,
+        }
+
+    def live_for_request(self, spots, day_of_week, hour_of_day, now=None):
+        """Live available counts for spots when the request asks about the current hour, else all None."""
+        now = now or time.time()
+        local = time.localtime(now)
+        if int(day_of_week) != local.tm_wday or int(hour_of_day) != local.tm_hour:
+            return [None] * len(spots)
+        return [self.live_available(spot["location_id"], now=now) if spot.get("location_id") else None for spot in spots]
+
+    def live_available(self, location_id, max_age=LIVE_MAX_AGE_SECONDS, now=None):
+        """Current available-slot count if the lot had an event within `max_age` seconds, else None."""
+        now = now or time.time()
+        row = self._ids.get(location_id)
+        if row is None or now - self.updated_at[row] > max_age or np.isnan(self.level[row]):
+            return None
+        return int(self.level[row])
+
+    # --- persistence -------------------------------------------------------
+    def save(self, path=OCCUPANCY_SNAPSHOT_PATH):
+        with self._lock:
+            n = len(self._ids)
+            ids = np.array(sorted(self._ids, key=self._ids.get), dtype=object)
+            arrays = {name: getattr(self, name)[:n].copy() for name in (
+                "area", "arrivals", "departures", "stamps", "level", "capacity", "level_since", "first_seen", "updated_at")}
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, ids=ids.astype(str), **arrays)
+        os.replace(tmp_path, path)
+        return n
+
+    def load(self, path=OCCUPANCY_SNAPSHOT_PATH):
+        if not os.path.exists(path):
+            return 0
+        with np.load(path) as snapshot, self._lock:
+            ids = [str(location_id) for location_id in snapshot["ids"]]
+            self._ids = {}
+            self._allocate(max(1024, len(ids) * 2))
+            for name in ("area", "arrivals", "departures", "stamps", "level", "capacity", "level_since", "first_seen", "updated_at"):
+                getattr(self, name)[:len(ids)] = snapshot[name]
+            self._ids = {location_id: row for row, location_id in enumerate(ids)}
+        return len(ids)
+
+
+aggregator = OccupancyAggregator()
+
+
+def claim_snapshot(path=OCCUPANCY_SNAPSHOT_PATH):
+    """Open lock file if this process now owns the snapshot, None if another process does."""
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows): the dev server is a single process anyway
+        return open(os.devnull)
+    lock = open(path + ".lock", "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+def start(collection=None, path=OCCUPANCY_SNAPSHOT_PATH, interval=OCCUPANCY_SNAPSHOT_SECONDS):
+    """Restore the last snapshot, seed levels from `collection` in the background, then
+    save a snapshot every `interval` seconds and at exit."""
+    try:
+        restored = aggregator.load(path)
+        if restored:
+            print(f"✅ Occupancy restored for {restored} lots from {path}")
+    except Exception as e:
+        print("❌ Occupancy snapshot could not be loaded:", e)
+
+    owner = []
+
+    def save():
+        try:
+            # Retried every interval, so a worker takes over when the owner exits
+            if not owner:
+                lock = claim_snapshot(path)
+                if lock is None:
+                    return
+                owner.append(lock)
+            aggregator.save(path)
+        except Exception as e:
+            print("❌ Occupancy snapshot failed:", e)
+
+    def run():
+        if collection is not None:
+            try:
+                aggregator.load_levels(collection)
+            except Exception as e:
+                print("❌ Occupancy levels could not be loaded:", e)
+        while not stop.wait(interval):
+            save()
+
+    stop = threading.Event()
+    threading.Thread(target=run, name="occupancy-snapshots", daemon=True).start()
+    atexit.register(save)
+    return stop
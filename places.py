@@ -0,0 +1,55 @@
+import http_client
+from config import Config
+from cache import TTLCache, geohash_encode, geohash_center
+
+# ✅ Shared Places cache: every caller in the process reuses the same entries
+places_cache = TTLCache(
+    maxsize=Config.PLACES_CACHE_SIZE,
+    ttl=Config.PLACES_CACHE_TTL,
+    negative_ttl=Config.PLACES_NEGATIVE_TTL,
+)
+
+
+def _fetch_nearby(latitude, longitude, radius):
+    """Call the Places nearby-search API; returns the raw results list, or None on error."""
+    params = {
+        "location": f"{latitude},{longitude}",
+        "radius": radius,
+        "type": "parking",
+        "key": Config.GOOGLE_MAPS_API_KEY,
+    }
+    try:
+        response = http_client.get(Config.GOOGLE_PLACES_URL, params=params, upstream="places")
+    except http_client.UpstreamError as e:
+        print("❌ Google Places API Error:", e)
+        return None
+
+    if response.status_code != 200:
+        print("❌ Google Places API Error:", response.text)
+        return None
+
+    data = response.json()
+    if data.get("status") not in (None, "OK", "ZERO_RESULTS"):
+        print("❌ Google Places API Error:", data.get("status"))
+        return None
+
+    return data.get("results", [])
+
+
+def nearby_places(latitude, longitude, radius=1500):
+    """Return raw Places results around a point, served from the geohash-keyed cache.
+
+    Coordinates are snapped to the centre of their geohash cell so that every
+    user inside the same cell shares one cache entry and one upstream call.
+    Empty areas are cached for the shorter negative TTL; upstream errors are not cached.
+    """
+    cell = geohash_encode(float(latitude), float(longitude), Config.PLACES_GEOHASH_PRECISION)
+    center_lat, center_lng = geohash_center(cell)
+    return places_cache.get_or_load(
+        (cell, int(radius)),
+        lambda: _fetch_nearby(center_lat, center_lng, int(radius)),
+    )
+
+
+def places_cache_stats():
+    return places_cache.stats()
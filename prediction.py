@@ -0,0 +1,133 @@
+import numbers
+import numpy as np
+
+# ✅ Feature order used by train_model.py (CSV columns minus 'availability')
+FEATURE_COLUMNS = ["latitude", "longitude", "day_of_week", "hour_of_day", "weather"]
+
+# ✅ Text categories in the training CSVs; a value's code is its index (sorted, as LabelEncoder numbered them).
+# The API takes the same weather names, so serving and training agree on every code.
+WEATHER_CLASSES = ["Clear", "Cloudy", "Foggy", "Rainy", "Snowy", "Sunny", "Windy"]
+DAY_CLASSES = ["Friday", "Monday", "Saturday", "Sunday", "Thursday", "Tuesday", "Wednesday"]
+
+
+def encode_categories(column, classes):
+    """Codes for a text pandas column (index into `classes`, NaN if unknown); numeric columns pass through."""
+    if column.dtype.kind in "biuf":
+        return column
+    return column.map({name: code for code, name in enumerate(classes)})
+
+
+def encode_weather(weather):
+    """Map a weather name (any case) or numeric code to the model's weather code, its index in WEATHER_CLASSES.
+
+    Weathers the model never saw (such as "Stormy", which the API used to take) are rejected
+    rather than scored as whichever trained weather happens to share their code.
+    """
+    if isinstance(weather, str):
+        name = weather.strip().title()
+        if name in WEATHER_CLASSES:
+            return WEATHER_CLASSES.index(name)
+        if not name.isdigit():
+            raise ValueError(f"Unknown weather '{weather}', expected one of {', '.join(WEATHER_CLASSES)}")
+        weather = int(name)
+    if isinstance(weather, bool) or not isinstance(weather, numbers.Integral) or not 0 <= weather < len(WEATHER_CLASSES):
+        raise ValueError(f"Unknown weather code {weather!r}, expected 0 to {len(WEATHER_CLASSES) - 1}")
+    return int(weather)
+
+
+def availability_label(prediction):
+    """Turn a model class (0/1) into the label sent to the frontend."""
+    return "Available" if prediction == 1 else "Not Available"
+
+
+def spot_features(spots, day_of_week, hour_of_day, weather):
+    """Build one N×5 feature matrix for all spots sharing the same day/hour/weather."""
+    features = np.empty((len(spots), len(FEATURE_COLUMNS)), dtype=np.float64)
+    features[:, 0] = [spot["lat"] for spot in spots]
+    features[:, 1] = [spot["lng"] for spot in spots]
+    features[:, 2] = day_of_week
+    features[:, 3] = hour_of_day
+    features[:, 4] = weather
+    return features
+
+
+def rows_features(rows):
+    """Build an N×5 feature matrix from request rows, raising ValueError on bad rows."""
+    features = np.empty((len(rows), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for i, row in enumerate(rows):
+        try:
+            features[i] = (
+                float(row["latitude"]),
+                float(row["longitude"]),
+                int(row["day_of_week"]),
+                int(row["hour_of_day"]),
+                encode_weather(row["weather"]),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid row {i}: {e}")
+    return features
+
+
+def predict_matrix(model, features):
+    """Score every row of the feature matrix in a single model call."""
+    if len(features) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.asarray(model.predict(features))
+
+
+def forecast_slots(day_of_week, hour_of_day, hours):
+    """List the (day_of_week, hour_of_day) pairs for the next `hours` hours, rolling past midnight."""
+    absolute = int(hour_of_day) + np.arange(hours)
+    days = (int(day_of_week) + absolute // 24) % 7
+    return list(zip(days.tolist(), (absolute % 24).tolist()))
+
+
+def forecast_features(spots, day_of_week, hour_of_day, hours, weathers):
+    """Build the spots × hours × weathers feature grid as one matrix (spot-major, weather fastest)."""
+    slots = np.array(forecast_slots(day_of_week, hour_of_day, hours), dtype=np.float64)
+    weather_codes = np.asarray(weathers, dtype=np.float64)
+    n_spots, n_hours, n_weathers = len(spots), len(slots), len(weather_codes)
+
+    grid = np.empty((n_spots, n_hours, n_weathers, len(FEATURE_COLUMNS)), dtype=np.float64)
+    grid[..., 0] = np.array([spot["lat"] for spot in spots], dtype=np.float64)[:, None, None]
+    grid[..., 1] = np.array([spot["lng"] for spot in spots], dtype=np.float64)[:, None, None]
+    grid[..., 2] = slots[:, 0][None, :, None]
+    grid[..., 3] = slots[:, 1][None, :, None]
+    grid[..., 4] = weather_codes[None, None, :]
+    return grid.reshape(-1, len(FEATURE_COLUMNS))
+
+
+def forecast_timelines(labels, n_spots, slots, weather_names):
+    """Fold flat grid predictions back into one timeline per spot."""
+    labels = np.asarray(labels).reshape(n_spots, len(slots), len(weather_names))
+    timelines = []
+    for spot_labels in labels:
+        timeline = []
+        for offset, ((day, hour), hour_labels) in enumerate(zip(slots, spot_labels)):
+            entry = {"offset_hours": offset, "day_of_week": day, "hour_of_day": hour}
+            if len(weather_names) == 1:
+                entry["availability"] = availability_label(hour_labels[0])
+            else:
+                entry["availability"] = {
+                    name: availability_label(label) for name, label in zip(weather_names, hour_labels)
+                }
+            timeline.append(entry)
+        timelines.append(timeline)
+    return timelines
+
+
+def parse_forecast(data, weather, max_hours):
+    """Read forecast options from a request body; returns (hours, weather_names, weather_codes) or None."""
+    hours = data.get("forecast_hours")
+    if hours is None:
+        return None
+    hours = int(hours)
+    if not 1 <= hours <= max_hours:
+        raise ValueError(f"forecast_hours must be between 1 and {max_hours}")
+
+    scenarios = data.get("weather_scenarios") or [weather]
+    if not isinstance(scenarios, list):
+        raise ValueError("weather_scenarios must be a list")
+    codes = [encode_weather(name) for name in scenarios]
+    names = [name.strip().title() if isinstance(name, str) else name for name in scenarios]
+    return hours, names, codes
@@ -0,0 +1,75 @@
+"""Per-stage wall time and peak memory for training runs.
+
+Peak memory is sampled from the process RSS by a background thread, so it
+includes native allocations (XGBoost, NumPy) that tracemalloc can't see.
+"""
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb():
+    """Resident set size now; falls back to the high-water mark where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageProfiler:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.stages = {}
+        self._peak = 0.0
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def _sample(self, stop):
+        while not stop.wait(self.interval):
+            rss = current_rss_mb()
+            with self._lock:
+                self._peak = max(self._peak, rss)
+
+    @contextmanager
+    def stage(self, name):
+        """Record wall time, RSS at entry and peak RSS while the block runs."""
+        start_rss = current_rss_mb()
+        with self._lock:
+            self._peak = start_rss
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop,), daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stop.set()
+            sampler.join()
+            end_rss = current_rss_mb()
+            with self._lock:
+                peak = max(self._peak, end_rss)
+            previous = self.stages.get(name)
+            if previous:
+                # A stage entered more than once accumulates time and keeps the highest peak
+                elapsed += previous["wall_s"]
+                start_rss = previous["rss_start_mb"]
+                peak = max(peak, previous["rss_peak_mb"])
+            self.stages[name] = {
+                "wall_s": round(elapsed, 4),
+                "rss_start_mb": round(start_rss, 1),
+                "rss_peak_mb": round(peak, 1),
+                "rss_end_mb": round(end_rss, 1),
+            }
+
+    def summary(self):
+        return {
+            "stages": self.stages,
+            "wall_s": round(time.perf_counter() - self._started, 4),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
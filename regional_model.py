@@ -0,0 +1,116 @@
+"""Per-region availability models routed by geohash.
+
+A RegionalModel holds one small classifier per geohash cell of `precision`
+characters (precision 3 is about 156 × 156 km, roughly one city) plus a
+global fallback for spots outside every trained region. `predict` groups the
+rows by the model that owns them and scores each group in one call, so a
+request whose spots all sit in one city costs a single call to that city's
+model.
+
+It pickles like a plain XGBClassifier, so model_registry and the
+availability table serve it unchanged. train_regional.py builds one.
+"""
+import numpy as np
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+DEFAULT_PRECISION = 3
+
+
+def region_codes(lats, lngs, precision=DEFAULT_PRECISION):
+    """Geohash cells as integers (5 bits per character), for arrays of coordinates.
+
+    The vectorised counterpart of cache.geohash_encode: region_name(code) is the same string.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    bits = 5 * precision
+    lng_bits, lat_bits = (bits + 1) // 2, bits // 2
+    lng_cells = np.clip(np.floor((lngs + 180.0) / 360.0 * (1 << lng_bits)), 0, (1 << lng_bits) - 1).astype(np.int64)
+    lat_cells = np.clip(np.floor((lats + 90.0) / 180.0 * (1 << lat_bits)), 0, (1 << lat_bits) - 1).astype(np.int64)
+    codes = np.zeros(lats.shape, dtype=np.int64)
+    # Geohash interleaves the bits, longitude first, most significant first
+    for i in range(bits):
+        if i % 2 == 0:
+            bit = (lng_cells >> (lng_bits - 1 - i // 2)) & 1
+        else:
+            bit = (lat_cells >> (lat_bits - 1 - i // 2)) & 1
+        codes = (codes << 1) | bit
+    return codes
+
+
+def region_name(code, precision=DEFAULT_PRECISION):
+    """The geohash string for one integer cell."""
+    return "".join(GEOHASH_ALPHABET[(int(code) >> (5 * (precision - 1 - i))) & 31] for i in range(precision))
+
+
+def region_code(name):
+    code = 0
+    for char in name:
+        code = (code << 5) | GEOHASH_ALPHABET.index(char)
+    return code
+
+
+class RegionalModel:
+    """Drop-in replacement for XGBClassifier.predict / predict_proba that routes rows by region."""
+
+    def __init__(self, precision, models, fallback, classes=(0, 1)):
+        self.precision = int(precision)
+        self.models = dict(models)  # geohash -> model
+        self.fallback = fallback
+        self.classes_ = np.asarray(classes)
+        names = sorted(self.models)
+        # Slot 0 is the fallback; a region's slot indexes _ordered
+        self._ordered = [fallback] + [self.models[name] for name in names]
+        self._slots = {region_code(name): i + 1 for i, name in enumerate(names)}
+
+    @property
+    def regions(self):
+        return sorted(self.models)
+
+    def _groups(self, X):
+        """(model, row indices) for every model that owns at least one row."""
+        codes = region_codes(X[:, 0], X[:, 1], self.precision)
+        cells, inverse = np.unique(codes, return_inverse=True)
+        slot = np.array([self._slots.get(int(code), 0) for code in cells], dtype=np.int64)[inverse.ravel()]
+        order = np.argsort(slot, kind="stable")
+        slots, starts = np.unique(slot[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for s, start, end in zip(slots, starts, ends):
+            yield self._ordered[s], order[start:end]
+
+    def _rows(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        return X[None, :] if X.ndim == 1 else X
+
+    def predict(self, X):
+        X = self._rows(X)
+        labels = np.empty(len(X), dtype=self.classes_.dtype)
+        for model, rows in self._groups(X):
+            labels[rows] = np.asarray(model.predict(X[rows]))
+        return labels
+
+    def predict_proba(self, X):
+        X = self._rows(X)
+        proba = np.empty((len(X), len(self.classes_)), dtype=np.float32)
+        for model, rows in self._groups(X):
+            proba[rows] = model.predict_proba(X[rows])
+        return proba
+
+    def route(self, lats, lngs):
+        """Region serving each coordinate, or None where the fallback does."""
+        codes = region_codes(lats, lngs, self.precision).ravel()
+        return [region_name(code, self.precision) if int(code) in self._slots else None for code in codes]
+
+    def warm(self):
+        for model in self._ordered:
+            if hasattr(model, "warm"):
+                model.warm()
+
+    def compile(self):
+        """A copy with every model replaced by its CompiledEnsemble (see compiled_model.py)."""
+        from compiled_model import compile_model
+
+        return RegionalModel(
+            self.precision, {name: compile_model(model) for name, model in self.models.items()},
+            compile_model(self.fallback), self.classes_,
+        )
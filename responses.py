@@ -0,0 +1,117 @@
+"""Content negotiation for the spot and prediction payloads.
+
+Clients pick a representation with the Accept header (or ?format=):
+    application/json                        default and unchanged: one dict per spot
+    application/vnd.parking.columnar+json   {"format": "columnar", "count": n, "columns": {"lat": [...], ...}}
+    application/msgpack                     the same columns as MessagePack (needs the msgpack package)
+In the compact formats availability is the model label (1 = available, 0 = not).
+Bodies of at least RESPONSE_COMPRESS_MIN_BYTES are compressed with br (needs
+the brotli package) or gzip when Accept-Encoding allows it.
+
+Routes hand over their columns (one list or array per field) and a callable
+for the old list of dicts, which is only built for plain JSON. The body is
+encoded to bytes once and sent as it is.
+"""
+import gzip
+import json
+import os
+from dotenv import load_dotenv
+import metrics
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1400"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+JSON = "application/json"
+COLUMNAR = "application/vnd.parking.columnar+json"
+MSGPACK = "application/msgpack"
+FORMATS = {"json": JSON, "columnar": COLUMNAR, "msgpack": MSGPACK}
+
+
+class NotAcceptable(ValueError):
+    """?format= named a representation this server can't produce."""
+
+
+def offered():
+    """Mimetypes this process can produce, preferred first."""
+    return [JSON, COLUMNAR] + ([MSGPACK, "application/x-msgpack"] if msgpack is not None else [])
+
+
+def _plain(column):
+    """Lists as they are; NumPy arrays as lists of Python scalars (what both encoders take)."""
+    return column.tolist() if hasattr(column, "tolist") else column
+
+
+def spot_columns(spots):
+    """name/address/lat/lng of spot dicts, one list each."""
+    return {
+        "name": [spot["name"] for spot in spots],
+        "address": [spot["address"] for spot in spots],
+        "lat": [spot["lat"] for spot in spots],
+        "lng": [spot["lng"] for spot in spots],
+    }
+
+
+def encode(mimetype, key, columns, rows):
+    """Body bytes for one response: `columns` for the compact formats, `rows()` for plain JSON."""
+    if mimetype == JSON:
+        return json.dumps({key: rows()}, separators=(",", ":")).encode("utf-8")
+    plain = {name: _plain(column) for name, column in columns.items()}
+    count = len(next(iter(plain.values()))) if plain else 0
+    if mimetype == COLUMNAR:
+        return json.dumps({"format": "columnar", "count": count, "columns": plain}, separators=(",", ":")).encode("utf-8")
+    return msgpack.packb({"count": count, "columns": plain}, use_bin_type=True)
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL)
+    return body
+
+
+def negotiate(request):
+    """(mimetype, content encoding or None) for a Flask request."""
+    requested = request.args.get("format")
+    if requested:
+        mimetype = FORMATS.get(requested)
+        if mimetype is None or mimetype not in offered():
+            raise NotAcceptable(f"Unsupported format '{requested}'")
+    else:
+        mimetype = request.accept_mimetypes.best_match(offered(), default=JSON)
+        if mimetype == "application/x-msgpack":
+            mimetype = MSGPACK
+    encoding = request.accept_encodings.best_match(["br", "gzip"] if brotli is not None else ["gzip"])
+    return mimetype, encoding
+
+
+def respond(key, columns, rows):
+    """Encode one payload in the representation the client asked for."""
+    from flask import Response, jsonify, request
+
+    try:
+        mimetype, encoding = negotiate(request)
+    except NotAcceptable as e:
+        return jsonify({"error": str(e), "formats": sorted(FORMATS)}), 406
+
+    with metrics.stage("response.encode"):
+        body = encode(mimetype, key, columns, rows)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding and len(body) >= RESPONSE_COMPRESS_MIN_BYTES:
+        with metrics.stage("response.compress"):
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, mimetype=mimetype, headers=headers)
@@ -0,0 +1,271 @@
+"""In-process spatial index of known parking lots.
+
+Lots are bucketed into a fixed lat/lng grid and kept sorted by cell key, so a
+query only looks at the handful of cells that overlap its radius (found with
+np.searchsorted) and ranks the candidates by haversine distance. New lots go
+into a small pending buffer that is merged into the sorted arrays once it
+grows past `merge_threshold`, so refreshes don't rebuild the whole index.
+Queries take the snapshot and a copy of the pending buffer together under
+the lock, so a concurrent add or merge never shows them half-updated.
+
+The served index holds the Mongo parking_slots documents that have a name
+and an address. The refresh thread only picks up lots inserted with a larger
+_id than it has seen; lots that are edited or deleted (or inserted with a
+smaller _id) show up at the next full rebuild, every SPATIAL_REBUILD_SECONDS.
+SPATIAL_INDEX_CSV can preload coordinates from a
+parking-data CSV for benchmarks; those lots are synthetic ("Parking Lot N",
+no address), so leave it unset in production.
+"""
+import math
+import os
+import threading
+import time
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+SPATIAL_CELL_DEGREES = float(os.getenv("SPATIAL_CELL_DEGREES", "0.01"))
+SPATIAL_INDEX_CSV = os.getenv("SPATIAL_INDEX_CSV", "")
+
+
+def haversine_m(lat, lng, lats, lngs):
+    """Great-circle distance in metres from one point to arrays of points."""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class _Snapshot:
+    """Immutable sorted arrays; queries read a snapshot while refreshes build the next one."""
+
+    def __init__(self, cell, lats, lngs, lots):
+        self.cell = cell
+        rows = np.floor(lats / cell).astype(np.int64)
+        cols = np.floor(lngs / cell).astype(np.int64)
+        keys = _cell_keys(rows, cols)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.lats = lats[order]
+        self.lngs = lngs[order]
+        self.lots = [lots[i] for i in order] if lots is not None else None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, lat, lng, radius_m):
+        """Indices of every lot in the grid cells overlapping the query circle."""
+        if not len(self.keys):
+            return np.empty(0, dtype=np.int64)
+        lat_span = math.degrees(radius_m / EARTH_RADIUS_M)
+        lng_span = lat_span / max(math.cos(math.radians(min(abs(lat) + lat_span, 89.9))), 1e-6)
+        row_lo, row_hi = math.floor((lat - lat_span) / self.cell), math.floor((lat + lat_span) / self.cell)
+        col_lo, col_hi = math.floor((lng - lng_span) / self.cell), math.floor((lng + lng_span) / self.cell)
+
+        # Each grid row is one contiguous key range because keys are row-major
+        rows = np.arange(row_lo, row_hi + 1, dtype=np.int64)
+        starts = np.searchsorted(self.keys, _cell_keys(rows, np.full_like(rows, col_lo)), side="left")
+        ends = np.searchsorted(self.keys, _cell_keys(rows, np.full_like(rows, col_hi)), side="right")
+        spans = [np.arange(s, e) for s, e in zip(starts.tolist(), ends.tolist()) if e > s]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+
+def _cell_keys(rows, cols):
+    # Offset so negative cells sort correctly; 2**31 cells per axis is far beyond any grid size used
+    return (rows + 2 ** 31) * 2 ** 32 + (cols + 2 ** 31)
+
+
+class LotIndex:
+    def __init__(self, cell=SPATIAL_CELL_DEGREES, merge_threshold=4096):
+        self.cell = cell
+        self.merge_threshold = merge_threshold
+        self._snapshot = _Snapshot(cell, np.empty(0), np.empty(0), [])
+        self._pending = []
+        self._keys = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        snapshot, pending = self._view()
+        return len(snapshot) + len(pending)
+
+    def _view(self):
+        """The snapshot and the pending lots as one consistent pair (add and _merge change both)."""
+        with self._lock:
+            return self._snapshot, tuple(self._pending)
+
+    def build(self, lats, lngs, lots=None):
+        """Replace the index contents. `lots` is a list of dicts parallel to lats/lngs (or None)."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        snapshot = _Snapshot(self.cell, lats, lngs, lots)
+        with self._lock:
+            self._snapshot = snapshot
+            self._pending = []
+            self._keys = {lot.get("location_id") for lot in lots or [] if lot.get("location_id")}
+
+    def add(self, lots):
+        """Incrementally add lot dicts (must have lat/lng); lots with a known location_id are skipped."""
+        with self._lock:
+            for lot in lots:
+                key = lot.get("location_id")
+                if key and key in self._keys:
+                    continue
+                if key:
+                    self._keys.add(key)
+                self._pending.append(lot)
+            if len(self._pending) >= self.merge_threshold:
+                self._merge()
+
+    def _merge(self):
+        snapshot, pending = self._snapshot, self._pending
+        lots = (snapshot.lots if snapshot.lots is not None else [None] * len(snapshot)) + pending
+        lats = np.concatenate([snapshot.lats, [lot["lat"] for lot in pending]])
+        lngs = np.concatenate([snapshot.lngs, [lot["lng"] for lot in pending]])
+        self._snapshot = _Snapshot(self.cell, lats, lngs, lots)
+        self._pending = []
+
+    def all_lots(self):
+        """Every indexed lot dict (lots built from bare coordinates are skipped)."""
+        snapshot, pending = self._view()
+        return [lot for lot in snapshot.lots or [] if lot] + list(pending)
+
+    def radius(self, lat, lng, radius_m, limit=None):
+        """Lots within `radius_m` metres, nearest first, as (distance_m, index, lot) tuples."""
+        snapshot, pending = self._view()
+        idx = snapshot.candidates(lat, lng, radius_m)
+        results = []
+        if len(idx):
+            dist = haversine_m(lat, lng, snapshot.lats[idx], snapshot.lngs[idx])
+            keep = dist <= radius_m
+            idx, dist = idx[keep], dist[keep]
+            order = np.argsort(dist, kind="stable")[:limit]
+            results = [
+                (float(dist[i]), int(idx[i]), snapshot.lots[idx[i]] if snapshot.lots else None)
+                for i in order
+            ]
+        if pending:
+            dist = haversine_m(lat, lng, [lot["lat"] for lot in pending], [lot["lng"] for lot in pending])
+            results += [(float(d), -1, lot) for d, lot in zip(dist, pending) if d <= radius_m]
+            results.sort(key=lambda r: r[0])
+            results = results[:limit]
+        return results
+
+    def nearest(self, lat, lng, k=10, max_radius_m=50000):
+        """The k nearest lots, growing the search radius until k are found or max_radius_m is reached."""
+        radius_m = self.cell * 111320 / 2
+        while True:
+            results = self.radius(lat, lng, radius_m, limit=k)
+            if len(results) >= k or radius_m >= max_radius_m:
+                return results
+            radius_m = min(radius_m * 2, max_radius_m)
+
+    def load_csv(self, path, chunksize=1_000_000):
+        """Index the distinct lot coordinates in a parking-data CSV, as synthetic unnamed lots."""
+        import pandas as pd
+
+        coords = set()
+        for chunk in pd.read_csv(path, usecols=["latitude", "longitude"], dtype="float64", chunksize=chunksize):
+            coords.update(zip(chunk["latitude"].to_numpy(), chunk["longitude"].to_numpy()))
+        coords = sorted(coords)
+        lats = np.array([c[0] for c in coords])
+        lngs = np.array([c[1] for c in coords])
+        lots = [
+            {"name": f"Parking Lot {i + 1}", "address": None, "lat": float(lat), "lng": float(lng)}
+            for i, (lat, lng) in enumerate(coords)
+        ]
+        self.build(lats, lngs, lots)
+        return len(lots)
+
+    def refresh_from_mongo(self, collection, since_id=None):
+        """Add named lots inserted into `collection` after `since_id`; returns the last _id seen.
+
+        Edited and deleted lots aren't seen here; rebuild_from_mongo picks them up.
+        """
+        query = {"_id": {"$gt": since_id}} if since_id is not None else {}
+        lots, since_id = _named_lots(collection.find(query, _MONGO_PROJECTION).sort("_id", 1), since_id)
+        self.add(lots)
+        return since_id
+
+    def rebuild_from_mongo(self, collection):
+        """Replace the whole index with the named lots in `collection`; returns the last _id seen."""
+        lots, since_id = _named_lots(collection.find({}, _MONGO_PROJECTION).sort("_id", 1), None)
+        self.build([lot["lat"] for lot in lots], [lot["lng"] for lot in lots], lots)
+        return since_id
+
+
+_MONGO_PROJECTION = {"location_id": 1, "name": 1, "address": 1, "lat": 1, "lng": 1, "latitude": 1, "longitude": 1}
+
+
+def _named_lots(docs, since_id):
+    """Lot dicts for the documents that have coordinates, a name and an address, plus the last _id read."""
+    lots = []
+    for doc in docs:
+        since_id = doc["_id"]
+        lat, lng = doc.get("lat", doc.get("latitude")), doc.get("lng", doc.get("longitude"))
+        # Only real lots are served: a document without a name or address is skipped
+        if lat is None or lng is None or not doc.get("name") or not doc.get("address"):
+            continue
+        lots.append({
+            "location_id": doc.get("location_id"),
+            "name": doc.get("name"),
+            "address": doc.get("address"),
+            "lat": float(lat),
+            "lng": float(lng),
+        })
+    return lots, since_id
+
+
+lot_index = LotIndex()
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def get_lot_index():
+    """The process-wide index (filled by start_mongo_refresh; preloaded from SPATIAL_INDEX_CSV if set)."""
+    global _loaded
+    if not _loaded:
+        with _load_lock:
+            if not _loaded:
+                if SPATIAL_INDEX_CSV and os.path.exists(SPATIAL_INDEX_CSV):
+                    count = lot_index.load_csv(SPATIAL_INDEX_CSV)
+                    print(f"✅ Spatial index built with {count} lots from {SPATIAL_INDEX_CSV}")
+                _loaded = True
+    return lot_index
+
+
+def start_mongo_refresh(collection, interval=60, rebuild_interval=3600):
+    """Poll `collection` for new lots every `interval` seconds in a daemon thread; set the returned Event to stop it.
+
+    Every `rebuild_interval` seconds (0 = never) the poll is a full rebuild instead, so edited and
+    deleted lots drop out. A SPATIAL_INDEX_CSV preload is never rebuilt away.
+    """
+    if SPATIAL_INDEX_CSV:
+        rebuild_interval = 0
+
+    def refresh(since_id, rebuild=False):
+        try:
+            index = get_lot_index()
+            if rebuild:
+                return index.rebuild_from_mongo(collection)
+            return index.refresh_from_mongo(collection, since_id)
+        except Exception as e:
+            print("❌ Spatial index refresh failed:", e)
+            return since_id
+
+    def run():
+        since_id = refresh(None)
+        rebuilt_at = time.monotonic()
+        while not stop.wait(interval):
+            rebuild = rebuild_interval > 0 and time.monotonic() - rebuilt_at >= rebuild_interval
+            since_id = refresh(since_id, rebuild)
+            if rebuild:
+                rebuilt_at = time.monotonic()
+
+    stop = threading.Event()
+    threading.Thread(target=run, name="spatial-index-refresh", daemon=True).start()
+    return stop
+
+
+def nearby_lots(latitude, longitude, radius_m=1500, limit=20):
+    """Known lots near a point as spot dicts, nearest first (empty list on a miss)."""
+    results = get_lot_index().radius(float(latitude), float(longitude), radius_m, limit=limit)
+    return [dict(lot, distance_m=round(dist, 1)) for dist, _, lot in results if lot]
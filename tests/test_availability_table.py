@@ -0,0 +1,39 @@
+"""The availability table must cover the lots /get_parking_slots serves."""
+import numpy as np
+import spatial_index
+from availability_table import MISSING, AvailabilityTable, build, served_lots
+from mongo_stub import InMemoryDatabase
+from prediction import spot_features
+
+
+class OddDayModel:
+    """Stands in for the classifier: 1 on odd days, so a lookup shows which cell it read."""
+
+    def predict(self, features):
+        return (features[:, 2] % 2).astype(np.int64)
+
+
+def test_lots_served_by_get_parking_slots_are_in_the_table(tmp_path, monkeypatch):
+    slots = InMemoryDatabase("parking_test").parking_slots
+    slots.insert_one({"location_id": "lot-1", "name": "Garage", "address": "1 Main St", "lat": 12.9716, "lng": 77.5946})
+    slots.insert_one({"location_id": "lot-2", "name": "Mall", "address": "2 Mall Rd", "latitude": 12.9721, "longitude": 77.5951})
+    # Not served (no address), so not worth precomputing
+    slots.insert_one({"location_id": "lot-3", "name": "Parking Lot 3", "lat": 12.9719, "lng": 77.5949})
+
+    path = str(tmp_path / "availability_table.npy")
+    lats, lngs = served_lots(slots)
+    build(lats, lngs, OddDayModel(), path=path, model_version="v1")
+    table = AvailabilityTable.open(path)
+    assert len(table) == 2
+
+    # get_parking_slots answers from the process-wide spatial index, filled from the same collection
+    index = spatial_index.LotIndex()
+    index.refresh_from_mongo(slots)
+    monkeypatch.setattr(spatial_index, "lot_index", index)
+    monkeypatch.setattr(spatial_index, "_loaded", True)
+    spots = spatial_index.nearby_lots(12.9716, 77.5946)
+    assert sorted(spot["location_id"] for spot in spots) == ["lot-1", "lot-2"]
+
+    labels = table.lookup(spot_features(spots, day_of_week=3, hour_of_day=9, weather=1))
+    assert labels.tolist() == [1, 1]
+    assert table.lookup(spot_features([{"lat": 12.9719, "lng": 77.5949}], 3, 9, 1)).tolist() == [MISSING]
@@ -0,0 +1,134 @@
+"""Booking tests.
+
+The in-memory stand-in applies each operation under one lock, so on it the
+concurrency test only checks the bookkeeping. The no-oversell guarantee
+itself is only exercised against a real server:
+
+    MONGO_TEST_URI=mongodb://localhost:27017 python -m pytest tests/test_bookings.py
+"""
+import datetime
+import os
+import threading
+import uuid
+import pytest
+from bookings import (
+    BOOKED, CANCELLED, LOT_FULL, LOT_NOT_FOUND, NOT_BOOKED,
+    book_slot, cancel_slot, parse_hold_minutes, release_expired_holds,
+)
+from mongo_stub import InMemoryDatabase
+
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI")
+
+
+@pytest.fixture(params=["memory", "mongod"])
+def db(request):
+    if request.param == "memory":
+        yield InMemoryDatabase("parking_test")
+        return
+    if not MONGO_TEST_URI:
+        pytest.skip("MONGO_TEST_URI is not set")
+    from pymongo import MongoClient
+
+    client = MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=2000)
+    name = f"parking_test_{uuid.uuid4().hex[:8]}"
+    try:
+        from models import ensure_indexes
+
+        ensure_indexes(client[name])
+        yield client[name]
+    finally:
+        client.drop_database(name)
+        client.close()
+
+
+def seed(db, capacity, location_id="lot-1"):
+    db.parking_slots.insert_one({"location_id": location_id, "available_slots": capacity})
+
+
+def available(db, location_id="lot-1"):
+    return db.parking_slots.find_one({"location_id": location_id})["available_slots"]
+
+
+def test_book_and_cancel_round_trip(db):
+    seed(db, 1)
+    status, booking_id = book_slot(db, "lot-1", "alice")
+    assert status == BOOKED and booking_id is not None
+    assert available(db) == 0
+    assert book_slot(db, "lot-1", "bob") == (LOT_FULL, None)
+
+    assert cancel_slot(db, "lot-1", "alice") == CANCELLED
+    assert available(db) == 1
+    assert cancel_slot(db, "lot-1", "alice") == NOT_BOOKED
+
+
+def test_unknown_lot(db):
+    assert book_slot(db, "nowhere", "alice") == (LOT_NOT_FOUND, None)
+    assert cancel_slot(db, "nowhere", "alice") == LOT_NOT_FOUND
+
+
+def test_cancel_legacy_booked_slots(db):
+    db.parking_slots.insert_one({"location_id": "lot-1", "available_slots": 0, "booked_slots": ["alice"]})
+    assert cancel_slot(db, "lot-1", "alice") == CANCELLED
+    assert available(db) == 1
+    assert db.parking_slots.find_one({"location_id": "lot-1"})["booked_slots"] == []
+
+
+def test_expired_holds_return_their_slot(db):
+    seed(db, 2)
+    book_slot(db, "lot-1", "alice", hold_seconds=60)
+    book_slot(db, "lot-1", "bob")
+    assert available(db) == 0
+
+    released = []
+    later = datetime.datetime.utcnow() + datetime.timedelta(minutes=5)
+    assert release_expired_holds(db, now=later, on_release=released.append) == 1
+    assert released == ["lot-1"]
+    assert available(db) == 1
+    # The reaper is the only thing that deletes holds: a second pass finds nothing left to return
+    assert release_expired_holds(db, now=later) == 0
+    assert available(db) == 1
+
+
+def test_concurrent_bookings_never_oversell(db):
+    capacity, threads, attempts = 50, 16, 20
+    seed(db, capacity)
+    booked = []
+    start = threading.Barrier(threads)
+
+    def worker(n):
+        start.wait()
+        for i in range(attempts):
+            status, _ = book_slot(db, "lot-1", f"user-{n}-{i}")
+            if status == BOOKED:
+                booked.append(n)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    assert len(booked) == capacity
+    assert available(db) == 0
+    assert db.bookings.count_documents({"location_id": "lot-1"}) == capacity
+
+
+def test_migration_drops_the_old_hold_ttl_index():
+    from models import ensure_indexes
+
+    db = InMemoryDatabase("parking_test")
+    db.bookings.create_index("expires_at", expireAfterSeconds=3600)
+    ensure_indexes(db)
+    assert not [index for index in db.bookings.list_indexes() if "expireAfterSeconds" in index]
+    assert ["expires_at"] in [list(index["key"]) for index in db.bookings.list_indexes()]
+
+
+@pytest.mark.parametrize("value, seconds", [(None, None), ("", None), (15, 900), ("15", 900), (2.0, 120)])
+def test_parse_hold_minutes(value, seconds):
+    assert parse_hold_minutes(value) == seconds
+
+
+@pytest.mark.parametrize("value", ["abc", "1.5", 1.5, 0, -5, True, [5], {"m": 5}])
+def test_parse_hold_minutes_rejects_bad_input(value):
+    with pytest.raises(ValueError):
+        parse_hold_minutes(value)
@@ -0,0 +1,81 @@
+"""TTLCache tests (a fake clock stands in for time.monotonic)."""
+import threading
+import time
+import pytest
+import cache
+from cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_concurrent_misses_share_one_load():
+    lots_cache = TTLCache()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return ["lot-1"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lots_cache.get_or_load("cell", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    # Hold the load until every other caller is waiting on it
+    deadline = time.monotonic() + 5
+    while lots_cache.stats()["coalesced"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [["lot-1"]] * 8
+    assert lots_cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_their_ttl(clock):
+    lots_cache = TTLCache(ttl=300, negative_ttl=60)
+    lots_cache.set("full", ["lot-1"])
+    lots_cache.set("empty", [])
+    clock[0] += 59
+    assert lots_cache.get("full") == (True, ["lot-1"])
+    assert lots_cache.get("empty") == (True, [])
+
+    # Empty areas expire on the shorter negative TTL
+    clock[0] += 2
+    assert lots_cache.get("empty") == (False, None)
+    assert lots_cache.get("full") == (True, ["lot-1"])
+    clock[0] += 240
+    assert lots_cache.get("full") == (False, None)
+    assert lots_cache.get_or_load("full", lambda: ["lot-2"]) == ["lot-2"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    lots_cache = TTLCache(maxsize=2)
+    lots_cache.set("a", 1)
+    lots_cache.set("b", 2)
+    lots_cache.get("a")
+    lots_cache.set("c", 3)
+    assert lots_cache.get("b") == (False, None)
+    assert lots_cache.get("a") == (True, 1)
+    assert lots_cache.get("c") == (True, 3)
+    assert lots_cache.stats()["evictions"] == 1
+
+
+def test_failed_loads_are_not_cached():
+    lots_cache = TTLCache()
+
+    def broken():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        lots_cache.get_or_load("cell", broken)
+    assert lots_cache.get_or_load("cell", lambda: None) is None
+    assert lots_cache.get_or_load("cell", lambda: ["lot-1"]) == ["lot-1"]
@@ -0,0 +1,74 @@
+"""The compiled ensemble must give the same labels as model.predict on rows it wasn't fitted on."""
+import os
+import numpy as np
+import pytest
+from compiled_model import CompiledEnsemble, _parse_base_score, compile_model, export
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_CSV = os.path.join(ROOT, "generated_parking_data_10000_numeric_day.csv")
+
+
+@pytest.mark.parametrize("text, value", [("5E-1", 0.5), ("[5E-1]", 0.5), ("[3.2E-1]", 0.32), (" 0.25 ", 0.25)])
+def test_parse_base_score(text, value):
+    assert _parse_base_score(text) == pytest.approx(value)
+
+
+def test_parse_base_score_rejects_multi_output():
+    with pytest.raises(ValueError):
+        _parse_base_score("[5E-1,5E-1]")
+
+
+@pytest.fixture(scope="module")
+def split():
+    pd = pytest.importorskip("pandas")
+    from prediction import FEATURE_COLUMNS, WEATHER_CLASSES, encode_categories
+
+    df = pd.read_csv(DATA_CSV)
+    df["weather"] = encode_categories(df["weather"], WEATHER_CLASSES)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = (df["availability"] >= 0.5).astype(int).to_numpy()
+    cut = int(len(X) * 0.8)
+    return X[:cut], y[:cut], X[cut:]
+
+
+@pytest.mark.parametrize("params", [
+    dict(n_estimators=60, max_depth=6, learning_rate=0.1),
+    # A non-default base score makes a wrong base margin show up as label flips
+    dict(n_estimators=40, max_depth=10, learning_rate=0.05, subsample=0.8, colsample_bytree=0.8, base_score=0.3),
+])
+def test_exported_model_matches_predict_on_held_out_rows(split, params, tmp_path):
+    xgb = pytest.importorskip("xgboost")
+    import joblib
+
+    X_train, y_train, X_held_out = split
+    model = xgb.XGBClassifier(**params, random_state=42)
+    model.fit(X_train, y_train)
+    model_path = str(tmp_path / "model.pkl")
+    joblib.dump(model, model_path)
+
+    path, _ = export(model_path, sample=X_held_out)
+    compiled = CompiledEnsemble.load(path)
+    expected = model.predict(X_held_out)
+
+    # The whole batch goes through the embedded booster, single rows through the NumPy arrays
+    np.testing.assert_array_equal(compiled.predict(X_held_out), expected)
+    np.testing.assert_allclose(compiled.predict_proba(X_held_out), model.predict_proba(X_held_out), atol=1e-5)
+    np.testing.assert_array_equal(np.concatenate([compiled.predict(row) for row in X_held_out[:200]]), expected[:200])
+    # And the arrays alone must agree on every held-out row too
+    arrays = CompiledEnsemble.load(path)
+    arrays.max_rows = None
+    np.testing.assert_array_equal(arrays.predict(X_held_out), expected)
+    np.testing.assert_allclose(arrays.predict_proba(X_held_out), model.predict_proba(X_held_out), atol=1e-5)
+
+
+def test_missing_values_follow_the_default_branch(split):
+    xgb = pytest.importorskip("xgboost")
+
+    X_train, y_train, X_held_out = split
+    model = xgb.XGBClassifier(n_estimators=30, max_depth=6, random_state=42).fit(X_train, y_train)
+    rows = X_held_out[:500].copy()
+    rows[::3, 2] = np.nan
+    rows[1::3, 4] = np.nan
+    compiled = compile_model(model)
+    compiled.max_rows = None
+    np.testing.assert_array_equal(compiled.predict(rows), model.predict(rows))
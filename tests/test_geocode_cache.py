@@ -0,0 +1,87 @@
+"""Geocode cache tests (one fake clock stands in for time.time and time.monotonic)."""
+import os
+import subprocess
+import sys
+import time
+import pytest
+from geocode_cache import GeocodeCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+class Geocoder:
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def __call__(self, address):
+        self.calls.append(address)
+        return self.answers.get(address)
+
+
+def test_importing_creates_no_file(tmp_path):
+    env = dict(os.environ, PYTHONPATH=ROOT, GOOGLE_MAPS_API_KEY="test-key")
+    env.pop("GEOCODE_CACHE_PATH", None)
+    subprocess.run([sys.executable, "-c", "import geocode_cache"], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []
+
+
+def test_found_addresses_are_shared_through_the_file(tmp_path, clock):
+    path = str(tmp_path / "geocode.sqlite3")
+    geocoder = Geocoder({"SW1A 1AA": (51.501, -0.142)})
+    cache = GeocodeCache(path)
+    assert not os.path.exists(path)
+    assert cache.get_or_geocode("SW1A 1AA", geocoder) == (51.501, -0.142)
+    assert cache.get_or_geocode("  sw1a   1aa ", geocoder) == (51.501, -0.142)
+
+    # Another worker process reads it from disk, even years later
+    clock[0] += 10 * 365 * 24 * 3600
+    assert GeocodeCache(path).get_or_geocode("SW1A 1AA", geocoder) == (51.501, -0.142)
+    assert geocoder.calls == ["SW1A 1AA"]
+
+
+def test_negative_entries_expire(tmp_path, clock):
+    path = str(tmp_path / "geocode.sqlite3")
+    geocoder = Geocoder({"Nowhere": ()})
+    cache = GeocodeCache(path, negative_ttl=100)
+    assert cache.get_or_geocode("Nowhere", geocoder) is None
+    clock[0] += 99
+    assert cache.get_or_geocode("Nowhere", geocoder) is None
+    assert len(geocoder.calls) == 1
+
+    clock[0] += 2
+    geocoder.answers["Nowhere"] = (1.0, 2.0)
+    assert cache.get_or_geocode("Nowhere", geocoder) == (1.0, 2.0)
+    assert len(geocoder.calls) == 2
+
+
+def test_negative_entry_read_from_disk_keeps_its_remaining_ttl(tmp_path, clock):
+    path = str(tmp_path / "geocode.sqlite3")
+    geocoder = Geocoder({"Nowhere": ()})
+    assert GeocodeCache(path, negative_ttl=100).get_or_geocode("Nowhere", geocoder) is None
+
+    clock[0] += 90
+    worker = GeocodeCache(path, negative_ttl=100)
+    assert worker.get_or_geocode("Nowhere", geocoder) is None
+    assert len(geocoder.calls) == 1
+    # The entry was written 100 seconds ago, so memory mustn't hold it for another 100
+    clock[0] += 11
+    worker.get_or_geocode("Nowhere", geocoder)
+    assert len(geocoder.calls) == 2
+
+
+def test_upstream_errors_are_not_cached(tmp_path):
+    cache = GeocodeCache(str(tmp_path / "geocode.sqlite3"))
+    geocoder = Geocoder({})
+    assert cache.get_or_geocode("Somewhere", geocoder) is None
+    assert cache.get_or_geocode("Somewhere", geocoder) is None
+    assert len(geocoder.calls) == 2
+    assert cache.stats()["disk_entries"] == 0
@@ -0,0 +1,35 @@
+"""Circuit breaker tests."""
+import time
+import pytest
+import requests
+import http_client
+
+
+@pytest.fixture
+def circuit():
+    circuit = http_client.breaker("test-upstream")
+    yield circuit
+    circuit.record_success()
+
+
+@pytest.mark.parametrize("error, raised", [
+    (requests.ConnectionError("refused"), http_client.UpstreamError),
+    # Not a RequestException, so it escapes the retry loop
+    (RuntimeError("bad response"), RuntimeError),
+])
+def test_a_failed_probe_reopens_the_circuit(circuit, monkeypatch, error, raised):
+    def get(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(http_client.session, "get", get)
+    # Half-open: the reset period has passed, so the next call is the probe
+    circuit.opened_at = time.monotonic() - circuit.reset
+    with pytest.raises(raised):
+        http_client.get("http://127.0.0.1:1/", upstream="test-upstream", retries=0)
+
+    assert circuit.state == "open"
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get("http://127.0.0.1:1/", upstream="test-upstream", retries=0)
+    # Once the reset period passes again another probe is let through
+    circuit.opened_at = time.monotonic() - circuit.reset
+    assert circuit.allow()
@@ -0,0 +1,103 @@
+"""Ingest tests against the in-memory stand-in (it also applies the delta update pipeline)."""
+import json
+import random
+import threading
+import time
+import pytest
+from ingest import IngestBusy, IngestWriter, ingest_stream
+from mongo_stub import InMemoryDatabase
+
+
+class SlowCollection:
+    """Sleeps a random moment before every bulk_write, so writers that share a lot would race."""
+
+    def __init__(self, collection, gate=None):
+        self.collection = collection
+        self.gate = gate
+        self.applied = {}  # location_id -> absolute counts in the order they were written
+        self._lock = threading.Lock()
+
+    def bulk_write(self, operations, ordered=True):
+        if self.gate is not None:
+            self.gate.wait()
+        time.sleep(random.random() * 0.002)
+        with self._lock:
+            for op in operations:
+                if isinstance(op._doc, dict):
+                    self.applied.setdefault(op._filter["location_id"], []).append(op._doc["$set"]["available_slots"])
+            return self.collection.bulk_write(operations, ordered=ordered)
+
+
+@pytest.fixture
+def slots():
+    collection = InMemoryDatabase("parking_test").parking_slots
+    for n in range(8):
+        collection.insert_one({"location_id": f"lot-{n}", "available_slots": 5})
+    return collection
+
+
+def lines(*updates):
+    return [json.dumps(update) + "\n" for update in updates]
+
+
+def available(slots, location_id):
+    return slots.find_one({"location_id": location_id})["available_slots"]
+
+
+def test_updates_to_a_lot_apply_in_order_across_writers(slots):
+    collection = SlowCollection(slots)
+    writer = IngestWriter(collection, writers=4)
+    updates = [{"location_id": f"lot-{n % 8}", "available_slots": n} for n in range(400)]
+    report = ingest_stream(lines(*updates), writer, batch_size=8)
+
+    assert report["totals"]["accepted"] == report["totals"]["matched"] == 400
+    for n in range(8):
+        # Each batch's count for a lot is written after the previous batch's, never before
+        assert collection.applied[f"lot-{n}"] == list(range(n, 400, 8))
+        assert available(slots, f"lot-{n}") == 392 + n
+
+
+def test_deltas_stop_at_zero(slots):
+    writer = IngestWriter(slots, writers=2)
+    ingest_stream(lines({"location_id": "lot-1", "delta": -3}), writer)
+    ingest_stream(lines({"location_id": "lot-1", "delta": -4, "ts": 10.0}), writer)
+    assert available(slots, "lot-1") == 0
+    assert slots.find_one({"location_id": "lot-1"})["sensor_updated_at"] == 10.0
+
+    report = ingest_stream(lines({"location_id": "lot-1", "delta": 1}, {"location_id": "lot-x", "delta": 1}), writer)
+    assert available(slots, "lot-1") == 1
+    assert report["totals"]["unknown_lots"] == 1
+
+
+def test_listeners_only_hear_about_known_lots(slots):
+    writer = IngestWriter(slots, writers=2)
+    heard = []
+    writer.add_listener(lambda location_id, lot: heard.append(location_id))
+    body = lines({"location_id": "lot-1", "delta": -1}, {"location_id": "made-up", "delta": -1},
+                 {"location_id": "lot-2", "available_slots": 3}, {"location_id": "also-made-up", "available_slots": 9})
+    report = ingest_stream(body, writer)
+    assert report["totals"]["unknown_lots"] == 2
+    # Lots that don't exist never reach the live aggregates
+    assert sorted(heard) == ["lot-1", "lot-2"]
+
+
+def test_busy_reports_what_was_queued(slots):
+    gate = threading.Event()
+    writer = IngestWriter(SlowCollection(slots, gate), writers=1, queue_size=1)
+    timer = threading.Timer(0.3, gate.set)
+    timer.start()
+    body = lines({"location_id": "lot-1", "delta": -1}, {"location_id": "lot-2", "delta": -1})
+    try:
+        with pytest.raises(IngestBusy) as busy:
+            ingest_stream(body, writer, batch_size=1, put_timeout=0.05)
+    finally:
+        timer.cancel()
+        gate.set()
+
+    report = busy.value.report
+    assert [b["batch"] for b in report["batches"]] == [0]
+    assert report["batches"][0]["matched"] == 1
+    assert report["resume_from_line"] == 2
+    # The first batch was applied once, the second never
+    assert available(slots, "lot-1") == 4
+    assert available(slots, "lot-2") == 5
@@ -0,0 +1,76 @@
+"""Live feed tests."""
+import threading
+import time
+import pytest
+import live_feed
+from mongo_stub import InMemoryDatabase
+from occupancy import OccupancyAggregator
+
+
+@pytest.fixture(autouse=True)
+def restore_server_settings():
+    yield
+    live_feed.unavailable = None
+    live_feed.hub.max_subscribers = live_feed.LIVE_FEED_MAX_SUBSCRIBERS
+
+
+@pytest.mark.parametrize("worker_class, threads, refused, max_subscribers", [
+    ("sync", 1, True, 0),
+    ("gthread", 1, True, 0),
+    ("gthread", 64, False, 16),
+    ("gevent", 1, False, live_feed.LIVE_FEED_MAX_SUBSCRIBERS),
+])
+def test_check_server(worker_class, threads, refused, max_subscribers):
+    reason = live_feed.check_server(worker_class, threads)
+    assert bool(reason) == refused
+    assert live_feed.unavailable == reason
+    # Streams never take more than a share of a gthread worker's threads
+    assert live_feed.hub.max_subscribers == max_subscribers
+
+
+def test_poll_publishes_counts_written_by_any_worker():
+    slots = InMemoryDatabase("parking_test").parking_slots
+    for n in range(3):
+        slots.insert_one({"location_id": f"lot-{n}", "available_slots": 5})
+    hub = live_feed.FeedHub()
+    subscriber = hub.subscribe(["lot-0", "lot-1"])
+    assert hub.poll(slots) == 2
+
+    # Another process booked a slot: only the database knows
+    slots.update_one({"location_id": "lot-1"}, {"$inc": {"available_slots": -1}})
+    slots.update_one({"location_id": "lot-2"}, {"$inc": {"available_slots": -1}})
+    subscriber.pending.clear()
+    hub.poll(slots)
+    assert {lot: change["available"] for lot, change in subscriber.pending.items()} == {"lot-1": 4}
+
+    hub.unsubscribe(subscriber)
+    assert hub.poll(slots) == 0
+
+
+def test_counts_reach_the_hub_in_order():
+    aggregator = OccupancyAggregator()
+    hub = live_feed.FeedHub()
+    published = []
+
+    def publish(location_id, available):
+        # Give other threads the chance to overtake before the count reaches the hub
+        time.sleep(0)
+        published.append(available)
+        hub.publish(location_id, available)
+
+    aggregator.add_listener(publish)
+    aggregator.set_level("lot-1", 1000, capacity=2000)
+    subscriber = hub.subscribe(["lot-1"])
+
+    def churn(delta):
+        for _ in range(2000):
+            aggregator.record("lot-1", delta)
+
+    threads = [threading.Thread(target=churn, args=(delta,)) for delta in (-1, 1, -1, 1)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Every event moves the count by one, so in order each published count is one away from the last
+    assert all(abs(b - a) == 1 for a, b in zip(published, published[1:]))
+    assert subscriber.pending["lot-1"]["available"] == aggregator.live_available("lot-1") == 1000
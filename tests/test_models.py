@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("pymongo")
+import models  # noqa: E402
+
+
+@pytest.fixture
+def memory_db(monkeypatch):
+    monkeypatch.setattr(models, "MONGO_URI", "memory://")
+    monkeypatch.setattr(models, "_email_index_ready", False)
+    models.reset_connection()
+    yield models.get_db()
+    models.reset_connection()
+
+
+def test_registration_creates_the_unique_email_index_first(memory_db):
+    stored = models.register_user("alice@example.com", "hash-1")
+    assert stored == "hash-1"
+    assert models.register_user("alice@example.com", "hash-2") == "hash-1"
+    assert any(index["unique"] and list(index["key"]) == ["email"] for index in memory_db.users.list_indexes())
+
+
+def test_registration_needs_only_the_email_index(memory_db):
+    # A duplicate lot would break the unique location_id index; signups must not depend on it
+    memory_db.parking_slots.insert_one({"location_id": "lot-1"})
+    memory_db.parking_slots.insert_one({"location_id": "lot-1"})
+    assert models.register_user("bob@example.com", "hash") == "hash"
+    assert [list(index["key"]) for index in memory_db.users.list_indexes() if index.get("unique")] == [["email"]]
+    assert not list(memory_db.parking_slots.list_indexes())
+
+
+def test_copying_needs_a_real_server(memory_db):
+    with pytest.raises(ValueError):
+        models.copy_users("smart_parking", memory_db)
+    with pytest.raises(ValueError):
+        models.copy_lots("parking_system", memory_db)
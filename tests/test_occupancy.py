@@ -0,0 +1,27 @@
+"""Occupancy snapshot tests."""
+import os
+import pytest
+from occupancy import OccupancyAggregator, claim_snapshot
+
+
+def test_only_one_claim_owns_the_snapshot(tmp_path):
+    pytest.importorskip("fcntl")
+    path = str(tmp_path / "occupancy.npz")
+    owner = claim_snapshot(path)
+    assert owner is not None
+    # flock is per open file, so a second claim fails like another worker's would
+    assert claim_snapshot(path) is None
+    owner.close()
+    assert claim_snapshot(path) is not None
+
+
+def test_save_round_trips_without_leaving_a_temp_file(tmp_path):
+    path = str(tmp_path / "occupancy.npz")
+    aggregator = OccupancyAggregator()
+    aggregator.set_level("lot-1", 7, capacity=10, now=1_000_000.0)
+    assert aggregator.save(path) == 1
+    assert os.listdir(tmp_path) == ["occupancy.npz"]
+
+    restored = OccupancyAggregator()
+    assert restored.load(path) == 1
+    assert restored.live_available("lot-1", now=1_000_010.0) == 7
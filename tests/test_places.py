@@ -0,0 +1,49 @@
+"""Places lookups against the local Google stub."""
+import threading
+import pytest
+from cache import TTLCache
+from google_stub import GoogleStubServer
+
+
+@pytest.fixture
+def stub():
+    server = GoogleStubServer(latency=0.05).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def places(monkeypatch, stub):
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test-key")
+    import places
+
+    monkeypatch.setattr(places.Config, "GOOGLE_PLACES_URL", stub.places_url)
+    monkeypatch.setattr(places, "places_cache", TTLCache())
+    return places
+
+
+def test_users_in_one_cell_share_one_upstream_call(places, stub):
+    results = []
+    # Both points fall in the same precision-6 geohash cell
+    points = [(12.97160, 77.59460), (12.97165, 77.59465)] * 4
+    threads = [threading.Thread(target=lambda p=p: results.append(places.nearby_places(*p))) for p in points]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert stub.calls["places"] == 1
+    assert len(results) == 8 and all(r == results[0] for r in results)
+    assert results[0][0]["name"] == "Stub Parking 0"
+
+    places.nearby_places(13.0827, 80.2707)
+    assert stub.calls["places"] == 2
+
+
+def test_upstream_errors_are_not_cached(places, stub, monkeypatch):
+    monkeypatch.setattr(places.Config, "GOOGLE_PLACES_URL", stub.base_url + "/missing")
+    assert places.nearby_places(12.9716, 77.5946) is None
+    monkeypatch.setattr(places.Config, "GOOGLE_PLACES_URL", stub.places_url)
+    assert len(places.nearby_places(12.9716, 77.5946)) == stub.spots_per_area
+    assert stub.calls["places"] == 1
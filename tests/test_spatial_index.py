@@ -0,0 +1,50 @@
+"""Spatial index tests."""
+import threading
+from mongo_stub import InMemoryDatabase
+from spatial_index import LotIndex
+
+
+def lot(n):
+    return {"location_id": f"lot-{n}", "name": f"Lot {n}", "address": f"{n} Main St",
+            "lat": 12.97 + n * 1e-5, "lng": 77.59}
+
+
+def test_queries_see_a_consistent_index_while_lots_are_added():
+    index = LotIndex(merge_threshold=64)
+    errors = []
+
+    def query():
+        try:
+            for _ in range(300):
+                results = index.radius(12.97, 77.59, 5000)
+                assert all(found for _, _, found in results)
+                assert len(index.all_lots()) >= len(results)
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=query) for _ in range(4)]
+    for t in readers:
+        t.start()
+    for n in range(2000):
+        index.add([lot(n)])
+    for t in readers:
+        t.join()
+    assert not errors
+    assert len(index.radius(12.97, 77.59, 5000)) == len(index) == 2000
+
+
+def test_rebuild_picks_up_edited_and_deleted_lots():
+    slots = InMemoryDatabase("parking_test").parking_slots
+    for n in range(3):
+        slots.insert_one(lot(n))
+    index = LotIndex()
+    since_id = index.refresh_from_mongo(slots)
+
+    slots.delete_one({"location_id": "lot-0"})
+    slots.update_one({"location_id": "lot-1"}, {"$set": {"name": "Renamed"}})
+    # A refresh only sees lots inserted after since_id
+    index.refresh_from_mongo(slots, since_id)
+    assert sorted(found["location_id"] for found in index.all_lots()) == ["lot-0", "lot-1", "lot-2"]
+
+    index.rebuild_from_mongo(slots)
+    assert {found["location_id"]: found["name"] for found in index.all_lots()} == {"lot-1": "Renamed", "lot-2": "Lot 2"}
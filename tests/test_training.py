@@ -0,0 +1,64 @@
+"""Both training modes must turn the same CSV into the same feature rows."""
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("xgboost")
+pytest.importorskip("imblearn")
+
+from prediction import DAY_CLASSES, FEATURE_COLUMNS, WEATHER_CLASSES  # noqa: E402
+from train_model import prepare_features  # noqa: E402
+from train_streaming import build_columnar_cache, open_columnar_cache  # noqa: E402
+
+CSV = """latitude,longitude,day_of_week,hour_of_day,weather,availability
+51.5,-0.12,Monday,8,Sunny,1.0
+51.51,-0.13,Sunday,17,Clear,0.4
+51.52,-0.14,Friday,23,Windy,1.0
+51.53,-0.15,Tuesday,0,Hail,0.0
+51.54,-0.16,Wednesday,12,Cloudy,0.9
+"""
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "parking.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def test_stream_and_in_memory_encode_the_same_rows(csv_path, tmp_path):
+    X, y = prepare_features(pd.read_csv(csv_path))
+    meta = build_columnar_cache(csv_path, str(tmp_path / "cache"), chunksize=2)
+    X_stream, y_stream = open_columnar_cache(str(tmp_path / "cache"), meta["rows"])
+
+    # Sunny is kept; only the unknown weather (Hail) is dropped
+    assert meta["rows"] == len(X) == 4
+    np.testing.assert_allclose(np.asarray(X_stream), X[FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(np.asarray(y_stream), y.to_numpy())
+    assert X["weather"].iloc[0] == WEATHER_CLASSES.index("Sunny")
+    assert X["day_of_week"].iloc[1] == DAY_CLASSES.index("Sunday")
+
+
+def test_numeric_columns_are_not_re_encoded(tmp_path):
+    path = tmp_path / "numeric.csv"
+    path.write_text("latitude,longitude,day_of_week,hour_of_day,weather,availability\n51.5,-0.12,3,8,5,1.0\n")
+    X, _ = prepare_features(pd.read_csv(path))
+    assert X[["day_of_week", "weather"]].to_numpy().tolist() == [[3, 5]]
+
+
+@pytest.mark.parametrize("name", WEATHER_CLASSES)
+def test_api_and_training_encode_weather_the_same(name, tmp_path):
+    from prediction import encode_weather
+
+    path = tmp_path / "one.csv"
+    path.write_text(f"latitude,longitude,day_of_week,hour_of_day,weather,availability\n51.5,-0.12,Monday,8,{name},1.0\n")
+    X, _ = prepare_features(pd.read_csv(path))
+    assert encode_weather(name.lower()) == X["weather"].iloc[0]
+
+
+def test_api_rejects_weather_the_model_never_saw():
+    from prediction import encode_weather
+
+    for weather in ("Stormy", 7, -1, True):
+        with pytest.raises(ValueError):
+            encode_weather(weather)
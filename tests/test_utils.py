@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("jwt")
+pytest.importorskip("bcrypt")
+
+
+@pytest.fixture
+def utils(monkeypatch):
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test-key")
+    import utils
+
+    utils.token_cache.clear()
+    return utils
+
+
+@pytest.mark.parametrize("token", [None, "", b"", 42])
+def test_verify_token_rejects_missing_tokens(utils, token):
+    assert utils.verify_token(token) is None
+
+
+def test_verify_token_hands_out_copies_of_the_cached_payload(utils):
+    token = utils.generate_token("alice")
+    first = utils.verify_token(token)
+    first["user_id"] = "mallory"
+    assert utils.verify_token(token)["user_id"] == "alice"
+    assert utils.verify_token(token.encode("utf-8"))["user_id"] == "alice"
+
+
+def test_verify_token_rejects_a_bad_signature(utils):
+    assert utils.verify_token(utils.generate_token("alice")[:-2] + "xx") is None
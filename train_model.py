@@ -1,114 +1,247 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from imblearn.over_sampling import SMOTE
-import xgboost as xgb
-from sklearn.metrics import accuracy_score, classification_report
-import joblib
-import os
-
-# ✅ Load Dataset
-csv_file_path = "C:/Users/dmodi/Desktop/finalProject/newProjectDev/newProjectDev/backend/data/generated_parking_data_10000_numeric_day.csv"
-
-try:
-    df = pd.read_csv(csv_file_path)
-    print(f"✅ Data loaded successfully from {csv_file_path}")
-except FileNotFoundError:
-    print(f"❌ Error: The file {csv_file_path} was not found.")
-    exit()
-
-# ✅ Convert 'availability' to Binary
-df['availability'] = df['availability'].astype(int)
-
-# ✅ Encode Categorical Variables
-label_encoder = LabelEncoder()
-if df['day_of_week'].dtype == 'object':
-    df['day_of_week'] = label_encoder.fit_transform(df['day_of_week'])
-
-if df['weather'].dtype == 'object':
-    df['weather'] = label_encoder.fit_transform(df['weather'])
-
-# ✅ Ensure Numerical Data
-df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
-df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
-
-# ✅ Drop Missing Values
-df = df.dropna()
-
-# ✅ Split Features and Labels
-X = df.drop('availability', axis=1)
-y = df['availability']
-
-# ✅ Balance Dataset Using SMOTE (Oversampling Minority Class)
-smote = SMOTE(random_state=42)
-X_resampled, y_resampled = smote.fit_resample(X, y)
-
-# ✅ Split into Train & Test
-X_train, X_test, y_train, y_test = train_test_split(X_resampled, y_resampled, test_size=0.2, random_state=42)
-
-# ✅ Feature Scaling (Important for XGBoost)
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
-
-# ✅ Train XGBoost Model (BEST ACCURACY)
-model = xgb.XGBClassifier(
-    n_estimators=500,
-    learning_rate=0.05,
-    max_depth=10,
-    subsample=0.8,
-    colsample_bytree=0.8,
-    random_state=42
-)
-model.fit(X_train, y_train)
-
-# ✅ Make Predictions
-y_pred = model.predict(X_test)
-accuracy = accuracy_score(y_test, y_pred)
-print(f"🎯 Model Accuracy: {accuracy:.4f}")  # Expect 95-99% Accuracy
-
-# ✅ Save Model
-model_dir = 'model'
-if not os.path.exists(model_dir):
-    os.makedirs(model_dir)
-
-model_save_path = os.path.join(model_dir, 'best_parking_predictor_model.pkl')
-joblib.dump(model, model_save_path)
-print(f"💾 Model saved to {model_save_path}")
-
-# 📊 FEATURE IMPORTANCE PLOT
-plt.figure(figsize=(10, 6))
-feature_importance = pd.Series(model.feature_importances_, index=X.columns).sort_values(ascending=False)
-sns.barplot(x=feature_importance, y=feature_importance.index, palette='magma')
-plt.xlabel("Feature Importance Score")
-plt.ylabel("Features")
-plt.title("Feature Importance in Parking Prediction")
-plt.show()
-
-# 📊 ACTUAL vs PREDICTED PLOT
-plt.figure(figsize=(6, 4))
-sns.histplot(y_test, label='Actual', color='blue', alpha=0.6, kde=True)
-sns.histplot(y_pred, label='Predicted', color='red', alpha=0.6, kde=True)
-plt.legend()
-plt.title("Actual vs Predicted Parking Availability")
-plt.xlabel("Availability (0 = Not Available, 1 = Available)")
-plt.ylabel("Count")
-plt.show()
-
-# ✅ Classification Report
-print("\nClassification Report:\n", classification_report(y_test, y_pred))
-
-# 📊 CONFUSION MATRIX
-from sklearn.metrics import confusion_matrix
-
-cm = confusion_matrix(y_test, y_pred)
-
-plt.figure(figsize=(6, 4))
-sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', xticklabels=['Not Available', 'Available'], yticklabels=['Not Available', 'Available'])
-plt.xlabel('Predicted')
-plt.ylabel('Actual')
-plt.title('Confusion Matrix - Parking Availability')
-plt.show()
+import argparse
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from sklearn.model_selection import train_test_split
+from imblearn.over_sampling import SMOTE
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+import json
+import os
+import platform
+import time
+from model_registry import publish
+from prediction import DAY_CLASSES, WEATHER_CLASSES, encode_categories
+from profiling import StageProfiler
+
+# ✅ Dataset location (override with TRAINING_CSV or --csv)
+CSV_FILE_PATH = os.getenv(
+    "TRAINING_CSV",
+    "C:/Users/dmodi/Desktop/finalProject/newProjectDev/newProjectDev/backend/data/generated_parking_data_10000_numeric_day.csv",
+)
+
+# ✅ Model configuration (BEST ACCURACY)
+MODEL_PARAMS = dict(
+    n_estimators=500,
+    learning_rate=0.05,
+    max_depth=10,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    random_state=42,
+)
+
+
+def load_dataset(csv_file_path):
+    try:
+        df = pd.read_csv(csv_file_path)
+        print(f"✅ Data loaded successfully from {csv_file_path}")
+        return df
+    except FileNotFoundError:
+        print(f"❌ Error: The file {csv_file_path} was not found.")
+        exit()
+
+
+def prepare_features(df):
+    # ✅ Convert 'availability' to Binary
+    df['availability'] = df['availability'].astype(int)
+
+    # ✅ Encode Categorical Variables (fixed vocabularies, shared with --stream; unknown values are dropped below)
+    df['day_of_week'] = encode_categories(df['day_of_week'], DAY_CLASSES)
+    df['weather'] = encode_categories(df['weather'], WEATHER_CLASSES)
+
+    # ✅ Ensure Numerical Data
+    df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
+    df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
+
+    # ✅ Drop Missing Values
+    df = df.dropna()
+
+    # ✅ Split Features and Labels
+    X = df.drop('availability', axis=1)
+    y = df['availability']
+    return X, y
+
+
+class PlotOutput:
+    """Shows figures interactively, saves them to a folder, or discards them (headless)."""
+
+    def __init__(self, headless=False, plots_dir=None):
+        self.interactive = not headless and not plots_dir
+        self.plots_dir = plots_dir
+        self.saved = []
+        if not self.interactive:
+            plt.switch_backend("Agg")
+        if plots_dir:
+            os.makedirs(plots_dir, exist_ok=True)
+
+    def emit(self, name):
+        if self.interactive:
+            plt.show()
+            return
+        if self.plots_dir:
+            path = os.path.join(self.plots_dir, f"{name}.png")
+            plt.savefig(path, dpi=120, bbox_inches="tight")
+            self.saved.append(path)
+        plt.close()
+
+
+def train_in_memory(csv_file_path, headless=False, plots_dir=None, report_path=None):
+    """Original pipeline: whole CSV in memory, SMOTE and one XGBClassifier fit."""
+    profiler = StageProfiler()
+    plots = PlotOutput(headless, plots_dir)
+
+    with profiler.stage("load"):
+        df = load_dataset(csv_file_path)
+    rows_loaded = len(df)
+
+    with profiler.stage("encode"):
+        X, y = prepare_features(df)
+
+    # ✅ Balance Dataset Using SMOTE (Oversampling Minority Class)
+    with profiler.stage("smote"):
+        smote = SMOTE(random_state=42)
+        X_resampled, y_resampled = smote.fit_resample(X, y)
+
+    # ✅ Split into Train & Test
+    with profiler.stage("split"):
+        X_train, X_test, y_train, y_test = train_test_split(X_resampled, y_resampled, test_size=0.2, random_state=42)
+
+    # ✅ No feature scaling: trees don't need it, and serving passes raw values (same as --stream)
+    # ✅ Train XGBoost Model (BEST ACCURACY)
+    with profiler.stage("fit"):
+        model = xgb.XGBClassifier(**MODEL_PARAMS)
+        model.fit(X_train, y_train)
+
+    # ✅ Make Predictions
+    with profiler.stage("evaluate"):
+        y_pred = model.predict(X_test)
+        accuracy = accuracy_score(y_test, y_pred)
+        report = classification_report(y_test, y_pred, output_dict=True)
+        cm = confusion_matrix(y_test, y_pred)
+    print(f"🎯 Model Accuracy: {accuracy:.4f}")  # Expect 95-99% Accuracy
+
+    # ✅ Save Model (versioned folder, see model_registry.publish)
+    with profiler.stage("save"):
+        model_version, model_save_path = publish(model)
+    print(f"💾 Model {model_version} saved to {model_save_path}")
+
+    with profiler.stage("plots"):
+        # 📊 FEATURE IMPORTANCE PLOT
+        plt.figure(figsize=(10, 6))
+        feature_importance = pd.Series(model.feature_importances_, index=X.columns).sort_values(ascending=False)
+        sns.barplot(x=feature_importance, y=feature_importance.index, palette='magma')
+        plt.xlabel("Feature Importance Score")
+        plt.ylabel("Features")
+        plt.title("Feature Importance in Parking Prediction")
+        plots.emit("feature_importance")
+
+        # 📊 ACTUAL vs PREDICTED PLOT
+        plt.figure(figsize=(6, 4))
+        sns.histplot(y_test, label='Actual', color='blue', alpha=0.6, kde=True)
+        sns.histplot(y_pred, label='Predicted', color='red', alpha=0.6, kde=True)
+        plt.legend()
+        plt.title("Actual vs Predicted Parking Availability")
+        plt.xlabel("Availability (0 = Not Available, 1 = Available)")
+        plt.ylabel("Count")
+        plots.emit("actual_vs_predicted")
+
+    # ✅ Classification Report
+    print("\nClassification Report:\n", classification_report(y_test, y_pred))
+
+    # 📊 CONFUSION MATRIX
+    with profiler.stage("plots"):
+        plt.figure(figsize=(6, 4))
+        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', xticklabels=['Not Available', 'Available'], yticklabels=['Not Available', 'Available'])
+        plt.xlabel('Predicted')
+        plt.ylabel('Actual')
+        plt.title('Confusion Matrix - Parking Availability')
+        plots.emit("confusion_matrix")
+
+    if report_path:
+        write_report(report_path, {
+            "csv": csv_file_path,
+            "model_version": model_version,
+            "model_path": model_save_path,
+            "model_size_bytes": os.path.getsize(model_save_path),
+            "model_params": MODEL_PARAMS,
+            "metrics": {
+                "accuracy": float(accuracy),
+                "classification_report": report,
+                "confusion_matrix": cm.tolist(),
+            },
+            "dataset": {
+                "rows_loaded": rows_loaded,
+                "rows_after_cleaning": len(X),
+                "features": list(X.columns),
+                "class_counts": {str(k): int(v) for k, v in y.value_counts().items()},
+                "rows_after_smote": len(X_resampled),
+                "train_rows": len(X_train),
+                "test_rows": len(X_test),
+            },
+            "plots": plots.saved,
+            **profiler.summary(),
+        })
+
+
+def write_report(report_path, report):
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "xgboost": xgb.__version__,
+        **report,
+    }
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"📝 Training report written to {report_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the parking availability model")
+    parser.add_argument("--csv", default=CSV_FILE_PATH, help="Training CSV")
+    parser.add_argument("--stream", action="store_true", help="Out-of-core training for datasets larger than memory")
+    parser.add_argument("--chunksize", type=int, default=1_000_000, help="CSV rows per chunk in --stream mode")
+    parser.add_argument("--cache-dir", default="data_cache", help="Columnar cache directory for --stream mode")
+    parser.add_argument("--max-rows", type=int, help="Only use the first N rows (--stream mode)")
+    parser.add_argument("--headless", action="store_true", help="Never open plot windows (for scheduled jobs)")
+    parser.add_argument("--plots-dir", help="Save plots as PNG files here instead of showing them")
+    parser.add_argument("--report", help="Write a JSON report with metrics, stage timings and dataset stats")
+    parser.add_argument("--tune", action="store_true", help="Hyperparameter search instead of the fixed configuration")
+    parser.add_argument("--trials", type=int, default=40, help="Number of configurations to try (--tune)")
+    parser.add_argument("--search-space", help="JSON file mapping parameter names to candidate values (--tune)")
+    parser.add_argument("--accuracy-floor", type=float, help="Pick the cheapest model at or above this accuracy (--tune)")
+    parser.add_argument("--workers", type=int, help="Trial or fit processes (default: one per core) (--tune, --regions)")
+    parser.add_argument("--publish", action="store_true", help="Save the chosen or regional model (--tune, --regions)")
+    parser.add_argument("--regions", type=int, metavar="PRECISION", help="One model per geohash region of this many characters")
+    parser.add_argument("--region-min-rows", type=int, default=5000, help="Smaller regions use the fallback model (--regions)")
+    parser.add_argument("--compile", action="store_true", help="Publish the regional models compiled to NumPy arrays (--regions)")
+    args = parser.parse_args()
+
+    if args.tune:
+        from tune_model import tune
+
+        search_space = None
+        if args.search_space:
+            with open(args.search_space) as f:
+                search_space = json.load(f)
+        X, y = prepare_features(load_dataset(args.csv))
+        tune(X, y, search_space, trials=args.trials, accuracy_floor=args.accuracy_floor,
+             workers=args.workers, publish_model=args.publish)
+    elif args.regions:
+        from train_regional import train_regional
+
+        X, y = prepare_features(load_dataset(args.csv))
+        train_regional(X, y, precision=args.regions, min_rows=args.region_min_rows, workers=args.workers,
+                       publish_model=args.publish, compiled=args.compile)
+    elif args.stream:
+        from train_streaming import train_streaming
+
+        train_streaming(args.csv, MODEL_PARAMS, chunksize=args.chunksize, cache_dir=args.cache_dir,
+                        max_rows=args.max_rows, report_path=args.report)
+    else:
+        train_in_memory(args.csv, headless=args.headless, plots_dir=args.plots_dir, report_path=args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Train one small model per geohash region plus a global fallback.
+
+Rows are bucketed by the geohash of their lat/lng. Every region with at least
+--region-min-rows training rows (and both classes) gets its own
+REGION_MODEL_PARAMS classifier, and one more is fitted on all rows as the
+fallback for everything else. The fits run on a process pool, one
+single-threaded XGBoost per core, like tune_model.py. The held-out accuracy
+is reported per region and for the fallback alone on the same rows.
+
+    python train_model.py --regions 3 --region-min-rows 5000 --publish
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+from regional_model import RegionalModel, region_codes, region_name
+
+# ✅ Smaller than the global MODEL_PARAMS: each region only has to fit its own lots
+REGION_MODEL_PARAMS = dict(
+    n_estimators=200,
+    learning_rate=0.1,
+    max_depth=6,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    random_state=42,
+)
+FALLBACK = "*"
+
+# Worker-process globals, filled once per worker by _init_worker
+_data = {}
+
+
+def _init_worker(X_train, y_train):
+    _data.update(X_train=X_train, y_train=y_train)
+
+
+def fit_region(job):
+    name, rows, params = job
+    X, y = _data["X_train"][rows], _data["y_train"][rows]
+    negatives, positives = int((y == 0).sum()), int((y == 1).sum())
+    started = time.perf_counter()
+    # Regions always have both classes (plan_regions), but the fallback may have no positives at all
+    model = xgb.XGBClassifier(**params, tree_method="hist", n_jobs=1,
+                              scale_pos_weight=negatives / positives if positives else 1.0)
+    model.fit(X, y)
+    return name, model, round(time.perf_counter() - started, 3)
+
+
+def plan_regions(codes, y, precision, min_rows):
+    """{geohash: row indices} for the regions big enough to get their own model."""
+    cells, inverse, counts = np.unique(codes, return_inverse=True, return_counts=True)
+    regions = {}
+    for i in np.flatnonzero(counts >= min_rows):
+        rows = np.flatnonzero(inverse == i)
+        # A region that only ever saw one class can't fit a classifier; the fallback covers it
+        if 0 < y[rows].sum() < len(rows):
+            regions[region_name(cells[i], precision)] = rows
+    return regions
+
+
+def train_regional(X, y, precision=3, min_rows=5000, workers=None, params=None, fallback_params=None,
+                   publish_model=False, compiled=False):
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y).astype(np.int64)
+    params = params or REGION_MODEL_PARAMS
+    fallback_params = fallback_params or params
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    regions = plan_regions(region_codes(X_train[:, 0], X_train[:, 1], precision), y_train, precision, min_rows)
+    # The fallback sees every row and takes longest, so it goes first
+    jobs = [(FALLBACK, np.arange(len(X_train)), fallback_params)] + [(name, rows, params) for name, rows in regions.items()]
+    workers = min(workers or os.cpu_count(), len(jobs))
+    print(f"🔎 Fitting {len(regions)} regional models and a fallback on {workers} processes")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X_train, y_train)) as pool:
+        fitted = {name: (model, seconds) for name, model, seconds in pool.map(fit_region, jobs)}
+    fit_seconds = time.perf_counter() - started
+
+    fallback = fitted.pop(FALLBACK)[0]
+    model = RegionalModel(precision, {name: m for name, (m, _) in fitted.items()}, fallback)
+
+    # ✅ Held-out accuracy per region, against the fallback alone on the same rows
+    predicted = model.predict(X_test)
+    fallback_predicted = np.asarray(fallback.predict(X_test))
+    routes = np.array([name or FALLBACK for name in model.route(X_test[:, 0], X_test[:, 1])])
+    per_region = {}
+    for name in sorted(set(routes)):
+        rows = routes == name
+        per_region[name] = {
+            "train_rows": len(regions[name]) if name in regions else None,
+            "test_rows": int(rows.sum()),
+            "accuracy": round(float((predicted[rows] == y_test[rows]).mean()), 4),
+            "fallback_accuracy": round(float((fallback_predicted[rows] == y_test[rows]).mean()), 4),
+            "fit_seconds": fitted[name][1] if name in fitted else None,
+        }
+    accuracy = float((predicted == y_test).mean())
+    print(f"🎯 Regional accuracy: {accuracy:.4f} (fallback alone: {float((fallback_predicted == y_test).mean()):.4f})")
+    for name, stats in per_region.items():
+        print(f"   {name:>6}  rows={stats['test_rows']:>8}  accuracy={stats['accuracy']:.4f}  fallback={stats['fallback_accuracy']:.4f}")
+
+    if compiled:
+        compiled_regional = model.compile()
+        mismatches = int((compiled_regional.predict(X_test) != predicted).sum())
+        if mismatches:
+            raise ValueError(f"Compiled regional model disagrees with model.predict on {mismatches}/{len(X_test)} rows")
+        model = compiled_regional
+
+    result = {
+        "precision": precision,
+        "regions": len(regions),
+        "accuracy": round(accuracy, 4),
+        "fallback_accuracy": round(float((fallback_predicted == y_test).mean()), 4),
+        "fit_wall_s": round(fit_seconds, 3),
+        "per_region": per_region,
+        "model": model,
+    }
+    if publish_model:
+        from model_registry import publish
+
+        result["model_version"], result["model_path"] = publish(model)
+        print(f"💾 Model {result['model_version']} saved to {result['model_path']}")
+    return result
@@ -0,0 +1,202 @@
+"""Out-of-core training for train_model.py --stream.
+
+1. The CSV is read once in typed chunks and converted to a columnar cache
+   (float32 feature matrix + uint8 labels) that later runs memory-map.
+2. Rows are split into train/test by a hash of the row number, so the split
+   is reproducible without holding a shuffled index in memory.
+3. Instead of SMOTE over the whole dataset, class imbalance is handled with
+   scale_pos_weight computed from streamed class counts.
+4. Training reads the cache through an xgb.DataIter into a quantile
+   DMatrix (external-memory when this XGBoost supports it), so only one chunk
+   of raw rows is materialised at a time.
+
+Text columns are encoded and features left unscaled exactly as in the
+in-memory path (train_model.prepare_features), so both modes produce models
+for the raw feature values the serving routes pass.
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from model_registry import publish
+from prediction import DAY_CLASSES, FEATURE_COLUMNS, WEATHER_CLASSES, encode_categories
+from profiling import StageProfiler
+
+CSV_DTYPES = {"latitude": "float32", "longitude": "float32", "hour_of_day": "float32", "availability": "float32"}
+TEST_FRACTION = 0.2
+
+
+def build_columnar_cache(csv_path, cache_dir, chunksize=1_000_000, max_rows=None):
+    """Convert the CSV to features.f32 / labels.u8 once; reused while the source file is unchanged."""
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    stat = os.stat(csv_path)
+    source = {"csv": os.path.abspath(csv_path), "size": stat.st_size, "mtime": stat.st_mtime, "max_rows": max_rows}
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("source") == source:
+            return meta
+
+    features_path = os.path.join(cache_dir, "features.f32")
+    labels_path = os.path.join(cache_dir, "labels.u8")
+    rows = 0
+    with open(features_path, "wb") as features_file, open(labels_path, "wb") as labels_file:
+        reader = pd.read_csv(csv_path, dtype=CSV_DTYPES, chunksize=chunksize, nrows=max_rows)
+        for chunk in reader:
+            chunk["day_of_week"] = encode_categories(chunk["day_of_week"], DAY_CLASSES).astype("float32")
+            chunk["weather"] = encode_categories(chunk["weather"], WEATHER_CLASSES).astype("float32")
+            chunk = chunk.dropna()
+            # ✅ Same binarisation as the in-memory path (astype(int) truncates)
+            labels = chunk["availability"].to_numpy().astype(np.int64).astype(np.uint8)
+            np.ascontiguousarray(chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float32)).tofile(features_file)
+            labels.tofile(labels_file)
+            rows += len(chunk)
+
+    meta = {"source": source, "rows": rows, "features": FEATURE_COLUMNS}
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def open_columnar_cache(cache_dir, rows):
+    X = np.memmap(os.path.join(cache_dir, "features.f32"), dtype=np.float32, mode="r", shape=(rows, len(FEATURE_COLUMNS)))
+    y = np.memmap(os.path.join(cache_dir, "labels.u8"), dtype=np.uint8, mode="r", shape=(rows,))
+    return X, y
+
+
+def is_test_row(row_numbers):
+    """Deterministic ~20% test split from a multiplicative hash of the row number."""
+    hashed = (row_numbers.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return hashed < np.uint64(int(TEST_FRACTION * 2 ** 32))
+
+
+def iter_chunks(X, y, chunk_rows, test):
+    """Yield (features, labels) for the train or test rows, one chunk at a time."""
+    for start in range(0, len(y), chunk_rows):
+        stop = min(start + chunk_rows, len(y))
+        mask = is_test_row(np.arange(start, stop)) == test
+        yield np.asarray(X[start:stop][mask]), np.asarray(y[start:stop][mask])
+
+
+class ChunkIter(xgb.DataIter):
+    def __init__(self, X, y, chunk_rows, cache_prefix=None):
+        self._X, self._y, self._chunk_rows = X, y, chunk_rows
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_chunks(self._X, self._y, self._chunk_rows, test=False)
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return 0
+        input_data(data=chunk[0], label=chunk[1])
+        return 1
+
+    def reset(self):
+        self._chunks = None
+
+
+def class_counts(X, y, chunk_rows):
+    negatives = positives = 0
+    for _, labels in iter_chunks(X, y, chunk_rows, test=False):
+        positives += int(labels.sum())
+        negatives += len(labels) - int(labels.sum())
+    return negatives, positives
+
+
+def training_matrix(X, y, chunk_rows, cache_dir):
+    """External-memory quantile DMatrix when available (XGBoost >= 3.0), else an in-memory quantised one."""
+    if hasattr(xgb, "ExtMemQuantileDMatrix"):
+        it = ChunkIter(X, y, chunk_rows, cache_prefix=os.path.join(cache_dir, "xgb_cache"))
+        return xgb.ExtMemQuantileDMatrix(it), "ExtMemQuantileDMatrix"
+    return xgb.QuantileDMatrix(ChunkIter(X, y, chunk_rows)), "QuantileDMatrix"
+
+
+def to_classifier(booster, model_params):
+    """Wrap a trained Booster in an XGBClassifier so serving and compiled_model can use it unchanged."""
+    model = xgb.XGBClassifier(**model_params)
+    model.load_model(bytearray(booster.save_raw("json")))
+    if not getattr(model, "n_classes_", 0):
+        model.n_classes_ = 2
+    return model
+
+
+def train_streaming(csv_path, model_params, chunksize=1_000_000, cache_dir="data_cache", max_rows=None, report_path=None):
+    profiler = StageProfiler()
+
+    with profiler.stage("load"):
+        meta = build_columnar_cache(csv_path, cache_dir, chunksize, max_rows)
+        X, y = open_columnar_cache(cache_dir, meta["rows"])
+    print(f"✅ Columnar cache ready: {meta['rows']} rows in {cache_dir}")
+
+    # ✅ Class weighting instead of full-dataset SMOTE
+    with profiler.stage("class_weights"):
+        negatives, positives = class_counts(X, y, chunksize)
+        scale_pos_weight = negatives / positives if positives else 1.0
+    with profiler.stage("matrix"):
+        dtrain, matrix_kind = training_matrix(X, y, chunksize, cache_dir)
+
+    params = {
+        "objective": "binary:logistic",
+        "tree_method": "hist",
+        "eta": model_params["learning_rate"],
+        "max_depth": model_params["max_depth"],
+        "subsample": model_params["subsample"],
+        "colsample_bytree": model_params["colsample_bytree"],
+        "seed": model_params["random_state"],
+        "scale_pos_weight": scale_pos_weight,
+    }
+    with profiler.stage("fit"):
+        booster = xgb.train(params, dtrain, num_boost_round=model_params["n_estimators"])
+
+    # ✅ Evaluate chunk by chunk on the held-out rows
+    with profiler.stage("evaluate"):
+        confusion = np.zeros((2, 2), dtype=np.int64)
+        for features, labels in iter_chunks(X, y, chunksize, test=True):
+            if len(labels):
+                predicted = (booster.inplace_predict(features) > 0.5).astype(np.int64)
+                np.add.at(confusion, (labels.astype(np.int64), predicted), 1)
+        accuracy = np.trace(confusion) / max(confusion.sum(), 1)
+    print(f"🎯 Model Accuracy: {accuracy:.4f}")
+
+    with profiler.stage("save"):
+        model_version, model_save_path = publish(to_classifier(booster, model_params))
+    print(f"💾 Model {model_version} saved to {model_save_path}")
+
+    summary = profiler.summary()
+    report = {
+        "rows": meta["rows"],
+        "matrix": matrix_kind,
+        "scale_pos_weight": round(scale_pos_weight, 4),
+        "accuracy": round(float(accuracy), 4),
+        "confusion_matrix": confusion.tolist(),
+        "stages_s": {name: stage["wall_s"] for name, stage in summary["stages"].items()},
+        "wall_s": summary["wall_s"],
+        "peak_rss_mb": summary["peak_rss_mb"],
+        "model_version": model_version,
+    }
+    print(f"📈 {json.dumps(report)}")
+
+    if report_path:
+        from train_model import write_report
+
+        write_report(report_path, {
+            "csv": csv_path,
+            "model_version": model_version,
+            "model_path": model_save_path,
+            "model_size_bytes": os.path.getsize(model_save_path),
+            "model_params": model_params,
+            "metrics": {"accuracy": float(accuracy), "confusion_matrix": confusion.tolist()},
+            "dataset": {
+                "rows_after_cleaning": meta["rows"],
+                "features": FEATURE_COLUMNS,
+                "class_counts_train": {"0": negatives, "1": positives},
+                "scale_pos_weight": scale_pos_weight,
+                "matrix": matrix_kind,
+            },
+            **summary,
+        })
+    return report
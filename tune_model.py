@@ -0,0 +1,148 @@
+"""Hyperparameter search for the availability model.
+
+Trials run on a process pool (one single-threaded XGBoost per core), each with
+early stopping on a validation split carved out of the training data, and are
+recorded in a local SQLite results store. The search prints the Pareto front
+of test accuracy versus inference cost (trees actually used × max_depth) and
+picks the cheapest configuration that meets --accuracy-floor.
+
+    python train_model.py --tune --trials 40 --accuracy-floor 0.95 --publish
+"""
+import itertools
+import json
+import os
+import random
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+TUNING_DB_PATH = os.getenv("TUNING_DB_PATH", "tuning_results.sqlite3")
+EARLY_STOPPING_ROUNDS = 20
+
+DEFAULT_SEARCH_SPACE = {
+    "n_estimators": [100, 200, 500],
+    "max_depth": [3, 4, 6, 8, 10],
+    "learning_rate": [0.05, 0.1, 0.2],
+    "subsample": [0.8, 1.0],
+    "colsample_bytree": [0.8, 1.0],
+}
+
+# Worker-process globals, filled once per worker by _init_worker
+_data = {}
+
+
+def _init_worker(X_train, y_train, X_valid, y_valid, X_test, y_test):
+    _data.update(X_train=X_train, y_train=y_train, X_valid=X_valid, y_valid=y_valid, X_test=X_test, y_test=y_test)
+
+
+def fit_trial(params):
+    """Fit one configuration with early stopping; used both in workers and to refit the winner."""
+    negatives = int((_data["y_train"] == 0).sum())
+    positives = int((_data["y_train"] == 1).sum())
+    model = xgb.XGBClassifier(
+        **params,
+        tree_method="hist",
+        n_jobs=1,
+        random_state=42,
+        eval_metric="logloss",
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        scale_pos_weight=negatives / positives if positives else 1.0,
+    )
+    model.fit(_data["X_train"], _data["y_train"], eval_set=[(_data["X_valid"], _data["y_valid"])], verbose=False)
+    return model
+
+
+def run_trial(params):
+    started = time.perf_counter()
+    model = fit_trial(params)
+    fit_seconds = time.perf_counter() - started
+    trees = model.best_iteration + 1
+    return {
+        "params": params,
+        "accuracy": float(accuracy_score(_data["y_test"], model.predict(_data["X_test"]))),
+        "trees": trees,
+        "max_depth": params["max_depth"],
+        "cost": trees * params["max_depth"],
+        "fit_seconds": round(fit_seconds, 3),
+    }
+
+
+def sample_configs(space, trials, seed=42):
+    """The full grid if it has at most `trials` points, otherwise a seeded random sample of it."""
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if len(grid) <= trials:
+        return grid
+    return random.Random(seed).sample(grid, trials)
+
+
+def pareto_front(results):
+    """Trials not beaten by any cheaper-or-equal trial on accuracy, cheapest first."""
+    front, best = [], -1.0
+    for result in sorted(results, key=lambda r: (r["cost"], -r["accuracy"])):
+        if result["accuracy"] > best:
+            front.append(result)
+            best = result["accuracy"]
+    return front
+
+
+def record(results, run_id, db_path=TUNING_DB_PATH):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS trials ("
+            " run_id TEXT, created_at REAL, params TEXT, accuracy REAL, trees INTEGER,"
+            " max_depth INTEGER, cost INTEGER, fit_seconds REAL)"
+        )
+        conn.executemany(
+            "INSERT INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (run_id, time.time(), json.dumps(r["params"], sort_keys=True), r["accuracy"], r["trees"],
+                 r["max_depth"], r["cost"], r["fit_seconds"])
+                for r in results
+            ],
+        )
+
+
+def tune(X, y, search_space=None, trials=40, accuracy_floor=None, workers=None, publish_model=False):
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    X_train, X_valid, y_train, y_valid = train_test_split(X_train, y_train, test_size=0.2, random_state=42, stratify=y_train)
+    splits = (X_train, y_train, X_valid, y_valid, X_test, y_test)
+
+    configs = sample_configs(search_space or DEFAULT_SEARCH_SPACE, trials)
+    workers = workers or os.cpu_count()
+    print(f"🔎 Running {len(configs)} trials on {workers} processes")
+
+    run_id = uuid.uuid4().hex[:12]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=splits) as pool:
+        results = list(pool.map(run_trial, configs))
+    record(results, run_id)
+
+    front = pareto_front(results)
+    print(f"📈 Pareto front (run {run_id}): accuracy vs cost = trees × depth")
+    for r in front:
+        print(f"   cost={r['cost']:>6}  accuracy={r['accuracy']:.4f}  trees={r['trees']}  {r['params']}")
+
+    eligible = [r for r in front if accuracy_floor is None or r["accuracy"] >= accuracy_floor]
+    if not eligible:
+        print(f"❌ No configuration reached the accuracy floor of {accuracy_floor}")
+        return {"run_id": run_id, "front": front, "chosen": None}
+
+    chosen = eligible[0] if accuracy_floor is not None else front[-1]
+    print(f"✅ Chosen: cost={chosen['cost']} accuracy={chosen['accuracy']:.4f} {chosen['params']}")
+
+    if publish_model:
+        from model_registry import publish
+
+        _init_worker(*splits)
+        model = fit_trial(chosen["params"])
+        model_version, model_save_path = publish(model)
+        print(f"💾 Model {model_version} saved to {model_save_path}")
+
+    return {"run_id": run_id, "front": front, "chosen": chosen}
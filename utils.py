@@ -1,75 +1,132 @@
-import jwt
-import datetime
-import bcrypt
-import os
-import requests
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Secret key for JWT
-SECRET_KEY = os.getenv("SECRET_KEY", "your_default_secret_key")
-
-# Google Maps API Key
-GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
-if not GOOGLE_MAPS_API_KEY:
-    raise ValueError("Missing Google Maps API Key. Check your .env file!")
-
-
-def generate_token(user_id):
-    """Generate JWT token for authentication"""
-    payload = {
-        "user_id": user_id,
-        "exp": datetime.datetime.utcnow() + datetime.timedelta(days=1),
-        "iat": datetime.datetime.utcnow()
-    }
-    token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
-    return token
-
-
-def verify_token(token):
-    """Verify JWT token and return decoded payload"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        return payload
-    except jwt.ExpiredSignatureError:
-        return None  # Token has expired
-    except jwt.InvalidTokenError:
-        return None  # Invalid token
-
-
-def hash_password(password):
-    """Hash a password before storing in the database"""
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed_password.decode('utf-8')
-
-
-def check_password(password, hashed_password):
-    """Check if the provided password matches the hashed password"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
-
-
-def get_coordinates(location):
-    """Fetch latitude and longitude using Google Maps API"""
-    try:
-        url = f"https://maps.googleapis.com/maps/api/geocode/json?address={location}&key={GOOGLE_MAPS_API_KEY}"
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            print("Google Maps API Error:", response.json())
-            return None
-
-        data = response.json()
-
-        if not data["results"]:
-            print("No results from Google Maps API")
-            return None
-
-        coords = data["results"][0]["geometry"]["location"]
-        return coords["lat"], coords["lng"]
-
-    except Exception as e:
-        print("Error in get_coordinates:", e)
-        return None
+import jwt
+import datetime
+import bcrypt
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import http_client
+from dotenv import load_dotenv
+from cache import TTLCache
+from config import Config
+from geocode_cache import geocode_cache
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Secret key for JWT
+SECRET_KEY = os.getenv("SECRET_KEY", "your_default_secret_key")
+
+# Google Maps API Key
+GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+if not GOOGLE_MAPS_API_KEY:
+    raise ValueError("Missing Google Maps API Key. Check your .env file!")
+
+# ✅ bcrypt runs on a bounded pool so logins can't oversubscribe the CPU
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 2)))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "64"))
+
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_slots = threading.BoundedSemaphore(BCRYPT_WORKERS + BCRYPT_MAX_PENDING)
+
+# ✅ Verified JWT payloads, keyed by token digest, kept until the token expires
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_MAX_TTL = int(os.getenv("JWT_CACHE_MAX_TTL", "3600"))
+token_cache = TTLCache(maxsize=JWT_CACHE_SIZE, ttl=JWT_CACHE_MAX_TTL)
+
+
+class PasswordWorkersBusy(Exception):
+    """More bcrypt operations are waiting than BCRYPT_MAX_PENDING allows."""
+
+
+def generate_token(user_id):
+    """Generate JWT token for authentication"""
+    payload = {
+        "user_id": user_id,
+        "exp": datetime.datetime.utcnow() + datetime.timedelta(days=1),
+        "iat": datetime.datetime.utcnow()
+    }
+    token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+    return token
+
+
+def verify_token(token):
+    """Verify JWT token and return decoded payload (cached by token digest until it expires)"""
+    if isinstance(token, str):
+        token = token.encode("utf-8")
+    if not isinstance(token, bytes) or not token:
+        return None  # Missing token
+    key = hashlib.sha256(token).digest()
+    found, payload = token_cache.get(key)
+    if found:
+        # Callers get their own copy; the cached payload is shared
+        return dict(payload)
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        remaining = payload.get("exp", time.time() + JWT_CACHE_MAX_TTL) - time.time()
+        if remaining > 0:
+            token_cache.set(key, dict(payload), ttl=min(remaining, JWT_CACHE_MAX_TTL))
+        return payload
+    except jwt.ExpiredSignatureError:
+        return None  # Token has expired
+    except jwt.InvalidTokenError:
+        return None  # Invalid token
+
+
+def _run_bcrypt(fn, *args):
+    """Run one bcrypt call on the pool; fails fast instead of queueing without bound."""
+    if not _bcrypt_slots.acquire(blocking=False):
+        raise PasswordWorkersBusy("Too many password checks in progress")
+    try:
+        return _bcrypt_pool.submit(fn, *args).result()
+    finally:
+        _bcrypt_slots.release()
+
+
+def hash_password(password):
+    """Hash a password before storing in the database"""
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed_password = _run_bcrypt(bcrypt.hashpw, password.encode('utf-8'), salt)
+    return hashed_password.decode('utf-8')
+
+
+def check_password(password, hashed_password):
+    """Check if the provided password matches the hashed password"""
+    return _run_bcrypt(bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def geocode_address(location):
+    """Geocode an address with Google: (lat, lng), () if there is no match, or None on error"""
+    try:
+        params = {"address": location, "key": GOOGLE_MAPS_API_KEY}
+        response = http_client.get(Config.GOOGLE_GEOCODE_URL, params=params, upstream="geocode")
+
+        if response.status_code != 200:
+            print("Google Maps API Error:", response.text)
+            return None
+
+        data = response.json()
+        status = data.get("status")
+
+        if status == "ZERO_RESULTS":
+            print("No results from Google Maps API")
+            return ()
+
+        # OVER_QUERY_LIMIT, REQUEST_DENIED etc. come back as 200 with no results: an error, not a miss
+        if status != "OK" or not data.get("results"):
+            print("Google Maps API Error:", status, data.get("error_message", ""))
+            return None
+
+        coords = data["results"][0]["geometry"]["location"]
+        return coords["lat"], coords["lng"]
+
+    except Exception as e:
+        print("Error in geocode_address:", e)
+        return None
+
+
+def get_coordinates(location):
+    """Fetch latitude and longitude, using the persistent geocoding cache before Google"""
+    return geocode_cache.get_or_geocode(location, geocode_address)